@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+
+import httpx
+
+# Starts the API in a fresh process against a live database and measures how
+# long after the start it answers a burst of concurrent reads as fast as it
+# does in steady state, with and without the startup warm-up
+
+URL = "http://127.0.0.1:{port}"
+
+
+def parse_args():
+    parser = ArgumentParser(prog="python -m benchmarks.cold_start")
+
+    parser.add_argument("--department-id", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--warmup-connections",
+        type=int,
+        nargs="+",
+        default=[0, 10],
+        help="WARMUP_CONNECTIONS values to compare",
+    )
+
+    return parser.parse_args()
+
+
+async def burst(client: httpx.AsyncClient, path: str, concurrency: int):
+    async def get():
+        started_at = perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        return perf_counter() - started_at
+
+    return max(await asyncio.gather(*(get() for _ in range(concurrency))))
+
+
+async def wait_for(client: httpx.AsyncClient, path: str, started_at: float):
+    while True:
+        try:
+            if (await client.get(path)).status_code == 200:
+                return perf_counter() - started_at
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.005)
+
+
+async def run(args, warmup_connections: int):
+    env = os.environ | {"WARMUP_CONNECTIONS": str(warmup_connections)}
+    started_at = perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *(sys.executable, "-m", "uvicorn", "src.main:app"),
+        *("--port", str(args.port), "--log-level", "warning"),
+        env=env,
+    )
+
+    path = f"/departments/{args.department_id}?depth={args.depth}"
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    try:
+        async with httpx.AsyncClient(
+            base_url=URL.format(port=args.port), limits=limits, timeout=30
+        ) as client:
+            live_at = await wait_for(client, "/health/live", started_at)
+            ready = asyncio.create_task(wait_for(client, "/health/ready", started_at))
+
+            # Requests go out as soon as the server listens, like traffic hitting
+            # a replica whose readiness is not checked
+            latencies = []
+            for _ in range(args.rounds):
+                latencies.append(
+                    (
+                        perf_counter() - started_at,
+                        await burst(client, path, args.concurrency),
+                    )
+                )
+            ready_at = await ready
+    finally:
+        process.terminate()
+        await process.wait()
+
+    steady = median(latency for _, latency in latencies[len(latencies) // 2 :])
+    fast_at = next(
+        sent_at + latency for sent_at, latency in latencies if latency <= 2 * steady
+    )
+
+    print(f"WARMUP_CONNECTIONS={warmup_connections}")
+    print(f"  listening after          {live_at * 1000:>8.1f} ms")
+    print(f"  first burst took         {latencies[0][1] * 1000:>8.1f} ms")
+    print(f"  steady burst             {steady * 1000:>8.1f} ms")
+    print(f"  first fast burst after   {fast_at * 1000:>8.1f} ms")
+    print(f"  ready after              {ready_at * 1000:>8.1f} ms")
+
+
+async def main():
+    args = parse_args()
+    for warmup_connections in args.warmup_connections:
+        await run(args, warmup_connections)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
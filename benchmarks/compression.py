@@ -0,0 +1,150 @@
+import asyncio
+import json
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter, process_time
+
+from src.compression import CompressionResponder, encoders
+from src.generator.generator import OrganizationGenerator
+from src.generator.schemas import GeneratorConfigSchema
+from src.settings import settings
+
+# Compressed size, CPU time and estimated delivery time over a slow link for
+# department tree payloads, plus how long the event loop stalls while a large
+# body is compressed inline or in a worker thread
+
+LEVELS = {
+    "gzip": ("compression_gzip_level", [1, 6, 9]),
+    "br": ("compression_brotli_quality", [1, 4, 6, 11]),
+    "zstd": ("compression_zstd_level", [1, 3, 9, 19]),
+}
+
+
+def parse_args():
+    parser = ArgumentParser(prog="python -m benchmarks.compression")
+
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--link-mbit", type=float, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+
+    return parser.parse_args()
+
+
+def build_payload(departments: int):
+    # The shape of GET /departments/{id} with employees, one level per department
+    generator = OrganizationGenerator(
+        GeneratorConfigSchema(depth=12, max_departments=departments, max_employees=20)
+    )
+    created_at = datetime.now(timezone.utc).isoformat()
+
+    children = [
+        {"id": id, "name": name, "parent_id": parent_id, "created_at": created_at}
+        for id, name, parent_id in generator.departments()
+    ]
+    employees = [
+        {
+            "id": index,
+            "department_id": department_id,
+            "full_name": full_name,
+            "position": position,
+            "hired_at": hired_at.isoformat(),
+            "created_at": created_at,
+        }
+        for index, (department_id, full_name, position, hired_at) in enumerate(
+            generator.employees()
+        )
+    ]
+
+    return json.dumps(
+        {"department": children[0], "employees": employees, "children": children}
+    ).encode()
+
+
+def compress(encoding: str, body: bytes):
+    return encoders[encoding]().compress(body, True)
+
+
+def measure_sizes(body: bytes, link_mbit: float):
+    print(f"\npayload {len(body) / 1024:.0f} KiB")
+    print(f"{'':<12}{'ratio':>8}{'cpu ms':>10}{'link ms':>10}{'total ms':>10}")
+
+    link = link_mbit * 1_000_000 / 8
+    print(f"{'identity':<12}{1:>8.1f}{0:>10.1f}{len(body) / link * 1000:>10.1f}")
+
+    for encoding, (setting, levels) in LEVELS.items():
+        if encoding not in encoders:
+            print(f"{encoding:<12}not available")
+            continue
+
+        for level in levels:
+            setattr(settings, setting, level)
+
+            started_at = process_time()
+            compressed = compress(encoding, body)
+            cpu = process_time() - started_at
+            transfer = len(compressed) / link
+
+            print(
+                f"{f'{encoding}-{level}':<12}{len(body) / len(compressed):>8.1f}"
+                f"{cpu * 1000:>10.1f}{transfer * 1000:>10.1f}"
+                f"{(cpu + transfer) * 1000:>10.1f}"
+            )
+
+
+async def measure_loop_stall(body: bytes, offload_size: int):
+    settings.compression_offload_size = offload_size
+    stall = 0.0
+
+    async def ticker(done: asyncio.Event):
+        nonlocal stall
+        while not done.is_set():
+            started_at = perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, perf_counter() - started_at - 0.001)
+
+    async def send(_):
+        pass
+
+    done = asyncio.Event()
+    task = asyncio.create_task(ticker(done))
+    await asyncio.sleep(0.01)
+
+    responder = CompressionResponder(send, "gzip")
+    await responder.send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await responder.send({"type": "http.response.body", "body": body})
+
+    done.set()
+    await task
+    return stall
+
+
+async def main():
+    args = parse_args()
+
+    payloads = [build_payload(size) for size in args.sizes]
+    for body in payloads:
+        measure_sizes(body, args.link_mbit)
+
+    for setting, levels in LEVELS.values():
+        setattr(settings, setting, levels[1])
+
+    # The first rounds pay for the worker thread start and cold caches
+    body = payloads[-1]
+    inline, offloaded = [], []
+    for _ in range(args.rounds):
+        inline.append(await measure_loop_stall(body, len(body) + 1))
+        offloaded.append(await measure_loop_stall(body, 0))
+    inline, offloaded = median(inline[1:]), median(offloaded[1:])
+    print(f"\nevent loop stall on {len(body) / 1024:.0f} KiB with gzip")
+    print(f"inline: {inline * 1000:.1f} ms, offloaded: {offloaded * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
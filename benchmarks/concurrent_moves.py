@@ -0,0 +1,143 @@
+import asyncio
+from argparse import ArgumentParser
+from collections import Counter
+from random import Random
+from time import perf_counter
+from uuid import uuid4
+
+from sqlalchemy import delete, select, update
+
+from src.db import AsyncSessionLocal, engine
+from src.department.exceptions import (
+    ConcurrentStructureChangeError,
+    DepartmentCycleError,
+)
+from src.department.models import Department
+from src.department.service import DepartmentService
+from src.exceptions import DatabaseError
+from src.settings import settings
+from src.unit_of_work import UnitOfWork
+
+# Stress test for concurrent structural changes against a live database: many
+# workers move random departments of a fresh tree under random other ones, then
+# the resulting parent links are checked for cycles
+
+
+def parse_args():
+    parser = ArgumentParser(prog="python -m benchmarks.concurrent_moves")
+
+    parser.add_argument("--departments", type=int, default=200)
+    parser.add_argument("--branching", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument(
+        "--no-locks",
+        action="store_true",
+        help="disable advisory locks to compare throughput and correctness",
+    )
+
+    return parser.parse_args()
+
+
+async def create_tree(size: int, branching: int):
+    async with UnitOfWork(AsyncSessionLocal) as uow:
+        service = DepartmentService(uow)
+
+        root = await service.create_department(f"Stress test {uuid4()}", None)
+        ids = [root.id]
+
+        for index in range(1, size):
+            parent_id = ids[(index - 1) // branching]
+            department = await service.create_department(f"Node {index}", parent_id)
+            ids.append(department.id)
+
+    return ids
+
+
+async def move_randomly(
+    ids: list[int], rng: Random, deadline: float, outcomes: Counter
+):
+    while perf_counter() < deadline:
+        id, new_parent_id = rng.sample(ids[1:], 2)
+
+        started_at = perf_counter()
+        try:
+            async with UnitOfWork(AsyncSessionLocal) as uow:
+                await DepartmentService(uow).move_department(
+                    id, {"parent_id": new_parent_id}
+                )
+            outcomes["moved"] += 1
+        except DepartmentCycleError:
+            outcomes["rejected as cycle"] += 1
+        except ConcurrentStructureChangeError:
+            outcomes["lock attempts exhausted"] += 1
+        except DatabaseError:
+            outcomes["database error"] += 1
+
+        outcomes["latency"] += perf_counter() - started_at
+
+
+async def find_cycles(ids: list[int]):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Department.id, Department.parent_id).where(Department.id.in_(ids))
+        )
+        parents = dict(result.tuples().all())
+
+    cycles = 0
+    for id in ids:
+        seen = set()
+        while id is not None and id not in seen:
+            seen.add(id)
+            id = parents.get(id)
+        cycles += id is not None
+
+    return cycles
+
+
+async def remove_tree(ids: list[int]):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Department).where(Department.id.in_(ids)).values(parent_id=None)
+        )
+        await session.execute(delete(Department).where(Department.id.in_(ids)))
+        await session.commit()
+
+
+async def main():
+    args = parse_args()
+    settings.structure_locks = not args.no_locks
+
+    ids = await create_tree(args.departments, args.branching)
+    outcomes = Counter()
+
+    try:
+        deadline = perf_counter() + args.duration
+        started_at = perf_counter()
+        await asyncio.gather(
+            *(
+                move_randomly(ids, Random(f"{args.seed}:{worker}"), deadline, outcomes)
+                for worker in range(args.workers)
+            )
+        )
+        elapsed = perf_counter() - started_at
+
+        cycles = await find_cycles(ids)
+    finally:
+        await remove_tree(ids)
+        await engine.dispose()
+
+    attempts = sum(value for key, value in outcomes.items() if key != "latency")
+
+    print(f"structure locks: {settings.structure_locks}")
+    for key, value in sorted(outcomes.items()):
+        if key != "latency":
+            print(f"{key}: {value}")
+    print(f"moves per second: {outcomes['moved'] / elapsed:.1f}")
+    print(f"mean latency: {outcomes['latency'] / max(attempts, 1) * 1000:.1f} ms")
+    print(f"departments on or under a cycle: {cycles}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+import asyncio
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from random import Random
+from time import perf_counter
+from timeit import repeat
+
+from src.department.tree import DepartmentTree
+from src.generator.generator import OrganizationGenerator
+from src.generator.schemas import GeneratorConfigSchema
+
+# Memory footprint and lookup latency of the in-memory department tree on a
+# synthetic organization, no database needed
+
+CALLS = 10_000
+REPEATS = 5
+
+
+def parse_args():
+    parser = ArgumentParser(prog="python -m benchmarks.department_tree")
+
+    parser.add_argument("--departments", type=int, default=1_000_000)
+    parser.add_argument("--children", type=float, default=4)
+    parser.add_argument("--seed", default="0")
+
+    return parser.parse_args()
+
+
+async def rows(generator: OrganizationGenerator):
+    created_at = datetime.now(timezone.utc)
+    for id, name, parent_id in generator.departments():
+        yield id, name, parent_id, created_at
+
+
+def measure(name: str, call):
+    per_call = min(repeat(call, number=CALLS, repeat=REPEATS)) / CALLS
+    print(f"{name:<40}{per_call * 1_000_000:>10.2f} us")
+
+
+async def main():
+    args = parse_args()
+    generator = OrganizationGenerator(
+        GeneratorConfigSchema(
+            seed=args.seed,
+            depth=64,
+            children=args.children,
+            min_children=1,
+            max_departments=args.departments,
+        )
+    )
+
+    tree = DepartmentTree()
+
+    started_at = perf_counter()
+    await tree.load(rows(generator), 0)
+    elapsed = perf_counter() - started_at
+
+    tree = DepartmentTree()
+
+    tracemalloc.start()
+    await tree.load(rows(generator), 0)
+    memory, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = tree.stats()
+    print(f"departments: {tree.size}, distinct names: {stats['names']}")
+    print(f"load including generation: {elapsed:.2f} s")
+    print(f"arrays: {stats['array_bytes'] / tree.size * 1_000_000 / 2**20:.1f} MiB")
+    print(f"total: {memory / tree.size * 1_000_000 / 2**20:.1f} MiB per million")
+    print(f"peak while loading: {peak / tree.size * 1_000_000 / 2**20:.1f} MiB\n")
+
+    rng = Random(args.seed)
+    ids = [rng.randrange(1, tree.size + 1) for _ in range(CALLS)]
+    pairs = [(rng.randrange(1, 100), id) for id in ids]
+
+    def each(values, call):
+        iterator = iter(values * (REPEATS + 1))
+        return lambda: call(next(iterator))
+
+    measure(
+        "get_children depth=1",
+        each(ids, lambda id: tree.get_children(id, depth=1)),
+    )
+    measure(
+        "get_children depth=3",
+        each(ids, lambda id: tree.get_children(id, depth=3)),
+    )
+    measure(
+        "check_is_child",
+        each(pairs, lambda pair: tree.check_is_child(*pair)),
+    )
+    leaf_id = tree.size + 1
+
+    def add_and_remove_leaf(parent_id: int):
+        tree.upsert(leaf_id, "Leaf", parent_id)
+        tree.remove(leaf_id)
+
+    measure("upsert + remove leaf", each(ids, add_and_remove_leaf))
+
+    started_at = perf_counter()
+    tree.get_children(1)
+    print(f"\nwhole tree from the root: {perf_counter() - started_at:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+import asyncio
+import gc
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from functools import partial
+from itertools import cycle
+from random import Random
+from time import perf_counter
+
+from src.department.cache import ancestor_path_cache
+from src.department.enums import SearchModeEnum
+from src.department.models import Department
+from src.department.service import DepartmentService
+from src.employee.models import Employee
+from src.generator.generator import OrganizationGenerator
+from src.generator.schemas import GeneratorConfigSchema
+from src.memory.database import InMemoryDatabase, InMemorySession
+from src.memory.unit_of_work import InMemoryUnitOfWork
+from src.settings import settings
+
+import src.models  # type: ignore[no-unused-import] # NOQA: F401
+
+# Cost of the service layer on top of the repositories, with the in-memory
+# backend standing in for Postgres so no network or database time is included.
+# Each call runs in its own unit of work like a request does
+
+
+def parse_args():
+    parser = ArgumentParser(prog="python -m benchmarks.service_layer")
+
+    parser.add_argument("--departments", type=int, default=10_000)
+    parser.add_argument("--calls", type=int, default=1_000)
+    parser.add_argument("--seed", default="0")
+
+    return parser.parse_args()
+
+
+def load(database: InMemoryDatabase, generator: OrganizationGenerator):
+    created_at = datetime.now(timezone.utc)
+
+    for id, name, parent_id in generator.departments():
+        database.put(
+            Department,
+            id,
+            {"id": id, "name": name, "parent_id": parent_id, "created_at": created_at},
+        )
+
+    for id, (department_id, full_name, position, hired_at) in enumerate(
+        generator.employees(), 1
+    ):
+        database.put(
+            Employee,
+            id,
+            {
+                "id": id,
+                "department_id": department_id,
+                "full_name": full_name,
+                "position": position,
+                "hired_at": hired_at,
+                "created_at": created_at,
+            },
+        )
+
+
+async def measure(
+    name: str,
+    session_pool,
+    ids: list[int],
+    service_call,
+    repository_call,
+    repeat: int = 5,
+):
+    async def run(call):
+        # Like timeit, the garbage collector does not run during a pass
+        gc.collect()
+        gc.disable()
+        try:
+            started_at = perf_counter()
+            for id in ids:
+                async with InMemoryUnitOfWork(session_pool) as uow:
+                    await call(uow, id)
+            return (perf_counter() - started_at) / len(ids)
+        finally:
+            gc.enable()
+
+    # Best of several passes, the first one also warms up SQLAlchemy
+    service = min([await run(service_call) for _ in range(repeat)])
+    repository = (
+        min([await run(repository_call) for _ in range(repeat)])
+        if repository_call
+        else None
+    )
+
+    if repository is None:
+        print(f"{name:<40}{service * 1e6:>12.1f}")
+        return
+
+    print(
+        f"{name:<40}{service * 1e6:>12.1f}{repository * 1e6:>15.1f}"
+        f"{(service - repository) * 1e6:>12.1f}"
+    )
+
+
+async def main():
+    args = parse_args()
+    generator = OrganizationGenerator(
+        GeneratorConfigSchema(
+            seed=args.seed,
+            depth=12,
+            min_children=1,
+            max_departments=args.departments,
+            max_employees=20,
+        )
+    )
+
+    database = InMemoryDatabase()
+    load(database, generator)
+    session_pool = partial(InMemorySession, database)
+
+    rng = Random(args.seed)
+    department_ids = list(database.rows[Department])
+    ids = [rng.choice(department_ids) for _ in range(args.calls)]
+    names = [database.rows[Department][id]["name"][:3] for id in ids]
+
+    print(
+        f"departments: {len(department_ids)}, "
+        f"employees: {len(database.rows[Employee])}\n"
+    )
+    print(f"{'':<40}{'service us':>12}{'repository us':>15}{'overhead us':>12}")
+
+    async def get_department(depth: int, uow, id: int):
+        await DepartmentService(uow).get_department(id, depth, True)
+
+    async def fetch_department(depth: int, uow, id: int):
+        await uow.departments.get_by_id(id, include_employees=True)
+        await uow.departments.get_children(id, depth=depth)
+
+    for coalesce_reads in [False, True]:
+        settings.coalesce_reads = coalesce_reads
+        for depth in [1, 3]:
+            await measure(
+                f"get_department depth={depth} coalesce={coalesce_reads}",
+                session_pool,
+                ids,
+                partial(get_department, depth),
+                partial(fetch_department, depth),
+            )
+    settings.coalesce_reads = False
+
+    async def get_ancestors(uow, id: int):
+        ancestor_path_cache.clear()
+        await DepartmentService(uow).get_department_ancestors(id)
+
+    async def fetch_ancestors(uow, id: int):
+        await uow.departments.get_ancestors_many([id])
+
+    await measure(
+        "get_department_ancestors", session_pool, ids, get_ancestors, fetch_ancestors
+    )
+
+    async def get_cached_ancestors(uow, id: int):
+        await DepartmentService(uow).get_department_ancestors(id)
+
+    await measure(
+        "get_department_ancestors cached", session_pool, ids, get_cached_ancestors, None
+    )
+
+    queries = cycle(names)
+
+    async def search(uow, _):
+        await DepartmentService(uow).search_departments(
+            next(queries), SearchModeEnum.PREFIX, 20, 0
+        )
+
+    async def fetch_search(uow, _):
+        await uow.departments.search(
+            next(queries), mode=SearchModeEnum.PREFIX, limit=21, offset=0
+        )
+
+    await measure("search_departments prefix", session_pool, ids, search, fetch_search)
+
+    async def create_and_delete(uow, id: int):
+        service = DepartmentService(uow)
+        department = await service.create_department("Benchmark", id)
+        await service.delete_department(department.id, None)
+
+    await measure(
+        "create_department + delete", session_pool, ids, create_and_delete, None
+    )
+
+    async def rename(uow, id: int):
+        service = DepartmentService(uow)
+        name = database.rows[Department][id]["name"]
+        await service.move_department(id, {"name": f"{name} (renamed)"})
+        await service.move_department(id, {"name": name})
+
+    await measure("move_department rename twice", session_pool, ids, rename, None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
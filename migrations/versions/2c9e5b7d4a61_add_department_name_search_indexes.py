@@ -0,0 +1,31 @@
+"""add department name search indexes
+
+Revision ID: 2c9e5b7d4a61
+Revises: 557862365341
+Create Date: 2026-10-19 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c9e5b7d4a61'
+down_revision: Union[str, Sequence[str], None] = '557862365341'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('departments_name_prefix_idx', 'departments', [sa.text('name COLLATE "C"'), 'id'], unique=False)
+    op.create_index('departments_name_trgm_idx', 'departments', ['name'], unique=False, postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('departments_name_trgm_idx', table_name='departments', postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'})
+    op.drop_index('departments_name_prefix_idx', table_name='departments')
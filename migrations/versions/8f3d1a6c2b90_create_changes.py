@@ -0,0 +1,39 @@
+"""create changes
+
+Revision ID: 8f3d1a6c2b90
+Revises: 2c9e5b7d4a61
+Create Date: 2026-10-19 18:41:07.218934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3d1a6c2b90'
+down_revision: Union[str, Sequence[str], None] = '2c9e5b7d4a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('changes',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.Enum('department', 'employee', name='entity_type'), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.Enum('created', 'renamed', 'moved', 'deleted', name='change_action'), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('changes')
+    sa.Enum(name='change_action').drop(op.get_bind())
+    sa.Enum(name='entity_type').drop(op.get_bind())
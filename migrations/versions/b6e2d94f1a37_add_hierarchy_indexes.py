@@ -0,0 +1,30 @@
+"""add hierarchy indexes
+
+Revision ID: b6e2d94f1a37
+Revises: 8f3d1a6c2b90
+Create Date: 2026-10-19 21:07:52.613840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d94f1a37'
+down_revision: Union[str, Sequence[str], None] = '8f3d1a6c2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('departments_parent_id_idx', 'departments', ['parent_id'], unique=False)
+    op.create_index('employees_department_id_idx', 'employees', ['department_id'], unique=False, postgresql_include=['position', 'hired_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('employees_department_id_idx', table_name='employees', postgresql_include=['position', 'hired_at'])
+    op.drop_index('departments_parent_id_idx', table_name='departments')
@@ -0,0 +1,18 @@
+import hmac
+from typing import Annotated
+
+from fastapi import Header
+
+from src.exceptions import ForbiddenError
+from src.settings import settings
+
+
+def verify_admin_token(x_admin_token: Annotated[str | None, Header()] = None):
+    if settings.admin_token is None:
+        raise ForbiddenError("Admin endpoints are disabled")
+
+    # Compared in constant time so response timing does not leak the token
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), settings.admin_token.encode()
+    ):
+        raise ForbiddenError("Invalid admin token")
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from src.admin.dependencies import verify_admin_token
+from src.admin.schemas import (
+    AdmissionLimiterSchema,
+    ChangeBroadcasterSchema,
+    RequestProfileSchema,
+    SlowQuerySchema,
+)
+from src.admission import limiters
+from src.changelog.broadcaster import change_broadcaster
+from src.profiling import profiles
+from src.slow_queries import slow_query_log
+from src.schemas import HTTPErrorSchema
+
+router = APIRouter(
+    dependencies=[Depends(verify_admin_token)],
+    responses={status.HTTP_403_FORBIDDEN: {"model": HTTPErrorSchema}},
+)
+
+
+@router.get("/admission", response_model=list[AdmissionLimiterSchema])
+async def get_admission_stats():
+    return [limiter.stats() for limiter in limiters.values()]
+
+
+@router.get("/changes-stream", response_model=ChangeBroadcasterSchema)
+async def get_change_stream_stats():
+    return change_broadcaster.stats()
+
+
+@router.get("/profiles", response_model=list[RequestProfileSchema])
+async def get_profiles(
+    path: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=1000),
+):
+    return [profile.stats() for profile in profiles.list(path=path, limit=limit)]
+
+
+@router.get("/slow-queries", response_model=list[SlowQuerySchema])
+async def get_slow_queries():
+    return [query.stats() for query in slow_query_log.list()]
+
+
+@router.delete(
+    "/slow-queries", response_model=None, status_code=status.HTTP_204_NO_CONTENT
+)
+async def clear_slow_queries():
+    slow_query_log.clear()
@@ -0,0 +1,57 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class AdmissionLimiterSchema(BaseModel):
+    name: str
+    limit: int
+    queue_size: int
+    active: int
+    waiting: int
+    admitted: int
+    rejected: int
+
+
+class ChangeBroadcasterSchema(BaseModel):
+    listening: bool
+    cursor: int
+    subscribers: int
+    max_subscribers: int
+    queue_size: int
+    delivered: int
+    dropped: int
+    errors: int
+    last_error: str | None
+    last_error_at: datetime | None
+
+
+class ProfileCallSchema(BaseModel):
+    name: str
+    calls: int
+    duration: float
+
+
+class RequestProfileSchema(BaseModel):
+    id: int
+    method: str
+    path: str
+    status_code: int | None
+    started_at: datetime
+    duration: float
+    phases: dict[str, float]
+    calls: list[ProfileCallSchema]
+
+
+class SlowQuerySchema(BaseModel):
+    fingerprint: str
+    statement: str
+    calls: int
+    total_duration: float
+    max_duration: float
+    last_duration: float
+    last_parameters: list[str]
+    last_seen_at: datetime
+    plan: str | None
+    plan_parameters: list[str] | None
+    plan_captured_at: datetime | None
+    plan_error: str | None
@@ -0,0 +1,79 @@
+import asyncio
+
+from fastapi import Depends
+
+from src.exceptions import ServiceOverloadedError
+from src.settings import settings
+
+
+class AdmissionLimiter:
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self):
+        if self.active + self.waiting >= self.limit + self.queue_size:
+            self._reject("queue is full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except TimeoutError:
+            self._reject("timed out waiting in the queue")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise ServiceOverloadedError(
+            f"Too many concurrent {self.name} requests, {reason}",
+            retry_after=settings.admission_retry_after,
+        )
+
+
+limiters = {
+    "default": AdmissionLimiter(
+        "default",
+        settings.admission_limit,
+        settings.admission_queue_size,
+        settings.admission_queue_timeout,
+    ),
+    "heavy": AdmissionLimiter(
+        "heavy",
+        settings.admission_heavy_limit,
+        settings.admission_heavy_queue_size,
+        settings.admission_queue_timeout,
+    ),
+}
+
+
+def admit(name: str):
+    return Depends(limiters[name])
@@ -1,7 +1,15 @@
 from fastapi import APIRouter
 
+from src.admin.routes import router as admin_router
+from src.changelog.routes import router as changelog_router
 from src.department.routes import router as department_router
+from src.employee.routes import router as employee_router
+from src.health.routes import router as health_router
 
 router = APIRouter()
 
 router.include_router(department_router, prefix="/departments")
+router.include_router(employee_router, prefix="/employees")
+router.include_router(changelog_router, prefix="/changes")
+router.include_router(admin_router, prefix="/admin")
+router.include_router(health_router, prefix="/health")
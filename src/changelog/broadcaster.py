@@ -0,0 +1,264 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timezone
+
+from asyncpg import InterfaceError, PostgresError
+from sqlalchemy.exc import DBAPIError
+
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.changelog.models import Change
+from src.changelog.repository import CHANGES_CHANNEL
+from src.db import AsyncSessionLocal, engine
+from src.department.cache import ancestor_path_cache
+from src.department.service import DepartmentService
+from src.department.tree import department_tree
+from src.exceptions import ServiceOverloadedError
+from src.settings import settings
+from src.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+# Failures of the connection or of the database, everything else is a bug and
+# stops the stream. The listener works on the driver connection, so its errors
+# are not wrapped by SQLAlchemy
+CONNECTION_ERRORS = (DBAPIError, PostgresError, InterfaceError, OSError)
+
+
+class Subscription:
+    def __init__(self, department_id: int, queue_size: int):
+        self.department_id = department_id
+        self.closed_reason: str | None = None
+
+        # None marks the end of the stream
+        self.queue: asyncio.Queue[Change | None] = asyncio.Queue(queue_size)
+
+    def push(self, change: Change):
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self, reason: str):
+        self.closed_reason = reason
+
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class ChangeBroadcaster:
+    def __init__(self, session_pool, max_subscribers: int, queue_size: int):
+        self.session_pool = session_pool
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+
+        self.subscribers = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self.last_error_at: datetime | None = None
+
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self.cursor = 0
+        self._pending = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def check_capacity(self):
+        if self.subscribers >= self.max_subscribers:
+            raise ServiceOverloadedError(
+                "Too many change subscribers",
+                retry_after=settings.admission_retry_after,
+            )
+
+    @asynccontextmanager
+    async def subscribe(self, department_id: int):
+        self.check_capacity()
+        await self.start()
+
+        subscription = Subscription(department_id, self.queue_size)
+        self._subscriptions.setdefault(department_id, set()).add(subscription)
+        self.subscribers += 1
+        try:
+            yield subscription
+        finally:
+            self._unsubscribe(subscription)
+
+    async def start(self):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+
+            # Subscribers only see changes committed after they subscribed
+            async with UnitOfWork(self.session_pool) as uow:
+                self.cursor = await uow.changes.get_last_id()
+
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self._close(subscription, "Server is shutting down")
+
+    def stats(self):
+        return {
+            "listening": self._task is not None and not self._task.done(),
+            "cursor": self.cursor,
+            "subscribers": self.subscribers,
+            "max_subscribers": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+        }
+
+    async def _listen(self):
+        # One LISTEN connection per process. Notifications only wake the loop,
+        # the changes themselves are read by cursor, so nothing is lost while
+        # the connection is being re-established
+        while True:
+            try:
+                async with engine.connect() as connection:
+                    raw_connection = await connection.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+
+                    await driver_connection.add_listener(CHANGES_CHANNEL, self._notify)
+                    try:
+                        while not driver_connection.is_closed():
+                            await self._publish()
+                            with suppress(TimeoutError):
+                                await asyncio.wait_for(
+                                    self._pending.wait(), settings.sse_poll_interval
+                                )
+                    finally:
+                        if not driver_connection.is_closed():
+                            await driver_connection.remove_listener(
+                                CHANGES_CHANNEL, self._notify
+                            )
+            except CONNECTION_ERRORS as e:
+                self._record_error(e)
+                logger.exception("Change stream failed, reconnecting")
+                await asyncio.sleep(settings.sse_poll_interval)
+            except Exception as e:
+                self._record_error(e)
+                logger.exception("Change stream stopped")
+                raise
+
+    def _record_error(self, e: Exception):
+        self.errors += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+        self.last_error_at = datetime.now(timezone.utc)
+
+    def _notify(self, *_):
+        self._pending.set()
+
+    async def _publish(self):
+        self._pending.clear()
+
+        while True:
+            async with UnitOfWork(self.session_pool) as uow:
+                changes = await uow.changes.get_since(
+                    self.cursor, limit=settings.changes_page_max_size
+                )
+                if not changes:
+                    return
+
+                # Other processes commit changes this process has cached paths for
+                for change in changes:
+                    department_tree.apply(change)
+                    if (
+                        change.entity_type == EntityTypeEnum.DEPARTMENT
+                        and change.action != ChangeActionEnum.CREATED
+                    ):
+                        ancestor_path_cache.invalidate(change.entity_id)
+
+                if self._subscriptions:
+                    await self._deliver(DepartmentService(uow), changes)
+
+            self.cursor = changes[-1].id
+
+    async def _deliver(self, service: DepartmentService, changes: list[Change]):
+        anchors = [self._get_anchors(change) for change in changes]
+
+        paths, _ = await service.get_departments_ancestors(
+            [id for _, parent_ids in anchors for id in parent_ids]
+        )
+        chains = {id: {id, *(ancestor.id for ancestor in path)} for id, path in paths}
+
+        for change, (ids, parent_ids) in zip(changes, anchors):
+            audience = set(ids)
+            for id in parent_ids:
+                audience |= chains.get(id, set())
+
+            for id in audience:
+                for subscription in list(self._subscriptions.get(id, ())):
+                    if subscription.push(change):
+                        self.delivered += 1
+                    else:
+                        self.dropped += 1
+                        self._close(
+                            subscription,
+                            "Subscriber fell behind, catch up through /changes",
+                        )
+
+        # A cascading delete removes whole subtrees without recording them, so
+        # streams of departments that are gone are closed after the fact
+        if any(change.action == ChangeActionEnum.DELETED for change in changes):
+            _, missing_ids = await service.get_departments_ancestors(
+                list(self._subscriptions)
+            )
+            for id in missing_ids:
+                for subscription in list(self._subscriptions.get(id, ())):
+                    self._close(subscription, "Department was deleted")
+
+    def _get_anchors(self, change: Change):
+        # The departments the change happened in and the parents whose whole
+        # chains should hear about it, before and after a move
+        if change.entity_type == EntityTypeEnum.EMPLOYEE:
+            return [], [
+                id
+                for id in [
+                    change.data.get("department_id"),
+                    change.data.get("previous_department_id"),
+                ]
+                if id is not None
+            ]
+
+        return [change.entity_id], [
+            id
+            for id in [
+                change.data.get("parent_id"),
+                change.data.get("previous_parent_id"),
+            ]
+            if id is not None
+        ]
+
+    def _close(self, subscription: Subscription, reason: str):
+        subscription.close(reason)
+        self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.department_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+
+        subscriptions.remove(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.department_id]
+        self.subscribers -= 1
+
+
+change_broadcaster = ChangeBroadcaster(
+    AsyncSessionLocal, settings.sse_max_subscribers, settings.sse_queue_size
+)
@@ -0,0 +1,13 @@
+from enum import StrEnum
+
+
+class EntityTypeEnum(StrEnum):
+    DEPARTMENT = "department"
+    EMPLOYEE = "employee"
+
+
+class ChangeActionEnum(StrEnum):
+    CREATED = "created"
+    RENAMED = "renamed"
+    MOVED = "moved"
+    DELETED = "deleted"
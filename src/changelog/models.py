@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Enum
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.db import Base, created_at
+
+
+class Change(Base):
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    entity_type: Mapped[EntityTypeEnum] = mapped_column(
+        Enum(
+            EntityTypeEnum,
+            name="entity_type",
+            values_callable=lambda enum: [member.value for member in enum],
+        )
+    )
+    entity_id: Mapped[int]
+    action: Mapped[ChangeActionEnum] = mapped_column(
+        Enum(
+            ChangeActionEnum,
+            name="change_action",
+            values_callable=lambda enum: [member.value for member in enum],
+        )
+    )
+    data: Mapped[dict] = mapped_column(JSONB)
+
+    created_at: Mapped[created_at]
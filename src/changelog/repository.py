@@ -0,0 +1,45 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.changelog.models import Change
+from src.profiling import profile_methods
+
+CHANGE_LOG_LOCK_NAMESPACE = 0x4348
+
+CHANGES_CHANNEL = "changes"
+
+# Sequence values are handed out in statement order but become visible in
+# commit order, so a reader could move its cursor past a change that commits
+# later with a smaller id. Writers serialize the tail of their transactions on
+# this lock, which makes id order and commit order the same
+APPEND_LOCK_QUERY = select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_NAMESPACE, 0))
+
+# Notifications are delivered on commit and dropped on rollback
+NOTIFY_QUERY = select(func.pg_notify(CHANGES_CHANNEL, ""))
+
+
+@profile_methods("orm")
+class ChangeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def append(self, changes: list[Change]):
+        await self.session.flush()
+        await self.session.execute(APPEND_LOCK_QUERY)
+
+        self.session.add_all(changes)
+        await self.session.flush()
+
+        await self.session.execute(NOTIFY_QUERY)
+
+    async def get_last_id(self):
+        result = await self.session.execute(select(func.max(Change.id)))
+        return result.scalar_one() or 0
+
+    async def get_since(self, cursor: int, *, limit: int):
+        query = (
+            select(Change).where(Change.id > cursor).order_by(Change.id).limit(limit)
+        )
+
+        result = await self.session.execute(query)
+        return result.scalars().all()
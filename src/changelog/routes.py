@@ -0,0 +1,29 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, status
+
+from src.admission import admit
+from src.changelog.schemas import ChangesPageSchema
+from src.changelog.service import ChangeService
+from src.schemas import HTTPErrorSchema
+from src.settings import settings
+
+router = APIRouter(
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HTTPErrorSchema}}
+)
+
+ServiceDependency = Annotated[ChangeService, Depends()]
+
+
+@router.get(
+    "/",
+    dependencies=[admit("default")],
+    response_model=ChangesPageSchema,
+)
+async def get_changes(
+    service: ServiceDependency,
+    cursor: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=settings.changes_page_max_size),
+):
+    changes, next_cursor, has_more = await service.get_changes(cursor, limit)
+
+    return {"items": changes, "next_cursor": next_cursor, "has_more": has_more}
@@ -0,0 +1,24 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+
+
+class ChangeSchema(BaseModel):
+    id: int
+
+    entity_type: EntityTypeEnum
+    entity_id: int
+    action: ChangeActionEnum
+    data: dict
+
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChangesPageSchema(BaseModel):
+    items: list[ChangeSchema]
+    next_cursor: int
+    has_more: bool
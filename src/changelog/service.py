@@ -0,0 +1,15 @@
+from src.dependencies import UOWDependency
+
+
+class ChangeService:
+    def __init__(self, uow: UOWDependency):
+        self.uow = uow
+
+    async def get_changes(self, cursor: int, limit: int):
+        changes = await self.uow.changes.get_since(cursor, limit=limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        next_cursor = changes[-1].id if changes else cursor
+
+        return changes, next_cursor, has_more
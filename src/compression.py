@@ -0,0 +1,184 @@
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+from src.settings import settings
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            settings.compression_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data: bytes, final: bool):
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            mode=brotli.MODE_TEXT, quality=settings.compression_brotli_quality
+        )
+
+    def compress(self, data: bytes, final: bool):
+        compressed = self._compressor.process(data)
+        ending = self._compressor.finish() if final else self._compressor.flush()
+        return compressed + ending
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self):
+        self._compressor = zstd.ZstdCompressor(settings.compression_zstd_level)
+
+    def compress(self, data: bytes, final: bool):
+        mode = (
+            zstd.ZstdCompressor.FLUSH_FRAME
+            if final
+            else zstd.ZstdCompressor.FLUSH_BLOCK
+        )
+        return self._compressor.compress(data, mode)
+
+
+encoders = {
+    encoder.name: encoder
+    for encoder, available in [
+        (ZstdEncoder, zstd is not None),
+        (BrotliEncoder, brotli is not None),
+        (GzipEncoder, True),
+    ]
+    if available
+}
+
+
+def negotiate_encoding(accept_encoding: str):
+    # The highest q-value wins, ties go to the order of COMPRESSION_ENCODINGS
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.partition(";")
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    candidates = [
+        (weights.get(name, weights.get("*", 0.0)), -index, name)
+        for index, name in enumerate(settings.compression_encodings)
+        if name in encoders
+    ]
+    weight, _, name = max(candidates, default=(0.0, 0, None))
+
+    return name if weight > 0 else None
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, *, prefixes: tuple[str, ...]):
+        self.app = app
+        self.prefixes = prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, send: Send, encoding: str):
+        self._send = send
+        self.encoding = encoding
+
+        self._start: Message | None = None
+        self._encoder = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+
+        if self._passthrough or message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._encoder is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+
+            # Small complete bodies are not worth the CPU, already encoded ones
+            # and event streams, which must reach the client event by event,
+            # are left alone
+            if (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith("text/event-stream")
+                or (not more_body and len(body) < settings.compression_minimum_size)
+            ):
+                self._passthrough = True
+                await self._flush_start()
+                await self._send(message)
+                return
+
+            self._encoder = encoders[self.encoding]()
+            body = await self._compress(body, not more_body)
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+
+            await self._flush_start()
+        else:
+            body = await self._compress(body, not more_body)
+
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    async def _compress(self, data: bytes, final: bool):
+        # Large bodies are compressed in a worker thread, the codecs release the
+        # GIL so the event loop keeps serving other requests meanwhile
+        if len(data) >= settings.compression_offload_size:
+            return await anyio.to_thread.run_sync(self._encoder.compress, data, final)
+
+        return self._encoder.compress(data, final)
+
+    async def _flush_start(self):
+        if self._start is not None:
+            await self._send(self._start)
+            self._start = None
@@ -5,9 +5,19 @@ from sqlalchemy.orm import DeclarativeBase, declared_attr, mapped_column
 from sqlalchemy import DateTime, func
 from re import sub
 
+from src.profiling import profile_engine
 from src.settings import settings
-
-engine = create_async_engine(settings.db_url)
+from src.slow_queries import slow_query_log
+
+engine = create_async_engine(
+    settings.db_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
+if settings.profiling_enabled:
+    profile_engine(engine)
+if settings.slow_query_threshold is not None:
+    slow_query_log.instrument(engine)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
+
+from src.settings import settings
+
+
+class AncestorPathCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+
+        self._paths: OrderedDict[int, tuple[float, list[Any]]] = OrderedDict()
+        self._dependents: dict[int, set[int]] = {}
+
+    def get_many(self, ids: list[int]):
+        now = monotonic()
+
+        paths = {}
+        for id in ids:
+            entry = self._paths.get(id)
+            if entry is None:
+                continue
+
+            expires_at, path = entry
+            if expires_at < now:
+                self._remove(id)
+                continue
+
+            self._paths.move_to_end(id)
+            paths[id] = path
+        return paths
+
+    def set_many(self, paths: dict[int, list[Any]], generation: int):
+        # Paths read before a concurrent invalidation may already be stale
+        if self.max_size <= 0 or generation != self.generation:
+            return
+
+        expires_at = monotonic() + self.ttl
+        for id, path in paths.items():
+            self._remove(id)
+            self._paths[id] = (expires_at, path)
+            for ancestor in path:
+                self._dependents.setdefault(ancestor.id, set()).add(id)
+
+        while len(self._paths) > self.max_size:
+            self._remove(next(iter(self._paths)))
+
+    def invalidate(self, id: int):
+        self.generation += 1
+
+        self._remove(id)
+        for dependent_id in self._dependents.pop(id, set()):
+            self._remove(dependent_id)
+
+    def clear(self):
+        self.generation += 1
+
+        self._paths.clear()
+        self._dependents.clear()
+
+    def _remove(self, id: int):
+        entry = self._paths.pop(id, None)
+        if entry is None:
+            return
+
+        for ancestor in entry[1]:
+            dependents = self._dependents.get(ancestor.id)
+            if dependents is not None:
+                dependents.discard(id)
+                if not dependents:
+                    del self._dependents[ancestor.id]
+
+
+class DepartmentAnalyticsCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: OrderedDict[int, tuple[int, float, Any]] = OrderedDict()
+
+    def get(self, id: int, cursor: int):
+        # An entry computed before the last change is stale, whichever
+        # department the change was in. Writes that bypass the change log,
+        # like the generator's bulk load, are only picked up on expiry
+        entry = self._entries.get(id)
+        if entry is None or entry[0] != cursor:
+            return None
+
+        if entry[1] < monotonic():
+            del self._entries[id]
+            return None
+
+        self._entries.move_to_end(id)
+        return entry[2]
+
+    def set(self, id: int, cursor: int, analytics: Any):
+        if self.max_size <= 0:
+            return
+
+        # A slow computation must not replace one that saw later changes
+        entry = self._entries.get(id)
+        if entry is not None and entry[0] > cursor:
+            return
+
+        self._entries[id] = (cursor, monotonic() + self.ttl, analytics)
+        self._entries.move_to_end(id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+ancestor_path_cache = AncestorPathCache(
+    settings.ancestor_cache_size, settings.ancestor_cache_ttl
+)
+department_analytics_cache = DepartmentAnalyticsCache(
+    settings.analytics_cache_size, settings.analytics_cache_ttl
+)
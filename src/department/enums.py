@@ -4,3 +4,15 @@ from enum import StrEnum
 class DeleteModeEnum(StrEnum):
     CASCADE = "cascade"
     REASSIGN = "reassign"
+
+
+class SearchModeEnum(StrEnum):
+    PREFIX = "prefix"
+    FUZZY = "fuzzy"
+
+
+class DepartmentFieldEnum(StrEnum):
+    ID = "id"
+    NAME = "name"
+    PARENT_ID = "parent_id"
+    CREATED_AT = "created_at"
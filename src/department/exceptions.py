@@ -2,3 +2,9 @@ class DuplicateDepartmentNameError(Exception): ...
 
 
 class DepartmentCycleError(Exception): ...
+
+
+class SubtreeLimitExceededError(Exception): ...
+
+
+class ConcurrentStructureChangeError(Exception): ...
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base, id, created_at
@@ -29,4 +29,12 @@ class Department(Base):
 
     __table_args__ = (
         UniqueConstraint("name", "parent_id", name="name_parent_id_unique"),
+        Index("departments_parent_id_idx", "parent_id"),
+        Index("departments_name_prefix_idx", text('name COLLATE "C"'), "id"),
+        Index(
+            "departments_name_trgm_idx",
+            "name",
+            postgresql_using="gist",
+            postgresql_ops={"name": "gist_trgm_ops"},
+        ),
     )
@@ -0,0 +1,287 @@
+from functools import cache
+
+from sqlalchemy import (
+    Boolean,
+    Integer,
+    String,
+    bindparam,
+    case,
+    column,
+    exists,
+    func,
+    insert,
+    literal_column,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import load_only
+
+from src.department.models import Department
+from src.employee.models import Employee
+
+# The hot hierarchy queries are built once with every varying value as a bind
+# parameter, so each call reuses the same statement object, the same compiled
+# cache entry and the same asyncpg prepared statement
+
+UNBOUNDED_DEPTH = 2**31 - 1
+
+DEPARTMENT_LOCK_NAMESPACE = 0x4445
+
+
+def _build_children_cte():
+    recursive_cte = (
+        select(Department.id, literal_column("1").label("depth"))
+        .where(Department.parent_id == bindparam("id"))
+        .cte("children", recursive=True)
+    )
+
+    return recursive_cte.union_all(
+        select(Department.id, (recursive_cte.c.depth + 1).label("depth"))
+        .join(Department, Department.parent_id == recursive_cte.c.id)
+        .where(recursive_cte.c.depth < bindparam("depth", type_=Integer))
+    )
+
+
+def _build_descendants_cte():
+    recursive_cte = (
+        select(Department.id)
+        .where(Department.parent_id == bindparam("id"))
+        .cte("descendants", recursive=True)
+    )
+
+    return recursive_cte.union_all(
+        select(Department.id).where(Department.parent_id == recursive_cte.c.id)
+    )
+
+
+children_cte = _build_children_cte()
+descendants_cte = _build_descendants_cte()
+
+GET_CHILDREN_QUERY = select(Department).join(
+    children_cte, Department.id == children_cte.c.id
+)
+
+
+@cache
+def get_children_query(fields: frozenset[str] | None):
+    # One statement per fieldset, each cached and prepared like the full one
+    if fields is None:
+        return GET_CHILDREN_QUERY
+
+    return GET_CHILDREN_QUERY.options(load_only_fields(Department, fields))
+
+
+def prefix_upper_bound(prefix: str):
+    # The smallest string above every string starting with the prefix, the
+    # surrogates are skipped since they cannot be encoded as UTF-8. Trailing
+    # U+10FFFF cannot be incremented, so the character before it is
+    prefix = prefix.rstrip("\U0010ffff")
+    if not prefix:
+        return None
+
+    last = ord(prefix[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:
+        last = 0xE000
+
+    return prefix[:-1] + chr(last)
+
+
+def load_only_fields(model, fields: frozenset[str]):
+    # Sorted so equal fieldsets share the compiled statement
+    return load_only(*(getattr(model, field) for field in sorted(fields)))
+
+
+STREAM_CHILDREN_QUERY = (
+    select(
+        Department.id,
+        Department.name,
+        Department.parent_id,
+        Department.created_at,
+        children_cte.c.depth,
+    )
+    .join(children_cte, Department.id == children_cte.c.id)
+    .order_by(children_cte.c.depth, Department.id)
+    .limit(bindparam("limit", type_=Integer))
+)
+
+# EXISTS stops walking the subtree as soon as the new parent is found
+CHECK_IS_CHILD_QUERY = select(
+    exists().where(descendants_cte.c.id == bindparam("new_parent_id"))
+)
+
+
+def _build_lock_departments_query():
+    locks = (
+        func.unnest(
+            bindparam("ids", type_=ARRAY(Integer)),
+            bindparam("exclusive", type_=ARRAY(Boolean)),
+        )
+        .table_valued(column("id", Integer), column("exclusive", Boolean))
+        .render_derived(name="locks")
+    )
+    namespace = bindparam("namespace", DEPARTMENT_LOCK_NAMESPACE, type_=Integer)
+
+    # unnest returns the ids in array order, so the locks are taken in the
+    # order the caller sorted them in
+    return select(
+        case(
+            (locks.c.exclusive, func.pg_advisory_xact_lock(namespace, locks.c.id)),
+            else_=func.pg_advisory_xact_lock_shared(namespace, locks.c.id),
+        )
+    )
+
+
+LOCK_DEPARTMENTS_QUERY = _build_lock_departments_query()
+
+
+def _build_clone_subtree_query():
+    subtree = (
+        select(
+            Department.id,
+            Department.name,
+            Department.parent_id,
+            literal_column("0").label("depth"),
+        )
+        .where(Department.id == bindparam("id"))
+        .cte("subtree", recursive=True)
+    )
+    subtree = subtree.union_all(
+        select(
+            Department.id,
+            Department.name,
+            Department.parent_id,
+            (subtree.c.depth + 1).label("depth"),
+        ).join(subtree, Department.parent_id == subtree.c.id)
+    )
+
+    # New ids are drawn from the sequence up front, so every copy knows the id
+    # of its parent copy without a round trip per level. A CTE with a volatile
+    # function is materialized, each department gets exactly one new id
+    mapping = select(
+        subtree.c.id.label("old_id"),
+        subtree.c.name,
+        subtree.c.parent_id,
+        subtree.c.depth,
+        func.nextval(func.pg_get_serial_sequence("departments", "id")).label("new_id"),
+    ).cte("mapping")
+    parent_mapping = mapping.alias("parent_mapping")
+
+    is_root = mapping.c.depth == 0
+    departments = (
+        insert(Department)
+        .from_select(
+            ["id", "name", "parent_id"],
+            select(
+                mapping.c.new_id,
+                case((is_root, bindparam("name", type_=String)), else_=mapping.c.name),
+                case(
+                    (is_root, bindparam("parent_id", type_=Integer)),
+                    else_=parent_mapping.c.new_id,
+                ),
+            ).outerjoin(parent_mapping, parent_mapping.c.old_id == mapping.c.parent_id),
+        )
+        .returning(
+            Department.id, Department.name, Department.parent_id, Department.created_at
+        )
+        .cte("departments_copy")
+    )
+
+    # Foreign keys are checked at the end of the statement, when the copies
+    # the employees point to already exist
+    employees = (
+        insert(Employee)
+        .from_select(
+            ["department_id", "full_name", "position", "hired_at"],
+            select(
+                mapping.c.new_id,
+                Employee.full_name,
+                Employee.position,
+                Employee.hired_at,
+            )
+            .join(mapping, Employee.department_id == mapping.c.old_id)
+            .where(bindparam("include_employees", type_=Boolean)),
+        )
+        .returning(Employee.id)
+        .cte("employees_copy")
+    )
+
+    return (
+        select(
+            departments.c.id,
+            departments.c.name,
+            departments.c.parent_id,
+            departments.c.created_at,
+            mapping.c.old_id.label("source_id"),
+            mapping.c.depth,
+            select(func.count())
+            .select_from(employees)
+            .scalar_subquery()
+            .label("employees_count"),
+        )
+        .join(mapping, mapping.c.new_id == departments.c.id)
+        .order_by(mapping.c.depth, departments.c.id)
+    )
+
+
+CLONE_SUBTREE_QUERY = _build_clone_subtree_query()
+
+
+def _build_subtree_cte():
+    # The department itself at depth 0, unlike the children CTE
+    recursive_cte = (
+        select(Department.id, Department.parent_id, literal_column("0").label("depth"))
+        .where(Department.id == bindparam("id"))
+        .cte("subtree", recursive=True)
+    )
+
+    return recursive_cte.union_all(
+        select(
+            Department.id,
+            Department.parent_id,
+            (recursive_cte.c.depth + 1).label("depth"),
+        ).join(recursive_cte, Department.parent_id == recursive_cte.c.id)
+    )
+
+
+def _build_subtree_structure_query():
+    subtree = _build_subtree_cte()
+    children = subtree.alias("children")
+
+    spans = (
+        select(subtree.c.depth, func.count(children.c.id).label("span"))
+        .select_from(subtree.outerjoin(children, children.c.parent_id == subtree.c.id))
+        .group_by(subtree.c.id, subtree.c.depth)
+        .cte("spans")
+    )
+
+    # Departments per level and per number of direct children in one pass
+    return select(
+        func.grouping(spans.c.depth).label("by_span"),
+        spans.c.depth,
+        spans.c.span,
+        func.count().label("departments"),
+    ).group_by(func.grouping_sets(spans.c.depth, spans.c.span))
+
+
+def _build_subtree_employees_query():
+    subtree = _build_subtree_cte()
+    month = func.to_char(
+        func.timezone(literal_column("'UTC'"), Employee.hired_at),
+        literal_column("'YYYY-MM'"),
+    )
+
+    # Employees per position and hires per month in one pass
+    return (
+        select(
+            func.grouping(Employee.position).label("by_month"),
+            Employee.position,
+            month.label("month"),
+            func.count().label("employees"),
+        )
+        .join(subtree, Employee.department_id == subtree.c.id)
+        .group_by(func.grouping_sets(Employee.position, month))
+    )
+
+
+SUBTREE_STRUCTURE_QUERY = _build_subtree_structure_query()
+SUBTREE_EMPLOYEES_QUERY = _build_subtree_employees_query()
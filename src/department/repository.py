@@ -1,10 +1,27 @@
-from sqlalchemy import delete, literal, select, update
+from sqlalchemy import Integer, any_, bindparam, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.department.enums import SearchModeEnum
 from src.department.models import Department
+from src.department.queries import (
+    CHECK_IS_CHILD_QUERY,
+    CLONE_SUBTREE_QUERY,
+    LOCK_DEPARTMENTS_QUERY,
+    STREAM_CHILDREN_QUERY,
+    SUBTREE_EMPLOYEES_QUERY,
+    SUBTREE_STRUCTURE_QUERY,
+    UNBOUNDED_DEPTH,
+    get_children_query,
+    load_only_fields,
+    prefix_upper_bound,
+)
+from src.employee.models import Employee
+from src.profiling import profile_methods
 
 
+@profile_methods("orm")
 class DepartmentRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -15,11 +32,21 @@ class DepartmentRepository:
         *,
         include_employees: bool = False,
         include_children: bool = False,
+        fields: frozenset[str] | None = None,
+        employee_fields: frozenset[str] | None = None,
     ):
         query = select(Department).where(Department.id == id)
 
+        if fields is not None:
+            query = query.options(load_only_fields(Department, fields))
+
         if include_employees:
-            query = query.options(selectinload(Department.employees))
+            employees = selectinload(Department.employees)
+            if employee_fields is not None:
+                employees = employees.options(
+                    load_only_fields(Employee, employee_fields)
+                )
+            query = query.options(employees)
 
         if include_children:
             query = query.options(selectinload(Department.children))
@@ -27,32 +54,175 @@ class DepartmentRepository:
         result = await self.session.execute(query)
         return result.scalars().first()
 
+    async def get_many(
+        self,
+        ids: list[int],
+        *,
+        include_children: bool = False,
+        include_employees_count: bool = False,
+        fields: frozenset[str] | None = None,
+    ):
+        employees_count = (
+            select(func.count(Employee.id))
+            .where(Employee.department_id == Department.id)
+            .scalar_subquery()
+            if include_employees_count
+            else literal(None, Integer)
+        )
+
+        query = select(Department, employees_count.label("employees_count")).where(
+            Department.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+        )
+
+        if fields is not None:
+            query = query.options(load_only_fields(Department, fields))
+
+        if include_children:
+            children = selectinload(Department.children)
+            if fields is not None:
+                children = children.options(load_only_fields(Department, fields))
+            query = query.options(children)
+
+        result = await self.session.execute(query)
+        return result.tuples().all()
+
+    async def search(
+        self,
+        query: str,
+        *,
+        mode: SearchModeEnum,
+        limit: int,
+        offset: int,
+        fields: frozenset[str] | None = None,
+    ):
+        if mode == SearchModeEnum.PREFIX:
+            # A range over the "C" collation is served by departments_name_prefix_idx
+            # and, unlike LIKE with a bound pattern, is indexable in generic plans
+            name = Department.name.collate("C")
+            statement = select(Department).where(name >= query)
+
+            upper_bound = prefix_upper_bound(query)
+            if upper_bound is not None:
+                statement = statement.where(name < upper_bound)
+
+            statement = statement.order_by(name, Department.id)
+        else:
+            statement = (
+                select(Department)
+                .where(Department.name.op("%")(query))
+                .order_by(Department.name.op("<->")(query), Department.id)
+            )
+
+        if fields is not None:
+            statement = statement.options(load_only_fields(Department, fields))
+
+        result = await self.session.execute(statement.limit(limit).offset(offset))
+        return result.scalars().all()
+
+    async def warm_up(self):
+        # Ids that match nothing still compile the hot statements and prepare
+        # them on the connection of this session
+        await self.get_by_id(0)
+        await self.get_children(0, depth=1)
+        await self.check_is_child(0, -1)
+        await self.get_ancestors_many([0])
+
     def add(self, department: Department):
         self.session.add(department)
         return department
 
-    async def get_children(self, id: int, *, depth: int | None = None):
-        recursive_cte = (
-            select(Department.id, literal(1).label("depth"))
-            .where(Department.parent_id == id)
-            .cte(recursive=True)
+    async def get_children(
+        self,
+        id: int,
+        *,
+        depth: int | None = None,
+        fields: frozenset[str] | None = None,
+    ):
+        result = await self.session.execute(
+            get_children_query(fields),
+            {"id": id, "depth": UNBOUNDED_DEPTH if depth is None else depth},
         )
+        return result.scalars().unique().all()
 
-        union_query = select(
-            Department.id, (recursive_cte.c.depth + 1).label("depth")
-        ).join(Department, Department.parent_id == recursive_cte.c.id)
+    async def stream_children(self, id: int, *, limit: int, batch_size: int):
+        result = await self.session.stream(
+            STREAM_CHILDREN_QUERY,
+            {"id": id, "depth": UNBOUNDED_DEPTH, "limit": limit},
+            execution_options={"yield_per": batch_size},
+        )
+        async for row in result:
+            yield row
+
+    async def stream_all(self, *, batch_size: int):
+        query = select(
+            Department.id, Department.name, Department.parent_id, Department.created_at
+        ).order_by(Department.id)
 
-        if depth is not None:
-            union_query = union_query.where(recursive_cte.c.depth < depth)
+        result = await self.session.stream(
+            query, execution_options={"yield_per": batch_size}
+        )
+        async for row in result:
+            yield row
 
-        recursive_cte = recursive_cte.union_all(union_query)
+    async def get_ancestors_many(self, ids: list[int]):
+        recursive_cte = (
+            select(
+                Department.id.label("department_id"),
+                Department.id,
+                Department.name,
+                Department.parent_id,
+                literal(0).label("depth"),
+            )
+            .where(Department.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+            .cte(recursive=True)
+        )
+
+        recursive_cte = recursive_cte.union_all(
+            select(
+                recursive_cte.c.department_id,
+                Department.id,
+                Department.name,
+                Department.parent_id,
+                recursive_cte.c.depth + 1,
+            ).join(Department, Department.id == recursive_cte.c.parent_id)
+        )
 
-        query = select(Department).join(
-            recursive_cte, Department.id == recursive_cte.c.id
+        query = select(recursive_cte).order_by(
+            recursive_cte.c.department_id, recursive_cte.c.depth.desc()
         )
 
         result = await self.session.execute(query)
-        return result.scalars().unique().all()
+
+        # Departments that do not exist are left out, the rest map to their
+        # ancestors ordered from the root
+        ancestors = {}
+        for row in result:
+            path = ancestors.setdefault(row.department_id, [])
+            if row.depth > 0:
+                path.append(row)
+        return ancestors
+
+    async def get_subtree_structure(self, id: int):
+        result = await self.session.execute(SUBTREE_STRUCTURE_QUERY, {"id": id})
+
+        levels, spans = {}, {}
+        for row in result:
+            if row.by_span:
+                spans[row.span] = row.departments
+            else:
+                levels[row.depth] = row.departments
+        return levels, spans
+
+    async def get_subtree_employees(self, id: int):
+        result = await self.session.execute(SUBTREE_EMPLOYEES_QUERY, {"id": id})
+
+        positions, months = {}, {}
+        for row in result:
+            if row.by_month:
+                months[row.month] = row.employees
+            else:
+                positions[row.position] = row.employees
+        return positions, months
 
     async def check_is_child(self, id: int, new_parent_id: int | None):
         if new_parent_id is None:
@@ -61,18 +231,39 @@ class DepartmentRepository:
         if id == new_parent_id:
             return True
 
-        recursive_cte = (
-            select(Department.id).where(Department.parent_id == id).cte(recursive=True)
+        result = await self.session.execute(
+            CHECK_IS_CHILD_QUERY, {"id": id, "new_parent_id": new_parent_id}
         )
+        return result.scalar_one()
 
-        recursive_cte = recursive_cte.union_all(
-            select(Department.id).where(Department.parent_id == recursive_cte.c.id)
+    async def lock(self, exclusive_ids: list[int], shared_ids: list[int]):
+        # Locks are always taken in ascending id order, so transactions locking
+        # overlapping sets of departments cannot deadlock on each other
+        locks = {id: False for id in shared_ids} | {id: True for id in exclusive_ids}
+        ids = sorted(locks)
+
+        await self.session.execute(
+            LOCK_DEPARTMENTS_QUERY,
+            {"ids": ids, "exclusive": [locks[id] for id in ids]},
         )
 
-        query = select(recursive_cte).where(recursive_cte.c.id == new_parent_id)
-        result = await self.session.execute(query)
+    async def clone_subtree(
+        self, id: int, parent_id: int | None, name: str, *, include_employees: bool
+    ):
+        # One statement copies the whole subtree, the copies are returned
+        # ordered by depth starting from the copy of the department itself
+        result = await self.session.execute(
+            CLONE_SUBTREE_QUERY,
+            {
+                "id": id,
+                "parent_id": parent_id,
+                "name": name,
+                "include_employees": include_employees,
+            },
+        )
+        rows = result.all()
 
-        return bool(result.scalars().first())
+        return rows, rows[0].employees_count if rows else 0
 
     async def reassign_parent(self, old_department_id: int, new_department_id: int):
         query = (
@@ -1,24 +1,77 @@
+import asyncio
 from typing import Annotated
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from src.admission import admit
+from src.changelog.broadcaster import change_broadcaster
+from src.changelog.schemas import ChangeSchema
+from src.department.enums import DepartmentFieldEnum, SearchModeEnum
+from src.department.exceptions import SubtreeLimitExceededError
 from src.department.schemas import (
+    CloneDepartmentSchema,
     CreateDepartmentSchema,
+    DepartmentAnalyticsSchema,
+    DepartmentAncestorsBatchSchema,
+    DepartmentBatchSchema,
+    DepartmentCloneSchema,
+    DepartmentPathItemSchema,
     DeleteDepartmentSchema,
     DepartmentSchema,
+    DepartmentSearchSchema,
+    DepartmentTreeLevelSchema,
     DepartmentTreeSchema,
+    DepartmentTreeSummarySchema,
     MoveDepartmentSchema,
+    get_department_batch_schema,
+    get_department_search_schema,
+    get_department_tree_schema,
 )
 from src.department.service import DepartmentService
+from src.dependencies import FunctionScopedUOWDependency
+from src.employee.enums import EmployeeFieldEnum
 from src.employee.schemas import CreateEmployeeSchema, EmployeeSchema
+from src.profiling import ProfiledRoute
 from src.schemas import HTTPErrorSchema
+from src.settings import settings
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ProfiledRoute,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HTTPErrorSchema}},
+)
 
 ServiceDependency = Annotated[DepartmentService, Depends()]
 
 
+def get_fields(
+    fields: list[DepartmentFieldEnum] | None = Query(default=None, min_length=1),
+):
+    return frozenset(fields) if fields is not None else None
+
+
+def get_employee_fields(
+    employee_fields: list[EmployeeFieldEnum] | None = Query(default=None, min_length=1),
+):
+    return frozenset(employee_fields) if employee_fields is not None else None
+
+
+FieldsDependency = Annotated[frozenset[str] | None, Depends(get_fields)]
+EmployeeFieldsDependency = Annotated[
+    frozenset[str] | None, Depends(get_employee_fields)
+]
+
+
+def sparse_response(schema: type[BaseModel], content: dict):
+    # Serialized with the narrowed schema, the declared response model would
+    # require the columns that were not loaded
+    data = schema.model_validate(content, from_attributes=True)
+    return Response(data.model_dump_json(), media_type="application/json")
+
+
 @router.post(
     "/",
+    dependencies=[admit("default")],
     response_model=DepartmentSchema,
     responses={
         status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema},
@@ -36,6 +89,7 @@ async def create_department(
 
 @router.post(
     "/{id}/employees/",
+    dependencies=[admit("default")],
     response_model=EmployeeSchema,
     responses={status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema}},
 )
@@ -48,8 +102,109 @@ async def create_employee(
     return employee
 
 
+@router.post(
+    "/{id}/clone",
+    dependencies=[admit("heavy")],
+    response_model=DepartmentCloneSchema,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema},
+        status.HTTP_409_CONFLICT: {"model": HTTPErrorSchema},
+    },
+)
+async def clone_department(
+    service: ServiceDependency, id: int, clone: CloneDepartmentSchema
+):
+    department, departments_count, employees_count = await service.clone_department(
+        id, clone.parent_id, clone.name, clone.include_employees
+    )
+
+    return {
+        "department": department,
+        "departments_count": departments_count,
+        "employees_count": employees_count,
+    }
+
+
+@router.get(
+    "/batch",
+    dependencies=[admit("default")],
+    response_model=DepartmentBatchSchema,
+)
+async def get_departments(
+    service: ServiceDependency,
+    ids: list[int] = Query(min_length=1, max_length=settings.batch_max_ids),
+    include_children: bool = Query(default=False),
+    include_employees_count: bool = Query(default=False),
+    fields: FieldsDependency = None,
+):
+    departments, missing_ids = await service.get_departments(
+        ids, include_children, include_employees_count, fields
+    )
+
+    content = {
+        "departments": [
+            {
+                "department": department,
+                "children": children,
+                "employees_count": employees_count,
+            }
+            for department, children, employees_count in departments
+        ],
+        "missing_ids": missing_ids,
+    }
+    if fields is None:
+        return content
+
+    return sparse_response(get_department_batch_schema(fields), content)
+
+
+@router.get(
+    "/ancestors",
+    dependencies=[admit("default")],
+    response_model=DepartmentAncestorsBatchSchema,
+)
+async def get_departments_ancestors(
+    service: ServiceDependency,
+    ids: list[int] = Query(min_length=1, max_length=settings.batch_max_ids),
+):
+    paths, missing_ids = await service.get_departments_ancestors(ids)
+
+    return {
+        "departments": [{"id": id, "path": path} for id, path in paths],
+        "missing_ids": missing_ids,
+    }
+
+
+@router.get(
+    "/search",
+    dependencies=[admit("default")],
+    response_model=DepartmentSearchSchema,
+)
+async def search_departments(
+    service: ServiceDependency,
+    q: str = Query(min_length=1, max_length=200),
+    mode: SearchModeEnum = Query(default=SearchModeEnum.PREFIX),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    fields: FieldsDependency = None,
+):
+    items, has_more = await service.search_departments(q, mode, limit, offset, fields)
+
+    content = {
+        "items": [
+            {"department": department, "path": path} for department, path in items
+        ],
+        "has_more": has_more,
+    }
+    if fields is None:
+        return content
+
+    return sparse_response(get_department_search_schema(fields), content)
+
+
 @router.get(
     "/{id}",
+    dependencies=[admit("default")],
     response_model=DepartmentTreeSchema,
     responses={status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema}},
 )
@@ -58,20 +213,127 @@ async def get_department(
     id: int,
     depth: int = Query(default=1, le=5),
     include_employees: bool = Query(default=True),
+    fields: FieldsDependency = None,
+    employee_fields: EmployeeFieldsDependency = None,
 ):
     department, employees, children = await service.get_department(
-        id, depth, include_employees
+        id, depth, include_employees, fields, employee_fields
     )
 
-    return {
+    content = {
         "department": department,
         "employees": employees,
         "children": children,
     }
+    if fields is None and employee_fields is None:
+        return content
+
+    return sparse_response(get_department_tree_schema(fields, employee_fields), content)
+
+
+@router.get(
+    "/{id}/ancestors",
+    dependencies=[admit("default")],
+    response_model=list[DepartmentPathItemSchema],
+    responses={status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema}},
+)
+async def get_department_ancestors(service: ServiceDependency, id: int):
+    return await service.get_department_ancestors(id)
+
+
+@router.get(
+    "/{id}/analytics",
+    dependencies=[admit("heavy")],
+    response_model=DepartmentAnalyticsSchema,
+    responses={status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema}},
+)
+async def get_department_analytics(service: ServiceDependency, id: int):
+    return await service.get_department_analytics(id)
+
+
+@router.get(
+    "/{id}/tree",
+    dependencies=[admit("heavy")],
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One line per chunk of a level followed by a summary line",
+        },
+        status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema},
+    },
+)
+async def stream_department_tree(service: ServiceDependency, id: int):
+    department, levels = await service.stream_department_tree(
+        id, settings.subtree_stream_node_limit, settings.subtree_stream_chunk_size
+    )
+
+    async def lines():
+        root = DepartmentTreeLevelSchema(level=0, departments=[department])
+        yield root.model_dump_json() + "\n"
+
+        summary = DepartmentTreeSummarySchema(nodes=1, truncated=False)
+        try:
+            async for level, departments in levels:
+                summary.nodes += len(departments)
+                chunk = DepartmentTreeLevelSchema(level=level, departments=departments)
+                yield chunk.model_dump_json() + "\n"
+        except SubtreeLimitExceededError as e:
+            summary.truncated = True
+            summary.detail = str(e)
+
+        yield summary.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{id}/events",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"text/event-stream": {}},
+            "description": "Changes committed in the subtree of the department",
+        },
+        status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema},
+    },
+)
+async def stream_department_events(uow: FunctionScopedUOWDependency, id: int):
+    await DepartmentService(uow).get_department_ancestors(id)
+
+    change_broadcaster.check_capacity()
+    await change_broadcaster.start()
+
+    async def events():
+        async with change_broadcaster.subscribe(id) as subscription:
+            while True:
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.queue.get(), settings.sse_keepalive_interval
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if change is None:
+                    data = HTTPErrorSchema(detail=subscription.closed_reason)
+                    yield f"event: end\ndata: {data.model_dump_json()}\n\n"
+                    return
+
+                data = ChangeSchema.model_validate(change).model_dump_json()
+                event = f"{change.entity_type}.{change.action}"
+                yield f"id: {change.id}\nevent: {event}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.patch(
     "/{id}",
+    dependencies=[admit("default")],
     response_model=DepartmentSchema,
     responses={
         status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema},
@@ -89,6 +351,7 @@ async def move_department(
 
 @router.delete(
     "/{id}",
+    dependencies=[admit("heavy")],
     response_model=None,
     status_code=status.HTTP_204_NO_CONTENT,
     responses={
@@ -1,9 +1,12 @@
 from datetime import datetime
+from functools import cache
 from fastapi import HTTPException, status
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, create_model, model_validator
 
-from src.department.enums import DeleteModeEnum
+from src.department.enums import DeleteModeEnum, DepartmentFieldEnum
+from src.employee.enums import EmployeeFieldEnum
 from src.employee.schemas import EmployeeSchema
+from src.schemas import select_fields
 
 
 class CreateDepartmentSchema(BaseModel):
@@ -16,6 +19,12 @@ class MoveDepartmentSchema(BaseModel):
     parent_id: int | None = Field(default=None)
 
 
+class CloneDepartmentSchema(BaseModel):
+    parent_id: int | None = Field(default=None)
+    name: str | None = Field(default=None, min_length=1, max_length=200)
+    include_employees: bool = Field(default=False)
+
+
 class DeleteDepartmentSchema(BaseModel):
     mode: DeleteModeEnum
     reassign_to_department_id: int | None = Field(default=None)
@@ -50,7 +59,144 @@ class DepartmentSchema(BaseModel):
         from_attributes = True
 
 
+class DepartmentCloneSchema(BaseModel):
+    department: DepartmentSchema
+    departments_count: int
+    employees_count: int
+
+
 class DepartmentTreeSchema(BaseModel):
     department: DepartmentSchema
-    employees: list[EmployeeSchema] = Field(exclude_if=lambda v: v in None)
+    employees: list[EmployeeSchema] | None = Field(exclude_if=lambda v: v is None)
     children: list[DepartmentSchema]
+
+
+class DepartmentBatchItemSchema(BaseModel):
+    department: DepartmentSchema
+    children: list[DepartmentSchema] | None = Field(exclude_if=lambda v: v is None)
+    employees_count: int | None = Field(exclude_if=lambda v: v is None)
+
+
+class DepartmentBatchSchema(BaseModel):
+    departments: list[DepartmentBatchItemSchema]
+    missing_ids: list[int]
+
+
+class DepartmentPathItemSchema(BaseModel):
+    id: int
+    name: str
+    parent_id: int | None
+
+    class Config:
+        from_attributes = True
+
+
+class DepartmentSearchItemSchema(BaseModel):
+    department: DepartmentSchema
+    path: list[DepartmentPathItemSchema]
+
+
+class DepartmentSearchSchema(BaseModel):
+    items: list[DepartmentSearchItemSchema]
+    has_more: bool
+
+
+class DepartmentAncestorsSchema(BaseModel):
+    id: int
+    path: list[DepartmentPathItemSchema]
+
+
+class DepartmentAncestorsBatchSchema(BaseModel):
+    departments: list[DepartmentAncestorsSchema]
+    missing_ids: list[int]
+
+
+class DepartmentLevelStatsSchema(BaseModel):
+    depth: int
+    departments: int
+
+
+class SpanOfControlStatsSchema(BaseModel):
+    children: int
+    departments: int
+
+
+class PositionStatsSchema(BaseModel):
+    position: str
+    employees: int
+
+
+class HiringStatsSchema(BaseModel):
+    month: str | None
+    employees: int
+
+
+class DepartmentAnalyticsSchema(BaseModel):
+    id: int
+    departments: int
+    max_depth: int
+    employees: int
+    levels: list[DepartmentLevelStatsSchema]
+    span_of_control: list[SpanOfControlStatsSchema]
+    positions: list[PositionStatsSchema]
+    hiring: list[HiringStatsSchema]
+
+
+class DepartmentTreeLevelSchema(BaseModel):
+    level: int
+    departments: list[DepartmentSchema]
+
+
+class DepartmentTreeSummarySchema(BaseModel):
+    nodes: int
+    truncated: bool
+    detail: str | None = Field(default=None, exclude_if=lambda v: v is None)
+
+
+# Schemas for sparse fieldsets, the full ones stay in the OpenAPI document
+
+
+@cache
+def get_department_tree_schema(
+    fields: frozenset[str] | None, employee_fields: frozenset[str] | None
+):
+    department = select_fields(
+        DepartmentSchema, fields or frozenset(DepartmentFieldEnum)
+    )
+    employee = select_fields(
+        EmployeeSchema, employee_fields or frozenset(EmployeeFieldEnum)
+    )
+
+    return create_model(
+        DepartmentTreeSchema.__name__,
+        department=department,
+        employees=(list[employee] | None, Field(exclude_if=lambda v: v is None)),
+        children=list[department],
+    )
+
+
+@cache
+def get_department_batch_schema(fields: frozenset[str]):
+    department = select_fields(DepartmentSchema, fields)
+
+    item = create_model(
+        DepartmentBatchItemSchema.__name__,
+        department=department,
+        children=(list[department] | None, Field(exclude_if=lambda v: v is None)),
+        employees_count=(int | None, Field(exclude_if=lambda v: v is None)),
+    )
+    return create_model(
+        DepartmentBatchSchema.__name__, departments=list[item], missing_ids=list[int]
+    )
+
+
+@cache
+def get_department_search_schema(fields: frozenset[str]):
+    item = create_model(
+        DepartmentSearchItemSchema.__name__,
+        department=select_fields(DepartmentSchema, fields),
+        path=list[DepartmentPathItemSchema],
+    )
+    return create_model(
+        DepartmentSearchSchema.__name__, items=list[item], has_more=bool
+    )
@@ -1,12 +1,29 @@
 from datetime import datetime
 
-from src.department.exceptions import DepartmentCycleError, DuplicateDepartmentNameError
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.department.cache import ancestor_path_cache, department_analytics_cache
+from src.department.enums import SearchModeEnum
+from src.department.exceptions import (
+    ConcurrentStructureChangeError,
+    DepartmentCycleError,
+    DuplicateDepartmentNameError,
+    SubtreeLimitExceededError,
+)
 from src.department.models import Department
+from src.department.tree import department_tree
 from src.dependencies import UOWDependency
 from src.employee.models import Employee
 from src.exceptions import NotFoundError
+from src.profiling import profile_methods
+from src.settings import settings
+from src.single_flight import SingleFlight
+from src.unit_of_work import UnitOfWork
 
+department_reads = SingleFlight()
+department_analytics = SingleFlight()
 
+
+@profile_methods("service")
 class DepartmentService:
     def __init__(self, uow: UOWDependency):
         self.uow = uow
@@ -17,10 +34,59 @@ class DepartmentService:
         department = Department(name=name, parent_id=parent_id)
 
         self.uow.departments.add(department)
+        await self.uow.flush()
+        self._record_department(ChangeActionEnum.CREATED, department)
         await self.uow.commit()
 
+        department_tree.upsert(
+            department.id, department.name, department.parent_id, department.created_at
+        )
+
         return department
 
+    async def clone_department(
+        self,
+        id: int,
+        parent_id: int | None,
+        name: str | None,
+        include_employees: bool,
+    ):
+        await self._lock_structure(id, parent_id)
+
+        department = await self.uow.departments.get_by_id(id)
+        if department is None:
+            raise NotFoundError("Department not found")
+
+        name = department.name if name is None else name
+        await self._check_department_name(name, parent_id)
+
+        # A copy under a descendant is fine, the statement reads the subtree
+        # as it was before it started writing
+        async with self.uow.handle_integrity_errors():
+            departments, employees_count = await self.uow.departments.clone_subtree(
+                id, parent_id, name, include_employees=include_employees
+            )
+
+        # Copied employees are not logged one by one, like the employees of a
+        # cascading deletion, the departments carry the id they were copied from
+        for row in departments:
+            self.uow.record(
+                EntityTypeEnum.DEPARTMENT,
+                ChangeActionEnum.CREATED,
+                row.id,
+                {
+                    "name": row.name,
+                    "parent_id": row.parent_id,
+                    "source_id": row.source_id,
+                },
+            )
+        await self.uow.commit()
+
+        for row in departments:
+            department_tree.upsert(row.id, row.name, row.parent_id, row.created_at)
+
+        return departments[0], len(departments), employees_count
+
     async def create_employee(
         self,
         department_id: int,
@@ -40,22 +106,123 @@ class DepartmentService:
         )
 
         self.uow.employees.add(employee)
+        await self.uow.flush()
+        self._record_employee(ChangeActionEnum.CREATED, employee)
         await self.uow.commit()
 
         return employee
 
-    async def get_department(self, id: int, depth: int, include_employees: bool):
-        department = await self.uow.departments.get_by_id(
-            id, include_employees=include_employees
+    async def get_department(
+        self,
+        id: int,
+        depth: int,
+        include_employees: bool,
+        fields: frozenset[str] | None = None,
+        employee_fields: frozenset[str] | None = None,
+    ):
+        if not settings.coalesce_reads:
+            return await self._fetch_department(
+                self.uow, id, depth, include_employees, fields, employee_fields
+            )
+
+        return await department_reads.do(
+            (id, depth, include_employees, fields, employee_fields),
+            lambda: self._fetch_shared_department(
+                id, depth, include_employees, fields, employee_fields
+            ),
         )
+
+    async def stream_department_tree(self, id: int, node_limit: int, chunk_size: int):
+        department = await self.uow.departments.get_by_id(id)
         if department is None:
             raise NotFoundError("Department not found")
 
-        children = await self.uow.departments.get_children(id, depth=depth)
+        return department, self._stream_levels(id, node_limit, chunk_size)
 
-        return department, department.employees if include_employees else None, children
+    async def get_departments(
+        self,
+        ids: list[int],
+        include_children: bool,
+        include_employees_count: bool,
+        fields: frozenset[str] | None = None,
+    ):
+        ids = list(dict.fromkeys(ids))
+
+        rows = await self.uow.departments.get_many(
+            ids,
+            include_children=include_children,
+            include_employees_count=include_employees_count,
+            fields=fields,
+        )
+        found = {department.id: (department, count) for department, count in rows}
+
+        departments = [
+            (
+                found[id][0],
+                found[id][0].children if include_children else None,
+                found[id][1],
+            )
+            for id in ids
+            if id in found
+        ]
+        missing_ids = [id for id in ids if id not in found]
+
+        return departments, missing_ids
+
+    async def search_departments(
+        self,
+        query: str,
+        mode: SearchModeEnum,
+        limit: int,
+        offset: int,
+        fields: frozenset[str] | None = None,
+    ):
+        departments = await self.uow.departments.search(
+            query, mode=mode, limit=limit + 1, offset=offset, fields=fields
+        )
+        has_more = len(departments) > limit
+        departments = departments[:limit]
+
+        paths = await self._get_ancestors([department.id for department in departments])
+
+        return [
+            (department, paths.get(department.id, [])) for department in departments
+        ], has_more
+
+    async def get_department_ancestors(self, id: int):
+        paths = await self._get_ancestors([id])
+        if id not in paths:
+            raise NotFoundError("Department not found")
+
+        return paths[id]
+
+    async def get_departments_ancestors(self, ids: list[int]):
+        ids = list(dict.fromkeys(ids))
+
+        paths = await self._get_ancestors(ids)
+
+        departments = [(id, paths[id]) for id in ids if id in paths]
+        missing_ids = [id for id in ids if id not in paths]
+
+        return departments, missing_ids
+
+    async def get_department_analytics(self, id: int):
+        # Every mutation appends to the change log, so its last id versions the
+        # cached results, including for changes committed by other processes
+        cursor = await self.uow.changes.get_last_id()
+
+        analytics = department_analytics_cache.get(id, cursor)
+        if analytics is not None:
+            return analytics
+
+        return await department_analytics.do(
+            (id, cursor), lambda: self._compute_shared_analytics(id, cursor)
+        )
 
     async def move_department(self, id: int, update_dict: dict):
+        if "parent_id" in update_dict:
+            await self._lock_structure(id, update_dict["parent_id"])
+
         department = await self.uow.departments.get_by_id(id)
         if department is None:
             raise NotFoundError("Department not found")
@@ -71,19 +238,40 @@ class DepartmentService:
 
         if "parent_id" in update_dict:
             new_parent_id = update_dict["parent_id"]
-            if await self.uow.departments.check_is_child(id, new_parent_id):
+            if await self._check_is_child(id, new_parent_id):
                 raise DepartmentCycleError("Department cycle detected")
 
+        actions = [
+            action
+            for key, action in [
+                ("name", ChangeActionEnum.RENAMED),
+                ("parent_id", ChangeActionEnum.MOVED),
+            ]
+            if key in update_dict and update_dict[key] != getattr(department, key)
+        ]
+        previous_parent_id = department.parent_id
+
         for key, value in update_dict.items():
             setattr(department, key, value)
 
+        for action in actions:
+            self._record_department(
+                action, department, previous_parent_id=previous_parent_id
+            )
+
         await self.uow.commit()
 
+        if any(key in update_dict for key in ["parent_id", "name"]):
+            ancestor_path_cache.invalidate(id)
+            department_tree.upsert(id, department.name, department.parent_id)
+
         return department
 
     async def delete_department(self, id: int, reassign_to_department_id: int | None):
         is_reassign = reassign_to_department_id is not None
 
+        await self._lock_structure(id, reassign_to_department_id)
+
         department = await self.uow.departments.get_by_id(
             id, include_children=is_reassign
         )
@@ -109,16 +297,76 @@ class DepartmentService:
                     "Department with the same name already exists under the new parent department"
                 )
 
-            if await self.uow.departments.check_is_child(id, reassign_to_department_id):
+            if await self._check_is_child(id, reassign_to_department_id):
                 raise DepartmentCycleError("Department cycle detected")
 
             await self.uow.departments.reassign_parent(id, reassign_to_department_id)
+            for child in department.children:
+                self.uow.record(
+                    EntityTypeEnum.DEPARTMENT,
+                    ChangeActionEnum.MOVED,
+                    child.id,
+                    {
+                        "name": child.name,
+                        "parent_id": reassign_to_department_id,
+                        "previous_parent_id": id,
+                    },
+                )
 
-            await self.uow.employees.reassign_department(id, reassign_to_department_id)
+            employee_ids = await self.uow.employees.reassign_department(
+                id, reassign_to_department_id
+            )
+            for employee_id in employee_ids:
+                self.uow.record(
+                    EntityTypeEnum.EMPLOYEE,
+                    ChangeActionEnum.MOVED,
+                    employee_id,
+                    {
+                        "department_id": reassign_to_department_id,
+                        "previous_department_id": id,
+                    },
+                )
 
         await self.uow.departments.delete(id)
+        # Without reassignment the deletion cascades, so a single change stands
+        # for the whole subtree and its employees
+        self._record_department(ChangeActionEnum.DELETED, department)
         await self.uow.commit()
 
+        ancestor_path_cache.invalidate(id)
+
+        if is_reassign:
+            for child in department.children:
+                department_tree.upsert(child.id, child.name, reassign_to_department_id)
+        department_tree.remove(id)
+
+    def _record_department(
+        self,
+        action: ChangeActionEnum,
+        department: Department,
+        previous_parent_id: int | None = None,
+    ):
+        data = {"name": department.name, "parent_id": department.parent_id}
+        if action == ChangeActionEnum.MOVED:
+            data["previous_parent_id"] = previous_parent_id
+
+        self.uow.record(EntityTypeEnum.DEPARTMENT, action, department.id, data)
+
+    def _record_employee(self, action: ChangeActionEnum, employee: Employee):
+        self.uow.record(
+            EntityTypeEnum.EMPLOYEE,
+            action,
+            employee.id,
+            {
+                "department_id": employee.department_id,
+                "full_name": employee.full_name,
+                "position": employee.position,
+                "hired_at": employee.hired_at.isoformat()
+                if employee.hired_at
+                else None,
+            },
+        )
+
     async def _check_department_name(self, name: str, parent_id: int | None):
         if parent_id is None:
             return
@@ -134,3 +382,174 @@ class DepartmentService:
             raise DuplicateDepartmentNameError(
                 "Department with the same name already exists under the parent department"
             )
+
+    async def _lock_structure(self, id: int, new_parent_id: int | None):
+        # A structural change locks the subtree of the department exclusively
+        # and the chain it is attached to in shared mode. Two moves can only
+        # form a cycle if each moves a department on the chain of the other, so
+        # they conflict, while changes in unrelated branches proceed in parallel
+        if not settings.structure_locks:
+            return
+
+        for _ in range(settings.structure_lock_attempts):
+            chain = await self._get_chain(new_parent_id)
+            await self.uow.departments.lock([id], chain)
+
+            # The chain is read before the locks are granted, so a concurrent
+            # move may have changed it in between
+            if set(await self._get_chain(new_parent_id)) <= {id, *chain}:
+                return
+
+            await self.uow.rollback()
+
+        raise ConcurrentStructureChangeError(
+            "Department structure is being changed concurrently, try again later"
+        )
+
+    async def _check_is_child(self, id: int, new_parent_id: int | None):
+        # The snapshot may trail commits of other processes, so it only answers
+        # once it has caught up with the change log. Under the structure locks
+        # no change committed later can affect the answer
+        if settings.department_tree_reads and department_tree.is_current(
+            await self.uow.changes.get_last_id()
+        ):
+            is_child = department_tree.check_is_child(id, new_parent_id)
+            if is_child is not None:
+                return is_child
+
+        return await self.uow.departments.check_is_child(id, new_parent_id)
+
+    async def _get_chain(self, id: int | None):
+        if id is None:
+            return []
+
+        paths = await self.uow.departments.get_ancestors_many([id])
+        return [id, *(ancestor.id for ancestor in paths.get(id, []))]
+
+    async def _get_ancestors(self, ids: list[int]):
+        ids = list(dict.fromkeys(ids))
+
+        paths = ancestor_path_cache.get_many(ids)
+
+        missing_ids = [id for id in ids if id not in paths]
+        if missing_ids:
+            generation = ancestor_path_cache.generation
+            loaded_paths = await self.uow.departments.get_ancestors_many(missing_ids)
+            ancestor_path_cache.set_many(loaded_paths, generation)
+            paths.update(loaded_paths)
+
+        return paths
+
+    async def _stream_levels(self, id: int, node_limit: int, chunk_size: int):
+        # Rows arrive ordered by depth, so only the current chunk of the current
+        # level is kept in memory
+        level, departments, count = None, [], 0
+
+        async for row in self.uow.departments.stream_children(
+            id, limit=node_limit + 1, batch_size=chunk_size
+        ):
+            count += 1
+            if count > node_limit:
+                if departments:
+                    yield level, departments
+                raise SubtreeLimitExceededError(
+                    f"Department has more than {node_limit} descendants"
+                )
+
+            if row.depth != level or len(departments) >= chunk_size:
+                if departments:
+                    yield level, departments
+                level, departments = row.depth, []
+
+            departments.append(row)
+
+        if departments:
+            yield level, departments
+
+    async def _compute_shared_analytics(self, id: int, cursor: int):
+        async with self.uow.fork() as uow:
+            department = await uow.departments.get_by_id(id)
+            if department is None:
+                raise NotFoundError("Department not found")
+
+            levels, spans = await uow.departments.get_subtree_structure(id)
+            positions, months = await uow.departments.get_subtree_employees(id)
+
+        analytics = {
+            "id": id,
+            "departments": sum(levels.values()),
+            "max_depth": max(levels, default=0),
+            "employees": sum(positions.values()),
+            "levels": [
+                {"depth": depth, "departments": count}
+                for depth, count in sorted(levels.items())
+            ],
+            "span_of_control": [
+                {"children": span, "departments": count}
+                for span, count in sorted(spans.items())
+            ],
+            "positions": [
+                {"position": position, "employees": count}
+                for position, count in sorted(
+                    positions.items(), key=lambda item: (-item[1], item[0])
+                )
+            ],
+            # Employees without a hiring date come last
+            "hiring": [
+                {"month": month, "employees": count}
+                for month, count in sorted(
+                    months.items(), key=lambda item: (item[0] is None, item[0] or "")
+                )
+            ],
+        }
+        department_analytics_cache.set(id, cursor, analytics)
+
+        return analytics
+
+    async def _fetch_shared_department(
+        self,
+        id: int,
+        depth: int,
+        include_employees: bool,
+        fields: frozenset[str] | None,
+        employee_fields: frozenset[str] | None,
+    ):
+        # Concurrent identical reads share this fetch, so it must not depend on
+        # the unit of work of whichever request happened to start it
+        async with self.uow.fork() as uow:
+            return await self._fetch_department(
+                uow, id, depth, include_employees, fields, employee_fields
+            )
+
+    async def _fetch_department(
+        self,
+        uow: UnitOfWork,
+        id: int,
+        depth: int,
+        include_employees: bool,
+        fields: frozenset[str] | None,
+        employee_fields: frozenset[str] | None,
+    ):
+        department = await uow.departments.get_by_id(
+            id,
+            include_employees=include_employees,
+            fields=fields,
+            employee_fields=employee_fields,
+        )
+        if department is None:
+            raise NotFoundError("Department not found")
+
+        # A department the tree has not seen is read from the database rather
+        # than reported without children
+        if (
+            settings.department_tree_reads
+            and department_tree.loaded
+            and department_tree.contains(id)
+        ):
+            children = department_tree.get_children(id, depth=depth)
+        else:
+            children = await uow.departments.get_children(
+                id, depth=depth, fields=fields
+            )
+
+        return department, department.employees if include_employees else None, children
@@ -0,0 +1,273 @@
+from array import array
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.changelog.models import Change
+
+# Parent slots of ids that have no department and of root departments
+ABSENT = -2
+ROOT = -1
+
+COMPACTION_MIN_OVERLAY = 1024
+
+
+class DepartmentNode:
+    __slots__ = ("id", "name", "parent_id", "created_at")
+
+    def __init__(self, id: int, name: str, parent_id: int | None, created_at: datetime):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.created_at = created_at
+
+
+class DepartmentTree:
+    # Departments are stored column-wise in arrays indexed by id, which the
+    # serial primary key keeps dense. Children are kept in CSR form: the
+    # children of a department are _children[_offsets[id]:_offsets[id + 1]].
+    # Mutations write the new child lists of the touched parents to an overlay
+    # that is folded back into the arrays once it grows large
+    def __init__(self):
+        self.loaded = False
+        self.cursor = 0
+
+        self._buffer: list[Change] | None = None
+        self._reset()
+
+    async def load(self, rows: AsyncIterator, cursor: int):
+        # Changes arriving while the snapshot is read are replayed on top of it
+        self.loaded = False
+        self._buffer = []
+        self._reset()
+
+        async for id, name, parent_id, created_at in rows:
+            self._ensure_capacity(id)
+            self._parents[id] = ROOT if parent_id is None else parent_id
+            self._name_ids[id] = self._intern(name)
+            self._created_at[id] = created_at.timestamp()
+            self.size += 1
+
+        self._compact()
+
+        buffer, self._buffer = self._buffer, None
+        self.cursor = cursor
+        self.loaded = True
+
+        for change in buffer:
+            self.apply(change)
+
+    def apply(self, change: Change):
+        if self._buffer is not None:
+            self._buffer.append(change)
+            return
+
+        if not self.loaded or change.id <= self.cursor:
+            return
+        self.cursor = change.id
+
+        if change.entity_type != EntityTypeEnum.DEPARTMENT:
+            return
+
+        if change.action == ChangeActionEnum.DELETED:
+            self.remove(change.entity_id)
+        else:
+            self.upsert(
+                change.entity_id,
+                change.data["name"],
+                change.data["parent_id"],
+                change.created_at,
+            )
+
+    def is_current(self, cursor: int):
+        return self.loaded and self.cursor >= cursor
+
+    def contains(self, id: int):
+        return 0 <= id < len(self._parents) and self._parents[id] != ABSENT
+
+    def get_children(self, id: int, *, depth: int | None = None):
+        if not self.contains(id):
+            return []
+
+        children, level, current_depth = [], [id], 0
+        while level and (depth is None or current_depth < depth):
+            level = [child for parent in level for child in self._children_of(parent)]
+            children.extend(level)
+            current_depth += 1
+
+        return [self._node(child) for child in children]
+
+    def check_is_child(self, id: int, new_parent_id: int | None):
+        if new_parent_id is None:
+            return False
+
+        # None when the snapshot cannot answer, a department missing from it
+        # may have been written past the change log, e.g. by a bulk load
+        if not self.contains(id) or not self.contains(new_parent_id):
+            return None
+
+        # Walks up from the new parent, the steps bound guards against a cycle
+        # left by out of order updates
+        node = new_parent_id
+        for _ in range(self.size + 1):
+            if node == id:
+                return True
+            if node == ROOT:
+                return False
+            if not self.contains(node):
+                return None
+            node = self._parents[node]
+
+        return None
+
+    def upsert(
+        self,
+        id: int,
+        name: str,
+        parent_id: int | None,
+        created_at: datetime | None = None,
+    ):
+        if not self.loaded:
+            return
+
+        self._ensure_capacity(id)
+
+        old_parent = self._parents[id]
+        new_parent = ROOT if parent_id is None else parent_id
+
+        if old_parent == ABSENT:
+            self.size += 1
+            if created_at is not None:
+                self._created_at[id] = created_at.timestamp()
+
+        self._name_ids[id] = self._intern(name)
+
+        if old_parent != new_parent:
+            if old_parent >= 0:
+                self._detach(old_parent, id)
+            if new_parent >= 0:
+                self._overlay[new_parent] = [*self._children_of(new_parent), id]
+            self._parents[id] = new_parent
+
+            self._compact_if_needed()
+
+    def remove(self, id: int):
+        if not self.loaded or not self.contains(id):
+            return
+
+        parent = self._parents[id]
+        if parent >= 0:
+            self._detach(parent, id)
+
+        # The deletion cascades to the whole subtree
+        stack = [id]
+        while stack:
+            node = stack.pop()
+            stack.extend(
+                child
+                for child in self._children_of(node)
+                if self._parents[child] == node
+            )
+            self._parents[node] = ABSENT
+            self._overlay.pop(node, None)
+            self.size -= 1
+
+        self._compact_if_needed()
+
+    def stats(self):
+        arrays = [
+            self._parents,
+            self._name_ids,
+            self._created_at,
+            self._offsets,
+            self._children,
+        ]
+        return {
+            "loaded": self.loaded,
+            "cursor": self.cursor,
+            "size": self.size,
+            "slots": len(self._parents),
+            "names": len(self._names),
+            "overlay": len(self._overlay),
+            "array_bytes": sum(len(values) * values.itemsize for values in arrays),
+        }
+
+    def _reset(self):
+        self.size = 0
+
+        self._parents = array("i")
+        self._name_ids = array("i")
+        self._created_at = array("d")
+
+        self._names: list[str] = []
+        self._name_index: dict[str, int] = {}
+
+        self._offsets = array("i", [0])
+        self._children = array("i")
+        self._overlay: dict[int, list[int]] = {}
+
+    def _ensure_capacity(self, id: int):
+        missing = id + 1 - len(self._parents)
+        if missing > 0:
+            self._parents.extend(array("i", [ABSENT]) * missing)
+            self._name_ids.extend(array("i", [0]) * missing)
+            self._created_at.extend(array("d", [0]) * missing)
+
+    def _intern(self, name: str):
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = self._name_index[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def _children_of(self, id: int):
+        children = self._overlay.get(id)
+        if children is not None:
+            return children
+
+        if id + 1 >= len(self._offsets):
+            return ()
+        return self._children[self._offsets[id] : self._offsets[id + 1]]
+
+    def _detach(self, parent: int, id: int):
+        self._overlay[parent] = [
+            child for child in self._children_of(parent) if child != id
+        ]
+
+    def _node(self, id: int):
+        parent = self._parents[id]
+        return DepartmentNode(
+            id,
+            self._names[self._name_ids[id]],
+            None if parent == ROOT else parent,
+            datetime.fromtimestamp(self._created_at[id], timezone.utc),
+        )
+
+    def _compact_if_needed(self):
+        if len(self._overlay) > max(COMPACTION_MIN_OVERLAY, self.size // 8):
+            self._compact()
+
+    def _compact(self):
+        # Counting sort of the ids by parent
+        slots = len(self._parents)
+
+        offsets = array("i", [0]) * (slots + 1)
+        for parent in self._parents:
+            if 0 <= parent < slots:
+                offsets[parent + 1] += 1
+        for id in range(slots):
+            offsets[id + 1] += offsets[id]
+
+        positions = array("i", offsets)
+        children = array("i", [0]) * offsets[slots]
+        for id, parent in enumerate(self._parents):
+            if 0 <= parent < slots:
+                children[positions[parent]] = id
+                positions[parent] += 1
+
+        self._offsets = offsets
+        self._children = children
+        self._overlay = {}
+
+
+department_tree = DepartmentTree()
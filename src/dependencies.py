@@ -2,12 +2,25 @@ from typing import Annotated
 from fastapi import Depends
 
 from src.db import AsyncSessionLocal
+from src.memory.unit_of_work import InMemorySessionLocal, InMemoryUnitOfWork
+from src.settings import settings
 from src.unit_of_work import UnitOfWork
 
 
+def create_uow():
+    if settings.repository_backend == "memory":
+        return InMemoryUnitOfWork(InMemorySessionLocal)
+
+    return UnitOfWork(AsyncSessionLocal)
+
+
 async def get_uow():
-    async with UnitOfWork(AsyncSessionLocal) as uow:
+    async with create_uow() as uow:
         yield uow
 
 
 UOWDependency = Annotated[UnitOfWork, Depends(get_uow)]
+
+# Released as soon as the path operation returns, for long-lived streamed
+# responses that must not hold a database connection
+FunctionScopedUOWDependency = Annotated[UnitOfWork, Depends(get_uow, scope="function")]
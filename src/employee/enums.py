@@ -0,0 +1,10 @@
+from enum import StrEnum
+
+
+class EmployeeFieldEnum(StrEnum):
+    ID = "id"
+    DEPARTMENT_ID = "department_id"
+    FULL_NAME = "full_name"
+    POSITION = "position"
+    HIRED_AT = "hired_at"
+    CREATED_AT = "created_at"
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base, id, created_at
@@ -18,3 +18,12 @@ class Employee(Base):
     created_at: Mapped[created_at]
 
     department: Mapped["Department"] = relationship(back_populates="employees")  # type: ignore[no-undefined-variable] # NOQA: F821
+
+    __table_args__ = (
+        # Covers the per-subtree employee aggregates with index-only scans
+        Index(
+            "employees_department_id_idx",
+            "department_id",
+            postgresql_include=["position", "hired_at"],
+        ),
+    )
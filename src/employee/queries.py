@@ -0,0 +1,37 @@
+from sqlalchemy import Integer, any_, bindparam, column, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.employee.models import Employee
+
+# The rows are locked in id order whatever plan the update gets, so
+# overlapping transfers cannot deadlock. A blocked lock returns the latest
+# department, which the update would not see through a self-join
+LOCK_TRANSFERRED_EMPLOYEES_QUERY = (
+    select(Employee.id, Employee.department_id)
+    .where(Employee.id == any_(bindparam("employee_ids", type_=ARRAY(Integer))))
+    .order_by(Employee.id)
+    .with_for_update()
+)
+
+
+def _build_transfer_employees_query():
+    # Arrays instead of a VALUES list keep the statement text the same for any
+    # number of transfers, so it is compiled and prepared once
+    transfers = (
+        func.unnest(
+            bindparam("employee_ids", type_=ARRAY(Integer)),
+            bindparam("department_ids", type_=ARRAY(Integer)),
+        )
+        .table_valued(column("employee_id", Integer), column("department_id", Integer))
+        .render_derived(name="transfers")
+    )
+
+    return (
+        update(Employee)
+        .where(Employee.id == transfers.c.employee_id)
+        .values(department_id=transfers.c.department_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+TRANSFER_EMPLOYEES_QUERY = _build_transfer_employees_query()
@@ -1,9 +1,21 @@
+from collections import namedtuple
+
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.employee.models import Employee
+from src.employee.queries import (
+    LOCK_TRANSFERRED_EMPLOYEES_QUERY,
+    TRANSFER_EMPLOYEES_QUERY,
+)
+from src.profiling import profile_methods
+
+TransferRow = namedtuple(
+    "TransferRow", ["id", "department_id", "previous_department_id"]
+)
 
 
+@profile_methods("orm")
 class EmployeeRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -17,5 +29,28 @@ class EmployeeRepository:
             update(Employee)
             .where(Employee.department_id == old_department_id)
             .values(department_id=new_department_id)
+            .returning(Employee.id)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def transfer(self, transfers: list[tuple[int, int]]):
+        employee_ids = [employee_id for employee_id, _ in transfers]
+
+        result = await self.session.execute(
+            LOCK_TRANSFERRED_EMPLOYEES_QUERY, {"employee_ids": employee_ids}
+        )
+        previous = dict(result.all())
+
+        await self.session.execute(
+            TRANSFER_EMPLOYEES_QUERY,
+            {
+                "employee_ids": employee_ids,
+                "department_ids": [department_id for _, department_id in transfers],
+            },
         )
-        await self.session.execute(query)
+        return [
+            TransferRow(employee_id, department_id, previous[employee_id])
+            for employee_id, department_id in transfers
+            if employee_id in previous
+        ]
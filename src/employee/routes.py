@@ -0,0 +1,29 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, status
+
+from src.admission import admit
+from src.employee.schemas import TransferEmployeesResultSchema, TransferEmployeesSchema
+from src.employee.service import EmployeeService
+from src.schemas import HTTPErrorSchema
+
+router = APIRouter(
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HTTPErrorSchema}}
+)
+
+ServiceDependency = Annotated[EmployeeService, Depends()]
+
+
+@router.post(
+    "/transfer",
+    dependencies=[admit("heavy")],
+    response_model=TransferEmployeesResultSchema,
+    responses={status.HTTP_404_NOT_FOUND: {"model": HTTPErrorSchema}},
+)
+async def transfer_employees(
+    service: ServiceDependency, transfer: TransferEmployeesSchema
+):
+    rows = await service.transfer_employees(
+        [(item.employee_id, item.department_id) for item in transfer.transfers]
+    )
+
+    return {"transferred": rows}
@@ -1,5 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from fastapi import HTTPException, status
+from pydantic import BaseModel, Field, model_validator
+
+from src.settings import settings
 
 
 class CreateEmployeeSchema(BaseModel):
@@ -20,3 +23,39 @@ class EmployeeSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class EmployeeTransferSchema(BaseModel):
+    employee_id: int
+    department_id: int
+
+
+class TransferEmployeesSchema(BaseModel):
+    transfers: list[EmployeeTransferSchema] = Field(
+        min_length=1, max_length=settings.employee_transfer_max_size
+    )
+
+    @model_validator(mode="after")
+    def check_employee_ids(self):
+        employee_ids = [transfer.employee_id for transfer in self.transfers]
+
+        if len(set(employee_ids)) != len(employee_ids):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Each employee can only be transferred once",
+            )
+
+        return self
+
+
+class EmployeeTransferredSchema(BaseModel):
+    id: int
+    department_id: int
+    previous_department_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class TransferEmployeesResultSchema(BaseModel):
+    transferred: list[EmployeeTransferredSchema]
@@ -0,0 +1,56 @@
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.dependencies import UOWDependency
+from src.exceptions import NotFoundError
+from src.profiling import profile_methods
+
+
+@profile_methods("service")
+class EmployeeService:
+    def __init__(self, uow: UOWDependency):
+        self.uow = uow
+
+    async def transfer_employees(self, transfers: list[tuple[int, int]]):
+        # Transfers are reported in employee id order
+        transfers = sorted(transfers)
+        department_ids = list(
+            dict.fromkeys(department_id for _, department_id in transfers)
+        )
+
+        # Every target is checked with one query before anything is moved
+        found = await self.uow.departments.get_many(
+            department_ids, fields=frozenset({"id"})
+        )
+        found_ids = {department.id for department, _ in found}
+        missing_ids = [id for id in department_ids if id not in found_ids]
+        if missing_ids:
+            raise NotFoundError(f"Departments not found: {_format_ids(missing_ids)}")
+
+        async with self.uow.handle_integrity_errors():
+            rows = await self.uow.employees.transfer(transfers)
+
+        if len(rows) < len(transfers):
+            await self.uow.rollback()
+            moved_ids = {row.id for row in rows}
+            missing_ids = [id for id, _ in transfers if id not in moved_ids]
+            raise NotFoundError(f"Employees not found: {_format_ids(missing_ids)}")
+
+        for row in rows:
+            if row.department_id == row.previous_department_id:
+                continue
+
+            self.uow.record(
+                EntityTypeEnum.EMPLOYEE,
+                ChangeActionEnum.MOVED,
+                row.id,
+                {
+                    "department_id": row.department_id,
+                    "previous_department_id": row.previous_department_id,
+                },
+            )
+        await self.uow.commit()
+
+        return rows
+
+
+def _format_ids(ids: list[int]):
+    return ", ".join(map(str, ids))
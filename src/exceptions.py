@@ -2,3 +2,15 @@ class NotFoundError(Exception): ...
 
 
 class DatabaseError(Exception): ...
+
+
+class ForbiddenError(Exception): ...
+
+
+class ServiceNotReadyError(Exception): ...
+
+
+class ServiceOverloadedError(Exception):
+    def __init__(self, message: str, *, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
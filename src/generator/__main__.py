@@ -0,0 +1,81 @@
+import asyncio
+from argparse import ArgumentParser
+from time import perf_counter
+
+from src.generator.enums import BranchingEnum
+from src.generator.generator import OrganizationGenerator
+from src.generator.schemas import GeneratorConfigSchema
+
+
+def parse_args():
+    parser = ArgumentParser(
+        prog="python -m src.generator",
+        description="Generate a synthetic organization and load it into the database",
+    )
+
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--roots", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument(
+        "--branching",
+        choices=[branching.value for branching in BranchingEnum],
+        default=BranchingEnum.POISSON.value,
+    )
+    parser.add_argument("--children", type=float, default=4)
+    parser.add_argument("--min-children", type=int, default=0)
+    parser.add_argument("--max-children", type=int, default=20)
+    parser.add_argument("--max-departments", type=int, default=None)
+    parser.add_argument("--name-pool", type=int, default=20)
+    parser.add_argument("--min-employees", type=int, default=0)
+    parser.add_argument("--max-employees", type=int, default=10)
+    parser.add_argument("--hired-at-years", type=int, default=10)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="remove all existing departments and employees before loading",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only generate the rows without connecting to the database",
+    )
+
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    config = GeneratorConfigSchema.model_validate(
+        {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("truncate", "dry_run")
+        }
+    )
+    generator = OrganizationGenerator(config)
+
+    started_at = perf_counter()
+
+    if args.dry_run:
+        for _ in generator.departments():
+            pass
+        for _ in generator.employees():
+            pass
+    else:
+        from src.generator.loader import load_organization
+
+        await load_organization(generator, truncate=args.truncate)
+
+    elapsed = perf_counter() - started_at
+    rows = generator.departments_count + generator.employees_count
+
+    print(
+        f"departments: {generator.departments_count}, "
+        f"employees: {generator.employees_count}, "
+        f"elapsed: {elapsed:.2f}s, "
+        f"rows per minute: {rows / elapsed * 60:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+
+class BranchingEnum(StrEnum):
+    FIXED = "fixed"
+    UNIFORM = "uniform"
+    POISSON = "poisson"
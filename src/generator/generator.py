@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta, timezone
+from math import exp
+from random import Random
+from typing import Iterator
+
+from src.generator.enums import BranchingEnum
+from src.generator.schemas import GeneratorConfigSchema
+
+DEPARTMENT_NAMES = [
+    "Engineering",
+    "Sales",
+    "Marketing",
+    "Finance",
+    "Support",
+    "Operations",
+    "Legal",
+    "Human Resources",
+    "Research",
+    "Design",
+    "Security",
+    "Infrastructure",
+    "Analytics",
+    "Procurement",
+    "Logistics",
+    "Quality Assurance",
+    "Customer Success",
+    "Partnerships",
+    "Communications",
+    "Compliance",
+    "Platform",
+    "Mobile",
+    "Data",
+    "Training",
+    "Facilities",
+    "Accounting",
+    "Payroll",
+    "Recruiting",
+    "Product",
+    "Strategy",
+]
+
+FIRST_NAMES = [
+    "Alex",
+    "Maria",
+    "Ivan",
+    "Anna",
+    "John",
+    "Olga",
+    "Peter",
+    "Elena",
+    "Sergey",
+    "Kate",
+    "Dmitry",
+    "Sofia",
+    "Michael",
+    "Irina",
+    "Pavel",
+    "Julia",
+]
+
+LAST_NAMES = [
+    "Smith",
+    "Ivanov",
+    "Petrova",
+    "Johnson",
+    "Sokolov",
+    "Kuznetsova",
+    "Brown",
+    "Popov",
+    "Volkova",
+    "Miller",
+    "Lebedev",
+    "Novikova",
+    "Davis",
+    "Morozov",
+    "Fedorova",
+    "Wilson",
+]
+
+POSITIONS = [
+    "Engineer",
+    "Senior Engineer",
+    "Manager",
+    "Analyst",
+    "Designer",
+    "Specialist",
+    "Lead",
+    "Director",
+    "Intern",
+    "Consultant",
+]
+
+HIRED_AT_END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class OrganizationGenerator:
+    def __init__(self, config: GeneratorConfigSchema, start_id: int = 1):
+        self.config = config
+        self.start_id = start_id
+        self.departments_count = 0
+        self.employees_count = 0
+
+    def departments(self) -> Iterator[tuple[int, str, int | None]]:
+        rng = Random(f"{self.config.seed}:departments")
+        name_pool = DEPARTMENT_NAMES[: self.config.name_pool]
+
+        self.departments_count = 0
+        next_id = self.start_id
+
+        level = []
+        for index in range(self.config.roots):
+            if self._is_full():
+                return
+
+            yield next_id, f"Organization {index + 1}", None
+            level.append(next_id)
+            next_id += 1
+            self.departments_count += 1
+
+        for _ in range(1, self.config.depth):
+            next_level = []
+
+            for parent_id in level:
+                count = self._children_count(rng)
+                for name in self._sibling_names(rng, name_pool, count):
+                    if self._is_full():
+                        return
+
+                    yield next_id, name, parent_id
+                    next_level.append(next_id)
+                    next_id += 1
+                    self.departments_count += 1
+
+            level = next_level
+
+    def employees(self) -> Iterator[tuple[int, str, str, datetime | None]]:
+        rng = Random(f"{self.config.seed}:employees")
+        hired_at_range = self.config.hired_at_years * 365 * 24 * 60 * 60
+
+        self.employees_count = 0
+
+        for department_id in range(
+            self.start_id, self.start_id + self.departments_count
+        ):
+            count = rng.randint(self.config.min_employees, self.config.max_employees)
+            for _ in range(count):
+                full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                position = rng.choice(POSITIONS)
+                hired_at = HIRED_AT_END - timedelta(
+                    seconds=rng.randrange(hired_at_range)
+                )
+
+                yield department_id, full_name, position, hired_at
+                self.employees_count += 1
+
+    def _is_full(self):
+        return (
+            self.config.max_departments is not None
+            and self.departments_count >= self.config.max_departments
+        )
+
+    def _children_count(self, rng: Random):
+        match self.config.branching:
+            case BranchingEnum.FIXED:
+                count = round(self.config.children)
+            case BranchingEnum.UNIFORM:
+                count = rng.randint(self.config.min_children, self.config.max_children)
+            case BranchingEnum.POISSON:
+                count = self._poisson(rng, self.config.children)
+
+        return max(self.config.min_children, min(count, self.config.max_children))
+
+    @staticmethod
+    def _poisson(rng: Random, mean: float):
+        # Knuth's method is fine for the small means used for branching factors
+        limit = exp(-mean)
+        count = 0
+        product = rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        return count
+
+    @staticmethod
+    def _sibling_names(rng: Random, name_pool: list[str], count: int):
+        # Names repeat across parents but are unique among siblings to satisfy
+        # name_parent_id_unique
+        names = rng.sample(name_pool, len(name_pool))
+        for index in range(count):
+            name = names[index % len(names)]
+            yield name if index < len(names) else f"{name} {index // len(names) + 1}"
@@ -0,0 +1,51 @@
+from sqlalchemy import BigInteger, bindparam, func, select, text
+
+from src.db import engine
+from src.department.models import Department
+from src.generator.generator import OrganizationGenerator
+
+SET_DEPARTMENTS_SEQUENCE_QUERY = select(
+    func.setval(
+        func.pg_get_serial_sequence("departments", "id"),
+        bindparam("value", type_=BigInteger),
+    )
+)
+
+
+async def load_organization(generator: OrganizationGenerator, *, truncate: bool):
+    async with engine.begin() as connection:
+        if truncate:
+            await connection.execute(
+                text("TRUNCATE departments, employees RESTART IDENTITY CASCADE")
+            )
+
+        # Ids are assigned here to resolve parent ids without round trips, so
+        # concurrent inserts have to wait until the sequence is moved past them
+        await connection.execute(
+            text("LOCK TABLE departments IN SHARE ROW EXCLUSIVE MODE")
+        )
+        result = await connection.execute(
+            select(func.coalesce(func.max(Department.id), 0))
+        )
+        generator.start_id = result.scalar_one() + 1
+
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        await driver_connection.copy_records_to_table(
+            "departments",
+            records=generator.departments(),
+            columns=("id", "name", "parent_id"),
+        )
+
+        if generator.departments_count:
+            await connection.execute(
+                SET_DEPARTMENTS_SEQUENCE_QUERY,
+                {"value": generator.start_id + generator.departments_count - 1},
+            )
+
+        await driver_connection.copy_records_to_table(
+            "employees",
+            records=generator.employees(),
+            columns=("department_id", "full_name", "position", "hired_at"),
+        )
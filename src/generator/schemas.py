@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field, model_validator
+
+from src.generator.enums import BranchingEnum
+
+
+class GeneratorConfigSchema(BaseModel):
+    seed: str = Field(default="0")
+    roots: int = Field(default=1, ge=1)
+    depth: int = Field(default=5, ge=1)
+    branching: BranchingEnum = Field(default=BranchingEnum.POISSON)
+    children: float = Field(default=4, ge=0)
+    min_children: int = Field(default=0, ge=0)
+    max_children: int = Field(default=20, ge=0)
+    max_departments: int | None = Field(default=None, ge=1)
+    name_pool: int = Field(default=20, ge=1)
+    min_employees: int = Field(default=0, ge=0)
+    max_employees: int = Field(default=10, ge=0)
+    hired_at_years: int = Field(default=10, ge=1)
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.min_children > self.max_children:
+            raise ValueError("min_children must not be greater than max_children")
+
+        if self.min_employees > self.max_employees:
+            raise ValueError("min_employees must not be greater than max_employees")
+
+        return self
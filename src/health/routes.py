@@ -0,0 +1,28 @@
+from fastapi import APIRouter, status
+
+from src.exceptions import ServiceNotReadyError
+from src.health.schemas import ReadinessSchema
+from src.lifespan import readiness
+from src.schemas import HTTPErrorSchema
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def check_liveness():
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessSchema,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HTTPErrorSchema}},
+)
+async def check_readiness():
+    if readiness.draining:
+        raise ServiceNotReadyError("Shutting down")
+
+    if not readiness.ready:
+        raise ServiceNotReadyError(readiness.error or "Warming up")
+
+    return {"ready": True, "warmup_seconds": readiness.warmup_seconds}
@@ -0,0 +1,90 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from time import perf_counter
+
+from fastapi import FastAPI
+
+from src.changelog.broadcaster import change_broadcaster
+from src.db import AsyncSessionLocal, engine
+from src.department.tree import department_tree
+from src.settings import settings
+from src.unit_of_work import UnitOfWork
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.warmup_seconds: float | None = None
+        self.error: str | None = None
+
+
+readiness = Readiness()
+
+
+async def warm_up_connection():
+    async with UnitOfWork(AsyncSessionLocal) as uow:
+        await uow.departments.warm_up()
+        await uow.changes.get_last_id()
+
+
+async def warm_up():
+    # The in-memory backend has no connections to open and no change log
+    # notifications to follow
+    if settings.repository_backend == "memory":
+        return
+
+    # Sessions hold their connection until they close, so running them at the
+    # same time opens that many pool connections, each with the asyncpg type
+    # introspection done and the hot statements prepared
+    connections = min(
+        settings.warmup_connections, settings.db_pool_size + settings.db_max_overflow
+    )
+    await asyncio.gather(*(warm_up_connection() for _ in range(connections)))
+
+    if settings.department_tree_reads:
+        # The broadcaster keeps the snapshot current from the cursor it starts at
+        await change_broadcaster.start()
+        async with UnitOfWork(AsyncSessionLocal) as uow:
+            await department_tree.load(
+                uow.departments.stream_all(
+                    batch_size=settings.subtree_stream_chunk_size
+                ),
+                change_broadcaster.cursor,
+            )
+
+
+async def warm_up_until_ready():
+    started_at = perf_counter()
+
+    while True:
+        try:
+            await warm_up()
+        except Exception as e:
+            readiness.error = f"Warm-up failed: {e}"
+            await asyncio.sleep(settings.warmup_retry_interval)
+            continue
+
+        readiness.warmup_seconds = perf_counter() - started_at
+        readiness.error = None
+        readiness.ready = True
+        return
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # The server starts accepting requests right away so liveness probes pass,
+    # readiness turns green once the warm-up is done
+    warmup_task = asyncio.create_task(warm_up_until_ready())
+
+    yield
+
+    readiness.ready = False
+    readiness.draining = True
+
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+
+    await change_broadcaster.stop()
+    await engine.dispose()
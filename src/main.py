@@ -2,12 +2,24 @@ from fastapi import FastAPI, status
 from fastapi.responses import JSONResponse
 
 from src.api import router
-from src.department.exceptions import DepartmentCycleError, DuplicateDepartmentNameError
-from src.exceptions import DatabaseError, NotFoundError
+from src.compression import CompressionMiddleware
+from src.department.exceptions import (
+    ConcurrentStructureChangeError,
+    DepartmentCycleError,
+    DuplicateDepartmentNameError,
+)
+from src.exceptions import (
+    DatabaseError,
+    ForbiddenError,
+    NotFoundError,
+    ServiceNotReadyError,
+    ServiceOverloadedError,
+)
+from src.lifespan import lifespan
 
 import src.models  # type: ignore[no-unused-import] # NOQA: F401
 
-app = FastAPI(title="Organizational Structure API")
+app = FastAPI(title="Organizational Structure API", lifespan=lifespan)
 
 
 @app.exception_handler(NotFoundError)
@@ -18,6 +30,14 @@ def not_found_exception_handler(_, exception: NotFoundError):
     )
 
 
+@app.exception_handler(ForbiddenError)
+def forbidden_exception_handler(_, exception: ForbiddenError):
+    return JSONResponse(
+        status_code=status.HTTP_403_FORBIDDEN,
+        content={"detail": str(exception)},
+    )
+
+
 @app.exception_handler(DuplicateDepartmentNameError)
 def duplicate_department_name_exception_handler(
     _, exception: DuplicateDepartmentNameError
@@ -36,6 +56,16 @@ def department_cycle_exception_handler(_, exception: DepartmentCycleError):
     )
 
 
+@app.exception_handler(ConcurrentStructureChangeError)
+def concurrent_structure_change_exception_handler(
+    _, exception: ConcurrentStructureChangeError
+):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exception)},
+    )
+
+
 @app.exception_handler(DatabaseError)
 def database_exception_handler(_, exception: DatabaseError):
     return JSONResponse(
@@ -44,4 +74,23 @@ def database_exception_handler(_, exception: DatabaseError):
     )
 
 
+@app.exception_handler(ServiceNotReadyError)
+def service_not_ready_exception_handler(_, exception: ServiceNotReadyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exception)},
+    )
+
+
+@app.exception_handler(ServiceOverloadedError)
+def service_overloaded_exception_handler(_, exception: ServiceOverloadedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exception)},
+        headers={"Retry-After": str(exception.retry_after)},
+    )
+
+
+app.add_middleware(CompressionMiddleware, prefixes=("/departments",))
+
 app.include_router(router)
@@ -0,0 +1,182 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from src.changelog.models import Change
+from src.department.models import Department
+from src.employee.models import Employee
+
+# Tables are dicts of rows by id with the indexes the service queries rely on
+# kept next to them, the constraints of the Postgres schema are checked on write
+
+MODELS = [Department, Employee, Change]
+
+COLUMNS = {
+    model: [column.key for column in model.__table__.columns] for model in MODELS
+}
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.rows: dict[type, dict[int, dict]] = {model: {} for model in MODELS}
+
+        self.children: dict[int | None, dict[int, None]] = {}
+        self.names: dict[tuple[int, str], int] = {}
+        self.sorted_names: list[tuple[str, int]] = []
+        self.department_employees: dict[int, dict[int, None]] = {}
+        self.change_ids: list[int] = []
+
+        self._last_ids = dict.fromkeys(MODELS, 0)
+
+    def next_id(self, model: type):
+        self._last_ids[model] += 1
+        return self._last_ids[model]
+
+    def check(self, model: type, id: int, row: dict | None):
+        if row is None:
+            return
+
+        if model is Department:
+            parent_id = row["parent_id"]
+            if parent_id is not None and parent_id not in self.rows[Department]:
+                raise _integrity_error("departments_parent_id_fkey")
+            if self.names.get((parent_id, row["name"]), id) != id:
+                raise _integrity_error("name_parent_id_unique")
+
+        if model is Employee and row["department_id"] not in self.rows[Department]:
+            raise _integrity_error("employees_department_id_fkey")
+
+    def put(self, model: type, id: int, row: dict | None):
+        rows = self.rows[model]
+        old = rows.get(id)
+
+        if row is None:
+            rows.pop(id, None)
+        else:
+            rows[id] = row
+            self._last_ids[model] = max(self._last_ids[model], id)
+
+        if model is Department:
+            self._index_department(id, old, row)
+        elif model is Employee:
+            self._index_employee(id, old, row)
+        elif model is Change:
+            self._index_change(id, old, row)
+
+        return old
+
+    def _index_department(self, id: int, old: dict | None, row: dict | None):
+        if old is not None:
+            self.children[old["parent_id"]].pop(id)
+            if old["parent_id"] is not None:
+                del self.names[old["parent_id"], old["name"]]
+            del self.sorted_names[bisect_left(self.sorted_names, (old["name"], id))]
+
+        if row is not None:
+            self.children.setdefault(row["parent_id"], {})[id] = None
+            # NULLs are distinct in the unique constraint, roots may share names
+            if row["parent_id"] is not None:
+                self.names[row["parent_id"], row["name"]] = id
+            insort(self.sorted_names, (row["name"], id))
+
+    def _index_employee(self, id: int, old: dict | None, row: dict | None):
+        if old is not None:
+            self.department_employees[old["department_id"]].pop(id)
+
+        if row is not None:
+            self.department_employees.setdefault(row["department_id"], {})[id] = None
+
+    def _index_change(self, id: int, old: dict | None, row: dict | None):
+        if old is not None:
+            del self.change_ids[bisect_left(self.change_ids, id)]
+
+        if row is not None:
+            insort(self.change_ids, id)
+
+    def get_changes_since(self, cursor: int, limit: int):
+        start = bisect_right(self.change_ids, cursor)
+        return [self.rows[Change][id] for id in self.change_ids[start : start + limit]]
+
+
+def _integrity_error(constraint: str):
+    return IntegrityError(
+        "INSERT/UPDATE", None, Exception(f'violates constraint "{constraint}"')
+    )
+
+
+class InMemorySession:
+    def __init__(self, database: InMemoryDatabase):
+        self.database = database
+
+        self._identity: dict[tuple[type, int], object] = {}
+        self._new: list = []
+        self._undo: list[tuple[type, int, dict | None]] = []
+
+    def add(self, instance):
+        self._new.append(instance)
+
+    def add_all(self, instances):
+        self._new.extend(instances)
+
+    def get(self, model: type, row: dict):
+        # One instance per row and session, like the identity map of a session
+        key = (model, row["id"])
+        instance = self._identity.get(key)
+        if instance is None:
+            instance = self._identity[key] = model(**row)
+        return instance
+
+    def write(self, model: type, id: int, row: dict | None):
+        self.database.check(model, id, row)
+        old = self.database.put(model, id, row)
+        self._undo.append((model, id, old))
+
+        instance = self._identity.get((model, id))
+        if instance is not None:
+            if row is None:
+                del self._identity[model, id]
+            else:
+                for key, value in row.items():
+                    setattr(instance, key, value)
+
+    async def flush(self):
+        new, self._new = self._new, []
+        for instance in new:
+            model = type(instance)
+            if instance.id is None:
+                instance.id = self.database.next_id(model)
+            if getattr(instance, "created_at", None) is None:
+                instance.created_at = datetime.now(timezone.utc)
+
+            self.write(model, instance.id, _row(instance))
+            self._identity[model, instance.id] = instance
+
+        # Changed attributes of loaded instances are written like UPDATEs
+        for (model, id), instance in list(self._identity.items()):
+            stored = self.database.rows[model].get(id)
+            row = _row(instance)
+            if stored is not None and stored != row:
+                self.write(model, id, row)
+
+    async def commit(self):
+        await self.flush()
+        self._undo = []
+
+    async def rollback(self):
+        self._new = []
+        self._identity.clear()
+
+        undo, self._undo = self._undo, []
+        for model, id, row in reversed(undo):
+            self.database.put(model, id, row)
+
+    async def close(self):
+        await self.rollback()
+
+
+def _row(instance):
+    return {key: getattr(instance, key) for key in COLUMNS[type(instance)]}
+
+
+memory_database = InMemoryDatabase()
@@ -0,0 +1,433 @@
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from src.changelog.models import Change
+from src.department.enums import SearchModeEnum
+from src.department.models import Department
+from src.employee.models import Employee
+from src.employee.repository import TransferRow
+from src.memory.database import InMemorySession
+
+# Rows shaped like the ones the column queries of the Postgres repositories
+# return, so callers can both unpack them and read them by name
+DepartmentRow = namedtuple("DepartmentRow", ["id", "name", "parent_id", "created_at"])
+DepartmentLevelRow = namedtuple(
+    "DepartmentLevelRow", ["id", "name", "parent_id", "created_at", "depth"]
+)
+AncestorRow = namedtuple(
+    "AncestorRow", ["department_id", "id", "name", "parent_id", "depth"]
+)
+CloneRow = namedtuple(
+    "CloneRow", ["id", "name", "parent_id", "created_at", "source_id", "depth"]
+)
+
+# pg_trgm defaults
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=100_000)
+def _trigrams(text: str):
+    trigrams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+def _similarity(left: str, right: str):
+    left, right = _trigrams(left), _trigrams(right)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class InMemoryDepartmentRepository:
+    def __init__(self, session: InMemorySession):
+        self.session = session
+        self.database = session.database
+
+    async def get_by_id(
+        self,
+        id: int,
+        *,
+        include_employees: bool = False,
+        include_children: bool = False,
+        fields: frozenset[str] | None = None,
+        employee_fields: frozenset[str] | None = None,
+    ):
+        await self.session.flush()
+
+        row = self.database.rows[Department].get(id)
+        if row is None:
+            return None
+
+        department = self.session.get(Department, row)
+
+        if include_employees:
+            department.employees = sorted(
+                self._get_employees(id), key=lambda employee: employee.full_name
+            )
+
+        if include_children:
+            department.children = self._get_children(id)
+
+        return department
+
+    async def get_many(
+        self,
+        ids: list[int],
+        *,
+        include_children: bool = False,
+        include_employees_count: bool = False,
+        fields: frozenset[str] | None = None,
+    ):
+        await self.session.flush()
+
+        result = []
+        for id in ids:
+            row = self.database.rows[Department].get(id)
+            if row is None:
+                continue
+
+            department = self.session.get(Department, row)
+            if include_children:
+                department.children = self._get_children(id)
+
+            employees_count = (
+                len(self.database.department_employees.get(id, ()))
+                if include_employees_count
+                else None
+            )
+            result.append((department, employees_count))
+
+        return result
+
+    async def search(
+        self,
+        query: str,
+        *,
+        mode: SearchModeEnum,
+        limit: int,
+        offset: int,
+        fields: frozenset[str] | None = None,
+    ):
+        await self.session.flush()
+
+        if mode == SearchModeEnum.PREFIX:
+            # Ordered by code point like the "C" collation of the prefix index
+            names = self.database.sorted_names
+            ids = []
+            for name, id in names[bisect_left(names, (query, 0)) :]:
+                if not name.startswith(query) or len(ids) >= offset + limit:
+                    break
+                ids.append(id)
+        else:
+            # No index to serve this, every name is compared
+            matches = []
+            for id, row in self.database.rows[Department].items():
+                similarity = _similarity(row["name"], query)
+                if similarity >= SIMILARITY_THRESHOLD:
+                    matches.append((1 - similarity, id))
+            ids = [id for _, id in sorted(matches)]
+
+        return [self._get(id) for id in ids[offset : offset + limit]]
+
+    async def warm_up(self):
+        pass
+
+    def add(self, department: Department):
+        self.session.add(department)
+        return department
+
+    async def get_children(
+        self,
+        id: int,
+        *,
+        depth: int | None = None,
+        fields: frozenset[str] | None = None,
+    ):
+        await self.session.flush()
+
+        return [self._get(row.id) for row in self._walk_children(id, depth)]
+
+    async def stream_children(self, id: int, *, limit: int, batch_size: int):
+        await self.session.flush()
+
+        for index, row in enumerate(self._walk_children(id, None)):
+            if index >= limit:
+                return
+            yield row
+
+    async def stream_all(self, *, batch_size: int):
+        await self.session.flush()
+
+        rows = self.database.rows[Department]
+        for id in sorted(rows):
+            row = rows[id]
+            yield DepartmentRow(id, row["name"], row["parent_id"], row["created_at"])
+
+    async def get_ancestors_many(self, ids: list[int]):
+        await self.session.flush()
+
+        rows = self.database.rows[Department]
+        ancestors = {}
+        for id in ids:
+            if id not in rows or id in ancestors:
+                continue
+
+            path = []
+            parent_id = rows[id]["parent_id"]
+            while parent_id is not None:
+                row = rows[parent_id]
+                path.append((row["id"], row["name"], row["parent_id"]))
+                parent_id = row["parent_id"]
+
+            ancestors[id] = [
+                AncestorRow(id, *ancestor, len(path) - index)
+                for index, ancestor in enumerate(reversed(path))
+            ]
+        return ancestors
+
+    async def get_subtree_structure(self, id: int):
+        await self.session.flush()
+
+        levels, spans = {}, {}
+        for department_id, depth in self._walk_subtree(id):
+            span = len(self.database.children.get(department_id, ()))
+            levels[depth] = levels.get(depth, 0) + 1
+            spans[span] = spans.get(span, 0) + 1
+        return levels, spans
+
+    async def get_subtree_employees(self, id: int):
+        await self.session.flush()
+
+        rows = self.database.rows[Employee]
+        positions, months = {}, {}
+        for department_id, _ in self._walk_subtree(id):
+            for employee_id in self.database.department_employees.get(
+                department_id, ()
+            ):
+                row = rows[employee_id]
+                month = (
+                    row["hired_at"].astimezone(timezone.utc).strftime("%Y-%m")
+                    if row["hired_at"] is not None
+                    else None
+                )
+                positions[row["position"]] = positions.get(row["position"], 0) + 1
+                months[month] = months.get(month, 0) + 1
+        return positions, months
+
+    async def check_is_child(self, id: int, new_parent_id: int | None):
+        if new_parent_id is None:
+            return False
+
+        if id == new_parent_id:
+            return True
+
+        await self.session.flush()
+
+        # Walking up from the new parent visits as many rows as it is deep,
+        # which gives the same answer as searching the subtree of the department
+        rows = self.database.rows[Department]
+        parent_id = new_parent_id
+        while parent_id is not None and parent_id in rows:
+            if parent_id == id:
+                return True
+            parent_id = rows[parent_id]["parent_id"]
+        return False
+
+    async def lock(self, exclusive_ids: list[int], shared_ids: list[int]):
+        # Every statement runs to completion on the event loop, there is
+        # nothing to interleave with
+        await self.session.flush()
+
+    async def clone_subtree(
+        self, id: int, parent_id: int | None, name: str, *, include_employees: bool
+    ):
+        await self.session.flush()
+
+        rows = self.database.rows[Department]
+        if id not in rows:
+            return [], 0
+
+        # The subtree is read before anything is written, like the snapshot of
+        # the single statement, so copying under a descendant terminates
+        created_at = datetime.now(timezone.utc)
+        sources = [(id, parent_id, name, 0)]
+        sources.extend(
+            (row.id, row.parent_id, row.name, row.depth)
+            for row in self._walk_children(id, None)
+        )
+        employee_rows = self.database.rows[Employee]
+
+        new_ids, clones, employees_count = {}, [], 0
+        for source_id, source_parent_id, source_name, depth in sources:
+            new_id = new_ids[source_id] = self.database.next_id(Department)
+            new_parent_id = parent_id if depth == 0 else new_ids[source_parent_id]
+            row = {
+                "id": new_id,
+                "name": source_name,
+                "parent_id": new_parent_id,
+                "created_at": created_at,
+            }
+            self.session.write(Department, new_id, row)
+            clones.append(
+                CloneRow(
+                    new_id, source_name, new_parent_id, created_at, source_id, depth
+                )
+            )
+
+            if not include_employees:
+                continue
+
+            for source_employee_id in list(
+                self.database.department_employees.get(source_id, ())
+            ):
+                employee_id = self.database.next_id(Employee)
+                self.session.write(
+                    Employee,
+                    employee_id,
+                    {
+                        **employee_rows[source_employee_id],
+                        "id": employee_id,
+                        "department_id": new_id,
+                        "created_at": created_at,
+                    },
+                )
+                employees_count += 1
+
+        return clones, employees_count
+
+    async def reassign_parent(self, old_department_id: int, new_department_id: int):
+        await self.session.flush()
+
+        rows = self.database.rows[Department]
+        for id in list(self.database.children.get(old_department_id, ())):
+            self.session.write(
+                Department, id, {**rows[id], "parent_id": new_department_id}
+            )
+
+    async def delete(self, id: int):
+        await self.session.flush()
+
+        if id not in self.database.rows[Department]:
+            return
+
+        # ON DELETE CASCADE on the parent and on the employees
+        subtree = [id, *(row.id for row in self._walk_children(id, None))]
+        for department_id in reversed(subtree):
+            for employee_id in list(
+                self.database.department_employees.get(department_id, ())
+            ):
+                self.session.write(Employee, employee_id, None)
+            self.session.write(Department, department_id, None)
+
+    def _get(self, id: int):
+        return self.session.get(Department, self.database.rows[Department][id])
+
+    def _get_children(self, id: int):
+        return [self._get(child_id) for child_id in self.database.children.get(id, ())]
+
+    def _get_employees(self, id: int):
+        rows = self.database.rows[Employee]
+        return [
+            self.session.get(Employee, rows[employee_id])
+            for employee_id in self.database.department_employees.get(id, ())
+        ]
+
+    def _walk_subtree(self, id: int):
+        if id not in self.database.rows[Department]:
+            return
+
+        yield id, 0
+        for row in self._walk_children(id, None):
+            yield row.id, row.depth
+
+    def _walk_children(self, id: int, depth: int | None):
+        # Breadth first, so rows come ordered by depth like in the recursive CTE
+        rows = self.database.rows[Department]
+        level, ids = 1, [id]
+        while ids and (depth is None or level <= depth):
+            next_ids = []
+            for parent_id in ids:
+                for child_id in self.database.children.get(parent_id, ()):
+                    row = rows[child_id]
+                    yield DepartmentLevelRow(
+                        child_id, row["name"], parent_id, row["created_at"], level
+                    )
+                    next_ids.append(child_id)
+            level, ids = level + 1, next_ids
+
+
+class InMemoryEmployeeRepository:
+    def __init__(self, session: InMemorySession):
+        self.session = session
+        self.database = session.database
+
+    def add(self, employee: Employee):
+        self.session.add(employee)
+        return employee
+
+    async def reassign_department(self, old_department_id: int, new_department_id: int):
+        await self.session.flush()
+
+        rows = self.database.rows[Employee]
+        ids = list(self.database.department_employees.get(old_department_id, ()))
+        for id in ids:
+            self.session.write(
+                Employee, id, {**rows[id], "department_id": new_department_id}
+            )
+        return ids
+
+    async def transfer(self, transfers: list[tuple[int, int]]):
+        await self.session.flush()
+
+        # Like the lock query, the previous departments are all read first
+        rows = self.database.rows[Employee]
+        previous = {
+            employee_id: rows[employee_id]["department_id"]
+            for employee_id, _ in sorted(transfers)
+            if employee_id in rows
+        }
+
+        for employee_id, department_id in transfers:
+            if employee_id in previous:
+                self.session.write(
+                    Employee,
+                    employee_id,
+                    {**rows[employee_id], "department_id": department_id},
+                )
+        return [
+            TransferRow(employee_id, department_id, previous[employee_id])
+            for employee_id, department_id in transfers
+            if employee_id in previous
+        ]
+
+
+class InMemoryChangeRepository:
+    def __init__(self, session: InMemorySession):
+        self.session = session
+        self.database = session.database
+
+    async def append(self, changes: list[Change]):
+        self.session.add_all(changes)
+        await self.session.flush()
+
+    async def get_last_id(self):
+        await self.session.flush()
+
+        change_ids = self.database.change_ids
+        return change_ids[-1] if change_ids else 0
+
+    async def get_since(self, cursor: int, *, limit: int):
+        await self.session.flush()
+
+        return [
+            self.session.get(Change, row)
+            for row in self.database.get_changes_since(cursor, limit)
+        ]
@@ -0,0 +1,22 @@
+from functools import partial
+
+from src.memory.database import InMemorySession, memory_database
+from src.memory.repository import (
+    InMemoryChangeRepository,
+    InMemoryDepartmentRepository,
+    InMemoryEmployeeRepository,
+)
+from src.unit_of_work import UnitOfWork
+
+
+class InMemoryUnitOfWork(UnitOfWork):
+    async def __aenter__(self):
+        self.session = self.session_pool()
+        self.departments = InMemoryDepartmentRepository(self.session)
+        self.employees = InMemoryEmployeeRepository(self.session)
+        self.changes = InMemoryChangeRepository(self.session)
+        self._changes = []
+        return self
+
+
+InMemorySessionLocal = partial(InMemorySession, memory_database)
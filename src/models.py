@@ -1,3 +1,4 @@
 from src.db import Base  # type: ignore[no-unused-import] # NOQA: F401
+from src.changelog.models import Change  # type: ignore[no-unused-import] # NOQA: F401
 from src.department.models import Department  # type: ignore[no-unused-import] # NOQA: F401
 from src.employee.models import Employee  # type: ignore[no-unused-import] # NOQA: F401
@@ -0,0 +1,247 @@
+import inspect
+import random
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from itertools import count
+from time import perf_counter
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.settings import settings
+
+# Everything here is wired in at import time and only when PROFILING_ENABLED is
+# set, otherwise routes, services and repositories run their plain code
+
+PHASES = ["db", "orm", "service", "validation", "encoding", "other"]
+
+
+class RequestProfile:
+    def __init__(self, id: int, method: str, path: str):
+        self.id = id
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self.duration: float | None = None
+        self.status_code: int | None = None
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.calls: dict[str, tuple[int, float]] = {}
+
+        self._started_at = perf_counter()
+        self._encoding_started_at: float | None = None
+        # Time spent in nested spans for every open span, so each span only
+        # counts its own time towards its phase
+        self._nested = [0.0]
+
+    @property
+    def finished(self):
+        return self.duration is not None
+
+    def enter(self):
+        if not self.finished:
+            self._nested.append(0.0)
+
+    def exit(self, name: str, phase: str, duration: float):
+        if self.finished:
+            return
+
+        nested = self._nested.pop()
+        self.phases[phase] += duration - nested
+        self._nested[-1] += duration
+
+        calls, total = self.calls.get(name, (0, 0.0))
+        self.calls[name] = (calls + 1, total + duration)
+
+    def add(self, phase: str, duration: float):
+        if self.finished:
+            return
+
+        self.phases[phase] += duration
+        self._nested[-1] += duration
+
+    def start_encoding(self):
+        self._encoding_started_at = perf_counter()
+
+    def finish(self, status_code: int | None):
+        # Dumping the response model and rendering the JSON body both happen
+        # between the start of encoding and the end of the request handler
+        if self._encoding_started_at is not None:
+            self.add("encoding", perf_counter() - self._encoding_started_at)
+
+        duration = perf_counter() - self._started_at
+        self.phases["other"] = max(0.0, duration - self._nested[0])
+        self.status_code = status_code
+        self.duration = duration
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "phases": self.phases,
+            "calls": [
+                {"name": name, "calls": calls, "duration": duration}
+                for name, (calls, duration) in sorted(
+                    self.calls.items(), key=lambda item: -item[1][1]
+                )
+            ],
+        }
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+class ProfileBuffer:
+    def __init__(self, size: int):
+        self._profiles: deque[RequestProfile] = deque(maxlen=size)
+        self._ids = count(1)
+
+    def start(self, request: Request):
+        # An admin can force a profile with the X-Profile header, the rest of
+        # the traffic is sampled
+        forced = (
+            settings.admin_token is not None
+            and request.headers.get("x-profile") == settings.admin_token
+        )
+        if not forced and random.random() >= settings.profiling_sample_rate:
+            return None
+
+        return RequestProfile(next(self._ids), request.method, request.url.path)
+
+    def add(self, profile: RequestProfile):
+        self._profiles.append(profile)
+
+    def list(self, *, path: str | None = None, limit: int | None = None):
+        profiles = [
+            profile
+            for profile in reversed(self._profiles)
+            if path is None or profile.path == path
+        ]
+        return profiles[:limit]
+
+    def clear(self):
+        self._profiles.clear()
+
+
+profiles = ProfileBuffer(settings.profiling_buffer_size)
+
+
+def _profiled(fn, name: str, phase: str):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return await fn(*args, **kwargs)
+
+        profile.enter()
+        started_at = perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            profile.exit(name, phase, perf_counter() - started_at)
+
+    return wrapper
+
+
+def profile_methods(phase: str):
+    # Async generators are left alone, their time is spent in the caller
+    def decorator(cls):
+        if not settings.profiling_enabled:
+            return cls
+
+        for name, attribute in list(vars(cls).items()):
+            if inspect.iscoroutinefunction(attribute) and not name.startswith("__"):
+                setattr(
+                    cls, name, _profiled(attribute, f"{cls.__name__}.{name}", phase)
+                )
+        return cls
+
+    return decorator
+
+
+def profile_engine(engine: AsyncEngine):
+    # With asyncpg the cursor execution covers the round trip and fetching the
+    # rows, turning them into objects is left to the repository span
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if current_profile.get() is not None:
+            context._profile_started_at = perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        profile = current_profile.get()
+        started_at = getattr(context, "_profile_started_at", None)
+        if profile is not None and started_at is not None:
+            profile.add("db", perf_counter() - started_at)
+
+
+class _ProfiledResponseField:
+    # Times the response model validation and dumping FastAPI does after the
+    # endpoint returns, the rest of the field is used as is
+    def __init__(self, field):
+        self._field = field
+
+    def __getattr__(self, name: str):
+        return getattr(self._field, name)
+
+    def validate(self, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return self._field.validate(*args, **kwargs)
+
+        started_at = perf_counter()
+        try:
+            return self._field.validate(*args, **kwargs)
+        finally:
+            profile.add("validation", perf_counter() - started_at)
+
+    def serialize(self, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.start_encoding()
+
+        return self._field.serialize(*args, **kwargs)
+
+
+class ProfiledRoute(APIRoute):
+    def get_route_handler(self):
+        if not settings.profiling_enabled:
+            return super().get_route_handler()
+
+        # Only the request handler gets the timed field, OpenAPI keeps the
+        # original one
+        response_field = self.response_field
+        if response_field is not None:
+            self.response_field = _ProfiledResponseField(response_field)
+        try:
+            handler = super().get_route_handler()
+        finally:
+            self.response_field = response_field
+
+        async def profiled_handler(request: Request):
+            profile = profiles.start(request)
+            if profile is None:
+                return await handler(request)
+
+            token = current_profile.set(profile)
+            response = None
+            try:
+                response = await handler(request)
+            finally:
+                current_profile.reset(token)
+                profile.finish(response.status_code if response else None)
+                profiles.add(profile)
+
+            response.headers["X-Profile-Id"] = str(profile.id)
+            return response
+
+        return profiled_handler
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from functools import cache
+
+from pydantic import BaseModel, ConfigDict, create_model
 
 
 class HTTPErrorSchema(BaseModel):
@@ -6,3 +8,18 @@ class HTTPErrorSchema(BaseModel):
 
     class Config:
         json_schema_extra = {"example": {"detail": "Error message"}}
+
+
+@cache
+def select_fields(schema: type[BaseModel], fields: frozenset[str]):
+    # A copy of the schema with only the requested fields, built once for each
+    # combination so the serializer is compiled once too
+    return create_model(
+        schema.__name__,
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (field.annotation, field)
+            for name, field in schema.model_fields.items()
+            if name in fields
+        },
+    )
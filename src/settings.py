@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,92 @@ class Settings(BaseSettings):
     db_user: str = Field(..., alias="POSTGRES_USER")
     db_password: str = Field(..., alias="POSTGRES_PASSWORD")
 
+    repository_backend: Literal["postgres", "memory"] = Field(
+        default="postgres", alias="REPOSITORY_BACKEND"
+    )
+
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+
+    warmup_connections: int = Field(default=5, alias="WARMUP_CONNECTIONS")
+    warmup_retry_interval: float = Field(default=5, alias="WARMUP_RETRY_INTERVAL")
+
+    admin_token: str | None = Field(default=None, alias="ADMIN_TOKEN")
+
+    admission_limit: int = Field(default=50, alias="ADMISSION_LIMIT")
+    admission_queue_size: int = Field(default=100, alias="ADMISSION_QUEUE_SIZE")
+    admission_heavy_limit: int = Field(default=5, alias="ADMISSION_HEAVY_LIMIT")
+    admission_heavy_queue_size: int = Field(
+        default=10, alias="ADMISSION_HEAVY_QUEUE_SIZE"
+    )
+    admission_queue_timeout: float = Field(default=2, alias="ADMISSION_QUEUE_TIMEOUT")
+    admission_retry_after: int = Field(default=1, alias="ADMISSION_RETRY_AFTER")
+
+    compression_encodings: list[str] = Field(
+        default=["zstd", "br", "gzip"], alias="COMPRESSION_ENCODINGS"
+    )
+    compression_minimum_size: int = Field(
+        default=1024, alias="COMPRESSION_MINIMUM_SIZE"
+    )
+    compression_offload_size: int = Field(
+        default=1024 * 1024, alias="COMPRESSION_OFFLOAD_SIZE"
+    )
+    compression_gzip_level: int = Field(default=6, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(
+        default=4, alias="COMPRESSION_BROTLI_QUALITY"
+    )
+    compression_zstd_level: int = Field(default=3, alias="COMPRESSION_ZSTD_LEVEL")
+
+    profiling_enabled: bool = Field(default=False, alias="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(default=0, alias="PROFILING_SAMPLE_RATE")
+    profiling_buffer_size: int = Field(default=100, alias="PROFILING_BUFFER_SIZE")
+
+    slow_query_threshold: float | None = Field(
+        default=0.5, alias="SLOW_QUERY_THRESHOLD"
+    )
+    slow_query_log_size: int = Field(default=100, alias="SLOW_QUERY_LOG_SIZE")
+    slow_query_parameter_length: int = Field(
+        default=200, alias="SLOW_QUERY_PARAMETER_LENGTH"
+    )
+    slow_query_explain: bool = Field(default=False, alias="SLOW_QUERY_EXPLAIN")
+    slow_query_explain_interval: float = Field(
+        default=300, alias="SLOW_QUERY_EXPLAIN_INTERVAL"
+    )
+    slow_query_explain_timeout: float = Field(
+        default=5, alias="SLOW_QUERY_EXPLAIN_TIMEOUT"
+    )
+
+    batch_max_ids: int = Field(default=100, alias="BATCH_MAX_IDS")
+    employee_transfer_max_size: int = Field(
+        default=10_000, alias="EMPLOYEE_TRANSFER_MAX_SIZE"
+    )
+
+    structure_locks: bool = Field(default=True, alias="STRUCTURE_LOCKS")
+    structure_lock_attempts: int = Field(default=3, alias="STRUCTURE_LOCK_ATTEMPTS")
+
+    changes_page_max_size: int = Field(default=1000, alias="CHANGES_PAGE_MAX_SIZE")
+
+    sse_max_subscribers: int = Field(default=10_000, alias="SSE_MAX_SUBSCRIBERS")
+    sse_queue_size: int = Field(default=100, alias="SSE_QUEUE_SIZE")
+    sse_keepalive_interval: float = Field(default=15, alias="SSE_KEEPALIVE_INTERVAL")
+    sse_poll_interval: float = Field(default=5, alias="SSE_POLL_INTERVAL")
+
+    department_tree_reads: bool = Field(default=False, alias="DEPARTMENT_TREE_READS")
+
+    coalesce_reads: bool = Field(default=True, alias="COALESCE_READS")
+
+    subtree_stream_node_limit: int = Field(
+        default=100_000, alias="SUBTREE_STREAM_NODE_LIMIT"
+    )
+    subtree_stream_chunk_size: int = Field(
+        default=1000, alias="SUBTREE_STREAM_CHUNK_SIZE"
+    )
+
+    ancestor_cache_size: int = Field(default=100_000, alias="ANCESTOR_CACHE_SIZE")
+    ancestor_cache_ttl: float = Field(default=60, alias="ANCESTOR_CACHE_TTL")
+    analytics_cache_size: int = Field(default=1000, alias="ANALYTICS_CACHE_SIZE")
+    analytics_cache_ttl: float = Field(default=60, alias="ANALYTICS_CACHE_TTL")
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.abspath(os.path.dirname(__file__)), "..", ".env"),
         extra="ignore",
@@ -0,0 +1,197 @@
+import asyncio
+import re
+from collections import OrderedDict
+from contextvars import Context
+from datetime import datetime, timezone
+from hashlib import sha1
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.settings import settings
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+# Expanding IN parameters render one placeholder per value
+_PLACEHOLDER_LIST = re.compile(
+    r"\(\s*\$\d+(?:::[\w\[\]]+)?(?:\s*,\s*\$\d+(?:::[\w\[\]]+)?)*\s*\)"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+# EXPLAIN ANALYZE runs the statement, so only reads are explained
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(
+    r"\b(INSERT|UPDATE|DELETE)\b|\bFOR (NO KEY )?UPDATE\b|\bFOR (KEY )?SHARE\b",
+    re.IGNORECASE,
+)
+# Functions that lock, notify or move sequences even inside a SELECT
+_SIDE_EFFECTS = re.compile(
+    r"\b(pg_(try_)?advisory\w*|pg_notify|setval|nextval|pg_sleep\w*|set_config)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def fingerprint(statement: str):
+    normalized = _STRING.sub("?", statement)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+
+    return sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+def _format_parameters(parameters):
+    if parameters is None:
+        return []
+
+    if isinstance(parameters, dict):
+        parameters = parameters.values()
+
+    return [
+        repr(parameter)[: settings.slow_query_parameter_length]
+        for parameter in parameters
+    ]
+
+
+class SlowQuery:
+    def __init__(self, fingerprint: str, statement: str):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.calls = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_duration = 0.0
+        self.last_parameters: list[str] = []
+        self.last_seen_at: datetime | None = None
+        self.plan: str | None = None
+        self.plan_parameters: list[str] | None = None
+        self.plan_captured_at: datetime | None = None
+        self.plan_error: str | None = None
+        self.explained_at: float | None = None
+
+    def stats(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_duration": self.total_duration,
+            "max_duration": self.max_duration,
+            "last_duration": self.last_duration,
+            "last_parameters": self.last_parameters,
+            "last_seen_at": self.last_seen_at,
+            "plan": self.plan,
+            "plan_parameters": self.plan_parameters,
+            "plan_captured_at": self.plan_captured_at,
+            "plan_error": self.plan_error,
+        }
+
+
+class SlowQueryLog:
+    def __init__(self, size: int):
+        self.size = size
+
+        self._queries: OrderedDict[str, SlowQuery] = OrderedDict()
+        self._engine: AsyncEngine | None = None
+        self._explain_task: asyncio.Task | None = None
+
+    def instrument(self, engine: AsyncEngine):
+        self._engine = engine
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            context._slow_query_started_at = perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+            duration = perf_counter() - context._slow_query_started_at
+            if duration >= settings.slow_query_threshold:
+                self.record(statement, None if many else parameters, duration)
+
+    def record(self, statement: str, parameters, duration: float):
+        if statement.startswith("EXPLAIN"):
+            return
+
+        key, normalized = fingerprint(statement)
+
+        query = self._queries.get(key)
+        if query is None:
+            query = self._queries[key] = SlowQuery(key, normalized)
+            if len(self._queries) > self.size:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(key)
+
+        query.calls += 1
+        query.total_duration += duration
+        query.max_duration = max(query.max_duration, duration)
+        query.last_duration = duration
+        query.last_parameters = _format_parameters(parameters)
+        query.last_seen_at = datetime.now(timezone.utc)
+
+        if self._should_explain(query, statement, parameters):
+            query.explained_at = perf_counter()
+            # A fresh context keeps the plan out of the profile of the request
+            # that happened to run the statement
+            self._explain_task = asyncio.get_running_loop().create_task(
+                self._explain(query, statement, parameters), context=Context()
+            )
+
+    def list(self):
+        return sorted(
+            self._queries.values(), key=lambda query: query.total_duration, reverse=True
+        )
+
+    def clear(self):
+        self._queries.clear()
+
+    def _should_explain(self, query: SlowQuery, statement: str, parameters):
+        if not settings.slow_query_explain or self._engine is None:
+            return False
+
+        # One plan at a time on one extra connection, so a burst of slow
+        # queries cannot take over the pool
+        if self._explain_task is not None and not self._explain_task.done():
+            return False
+
+        if (
+            query.explained_at is not None
+            and perf_counter() - query.explained_at
+            < settings.slow_query_explain_interval
+        ):
+            return False
+
+        return (
+            parameters is not None
+            and _EXPLAINABLE.match(statement) is not None
+            and _WRITES.search(statement) is None
+            and _SIDE_EFFECTS.search(statement) is None
+        )
+
+    async def _explain(self, query: SlowQuery, statement: str, parameters):
+        if isinstance(parameters, dict):
+            parameters = list(parameters.values())
+
+        try:
+            async with self._engine.connect() as connection:
+                # Rolled back when the connection is returned to the pool
+                await connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                await connection.exec_driver_sql(
+                    "SET LOCAL statement_timeout = "
+                    f"{int(settings.slow_query_explain_timeout * 1000)}"
+                )
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", tuple(parameters)
+                )
+                plan = "\n".join(row[0] for row in result)
+        except Exception as e:
+            query.plan_error = f"{type(e).__name__}: {e}"
+            return
+
+        query.plan = plan
+        query.plan_parameters = _format_parameters(parameters)
+        query.plan_captured_at = datetime.now(timezone.utc)
+        query.plan_error = None
+
+
+slow_query_log = SlowQueryLog(settings.slow_query_log_size)
@@ -1,14 +1,20 @@
+from contextlib import asynccontextmanager
 from typing import Type
 from types import TracebackType
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.changelog.models import Change
+from src.changelog.repository import ChangeRepository
 from src.department.exceptions import DuplicateDepartmentNameError
 from src.department.repository import DepartmentRepository
 from src.employee.repository import EmployeeRepository
-from src.exceptions import DatabaseError
+from src.exceptions import DatabaseError, NotFoundError
+from src.profiling import profile_methods
 
 
+@profile_methods("orm")
 class UnitOfWork:
     def __init__(self, session_pool: callable[[], AsyncSession]):
         self.session_pool = session_pool
@@ -17,6 +23,8 @@ class UnitOfWork:
         self.session = self.session_pool()
         self.departments = DepartmentRepository(self.session)
         self.employees = EmployeeRepository(self.session)
+        self.changes = ChangeRepository(self.session)
+        self._changes: list[Change] = []
         return self
 
     async def __aexit__(
@@ -29,17 +37,47 @@ class UnitOfWork:
             await self.rollback()
         await self.close()
 
+    def fork(self):
+        return type(self)(self.session_pool)
+
+    def record(
+        self,
+        entity_type: EntityTypeEnum,
+        action: ChangeActionEnum,
+        entity_id: int,
+        data: dict,
+    ):
+        self._changes.append(
+            Change(
+                entity_type=entity_type, entity_id=entity_id, action=action, data=data
+            )
+        )
+
     async def commit(self):
         try:
-            await self.session.commit()
+            async with self.handle_integrity_errors():
+                if self._changes:
+                    await self.changes.append(self._changes)
+                await self.session.commit()
+        finally:
+            self._changes = []
+
+    @asynccontextmanager
+    async def handle_integrity_errors(self):
+        # Flushes and statements writing rows directly hit the constraints
+        # before commit
+        try:
+            yield
         except IntegrityError as e:
             await self.rollback()
             self._handle_integrity_error(e)
 
     async def flush(self):
-        await self.session.flush()
+        async with self.handle_integrity_errors():
+            await self.session.flush()
 
     async def rollback(self):
+        self._changes = []
         await self.session.rollback()
 
     async def close(self):
@@ -51,4 +89,11 @@ class UnitOfWork:
                 "Department with the same name already exists under the parent department"
             )
 
+        # The referenced department was deleted after the service checked it
+        if "departments_parent_id_fkey" in str(e.orig):
+            raise NotFoundError("Parent department not found")
+
+        if "employees_department_id_fkey" in str(e.orig):
+            raise NotFoundError("Department not found")
+
         raise DatabaseError(f"Integrity violation: {e}")
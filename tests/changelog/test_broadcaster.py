@@ -0,0 +1,140 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.changelog.broadcaster import ChangeBroadcaster
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.changelog.models import Change
+from src.department.models import Department
+from src.exceptions import ServiceOverloadedError
+from src.settings import settings
+
+
+@pytest.fixture
+def broadcaster():
+    broadcaster = ChangeBroadcaster(Mock(), 2, 2)
+    broadcaster.start = AsyncMock()
+
+    return broadcaster
+
+
+@pytest.fixture
+def department_service():
+    # 1 is the root, 2 and 3 are its children, 4 is under 2
+    paths = {
+        1: [],
+        2: [Department(id=1)],
+        3: [Department(id=1)],
+        4: [Department(id=1), Department(id=2)],
+    }
+
+    async def get_departments_ancestors(ids: list[int]):
+        return [(id, paths[id]) for id in ids if id in paths], [
+            id for id in ids if id not in paths
+        ]
+
+    service_mock = Mock()
+    service_mock.get_departments_ancestors = AsyncMock(
+        side_effect=get_departments_ancestors
+    )
+
+    return service_mock
+
+
+def department_change(id: int, action: ChangeActionEnum, **data):
+    return Change(
+        id=id,
+        entity_type=EntityTypeEnum.DEPARTMENT,
+        entity_id=id,
+        action=action,
+        data=data,
+    )
+
+
+@pytest.mark.asyncio
+async def test_deliver_to_subtree(broadcaster, department_service):
+    async with (
+        broadcaster.subscribe(2) as subtree,
+        broadcaster.subscribe(3) as sibling,
+    ):
+        change = Change(
+            id=10,
+            entity_type=EntityTypeEnum.EMPLOYEE,
+            entity_id=7,
+            action=ChangeActionEnum.CREATED,
+            data={"department_id": 4},
+        )
+        await broadcaster._deliver(department_service, [change])
+
+        assert subtree.queue.get_nowait() is change
+        assert sibling.queue.empty()
+
+    assert broadcaster.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_deliver_move_to_old_and_new_parent(broadcaster, department_service):
+    async with (
+        broadcaster.subscribe(2) as old_parent,
+        broadcaster.subscribe(3) as new_parent,
+    ):
+        change = department_change(
+            4, ChangeActionEnum.MOVED, name="Child", parent_id=3, previous_parent_id=2
+        )
+        await broadcaster._deliver(department_service, [change])
+
+        assert old_parent.queue.get_nowait() is change
+        assert new_parent.queue.get_nowait() is change
+
+
+@pytest.mark.asyncio
+async def test_deliver_drops_slow_subscriber(broadcaster, department_service):
+    async with broadcaster.subscribe(1) as subscription:
+        changes = [
+            department_change(id, ChangeActionEnum.RENAMED, name="Name", parent_id=1)
+            for id in [2, 3, 2]
+        ]
+        await broadcaster._deliver(department_service, changes)
+
+        assert subscription.queue.get_nowait() is None
+        assert subscription.closed_reason is not None
+        assert broadcaster.subscribers == 0
+        assert broadcaster.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_deliver_closes_deleted_subtree(broadcaster, department_service):
+    async with broadcaster.subscribe(5) as subscription:
+        change = department_change(
+            9, ChangeActionEnum.DELETED, name="Removed", parent_id=1
+        )
+        await broadcaster._deliver(department_service, [change])
+
+        assert subscription.queue.get_nowait() is None
+        assert subscription.closed_reason == "Department was deleted"
+
+
+@pytest.mark.asyncio
+async def test_subscribe_over_capacity(broadcaster):
+    async with broadcaster.subscribe(1), broadcaster.subscribe(1):
+        with pytest.raises(ServiceOverloadedError):
+            async with broadcaster.subscribe(2):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_listen_retries_connection_errors_only(broadcaster, monkeypatch, caplog):
+    engine = Mock()
+    engine.connect = Mock(side_effect=[OSError("refused"), RuntimeError("bug")])
+    monkeypatch.setattr("src.changelog.broadcaster.engine", engine)
+    monkeypatch.setattr(settings, "sse_poll_interval", 0)
+
+    with pytest.raises(RuntimeError):
+        await broadcaster._listen()
+
+    stats = broadcaster.stats()
+    assert stats["errors"] == 2
+    assert stats["last_error"] == "RuntimeError: bug"
+    assert [record.message for record in caplog.records] == [
+        "Change stream failed, reconnecting",
+        "Change stream stopped",
+    ]
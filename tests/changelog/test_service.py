@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from src.changelog.models import Change
+from src.changelog.service import ChangeService
+
+
+@pytest.fixture
+def uow():
+    uow_mock = AsyncMock()
+
+    uow_mock.changes.get_since = AsyncMock()
+
+    return uow_mock
+
+
+@pytest.fixture
+def change_service(uow):
+    return ChangeService(uow)
+
+
+@pytest.mark.asyncio
+async def test_get_changes_has_more(change_service):
+    change_service.uow.changes.get_since = AsyncMock(
+        return_value=[Change(id=11), Change(id=12), Change(id=15)]
+    )
+
+    changes, next_cursor, has_more = await change_service.get_changes(10, 2)
+
+    assert [change.id for change in changes] == [11, 12]
+    assert next_cursor == 12
+    assert has_more
+    assert change_service.uow.changes.get_since.call_args[0][0] == 10
+    assert change_service.uow.changes.get_since.call_args[1]["limit"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_changes_empty_keeps_cursor(change_service):
+    change_service.uow.changes.get_since = AsyncMock(return_value=[])
+
+    changes, next_cursor, has_more = await change_service.get_changes(10, 2)
+
+    assert changes == []
+    assert next_cursor == 10
+    assert not has_more
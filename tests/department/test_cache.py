@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from src.department.cache import AncestorPathCache, DepartmentAnalyticsCache
+
+
+def path(*ids):
+    return [SimpleNamespace(id=id) for id in ids]
+
+
+def test_cache_get_many_ok():
+    cache = AncestorPathCache(10, 60)
+    cache.set_many({3: path(1, 2), 4: path(1)}, cache.generation)
+
+    paths = cache.get_many([3, 4, 5])
+
+    assert set(paths) == {3, 4}
+    assert [ancestor.id for ancestor in paths[3]] == [1, 2]
+
+
+def test_cache_invalidate_dependents():
+    cache = AncestorPathCache(10, 60)
+    cache.set_many({2: path(1), 3: path(1, 2), 5: path(4)}, cache.generation)
+
+    cache.invalidate(2)
+
+    assert set(cache.get_many([2, 3, 5])) == {5}
+
+
+def test_cache_set_many_stale_generation():
+    cache = AncestorPathCache(10, 60)
+    generation = cache.generation
+
+    cache.invalidate(1)
+    cache.set_many({2: path(1)}, generation)
+
+    assert cache.get_many([2]) == {}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AncestorPathCache(2, 60)
+    cache.set_many({1: [], 2: []}, cache.generation)
+    cache.get_many([1])
+
+    cache.set_many({3: []}, cache.generation)
+
+    assert set(cache.get_many([1, 2, 3])) == {1, 3}
+
+
+def test_cache_expired():
+    cache = AncestorPathCache(10, -1)
+    cache.set_many({1: []}, cache.generation)
+
+    assert cache.get_many([1]) == {}
+
+
+def test_analytics_cache_stale_cursor():
+    cache = DepartmentAnalyticsCache(10, 60)
+    cache.set(1, 5, "analytics")
+
+    assert cache.get(1, 5) == "analytics"
+    assert cache.get(1, 6) is None
+
+
+def test_analytics_cache_keeps_newer_entry():
+    cache = DepartmentAnalyticsCache(10, 60)
+    cache.set(1, 6, "newer")
+
+    cache.set(1, 5, "older")
+
+    assert cache.get(1, 6) == "newer"
+
+
+def test_analytics_cache_evicts_least_recently_used():
+    cache = DepartmentAnalyticsCache(2, 60)
+    cache.set(1, 0, "a")
+    cache.set(2, 0, "b")
+    cache.get(1, 0)
+
+    cache.set(3, 0, "c")
+
+    assert [cache.get(id, 0) for id in [1, 2, 3]] == ["a", None, "c"]
+
+
+def test_analytics_cache_expired():
+    cache = DepartmentAnalyticsCache(10, -1)
+    cache.set(1, 5, "analytics")
+
+    assert cache.get(1, 5) is None
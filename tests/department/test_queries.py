@@ -0,0 +1,18 @@
+from src.department.queries import prefix_upper_bound
+
+
+def test_prefix_upper_bound():
+    assert prefix_upper_bound("Sal") == "Sam"
+
+
+def test_prefix_upper_bound_skips_surrogates():
+    upper_bound = prefix_upper_bound("a퟿")
+
+    assert upper_bound == "a"
+    upper_bound.encode()
+
+
+def test_prefix_upper_bound_last_code_point():
+    assert prefix_upper_bound("a\U0010ffff") == "b"
+    assert prefix_upper_bound("a\U0010ffff\U0010ffff") == "b"
+    assert prefix_upper_bound("\U0010ffff") is None
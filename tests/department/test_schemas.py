@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+from src.department.enums import DepartmentFieldEnum
+from src.department.models import Department
+from src.department.schemas import (
+    get_department_batch_schema,
+    get_department_tree_schema,
+)
+from src.employee.enums import EmployeeFieldEnum
+from src.employee.models import Employee
+
+
+def test_department_tree_schema_fields():
+    schema = get_department_tree_schema(
+        frozenset({DepartmentFieldEnum.ID, DepartmentFieldEnum.NAME}),
+        frozenset({EmployeeFieldEnum.FULL_NAME}),
+    )
+
+    # Only the requested attributes are read, as the others are not loaded
+    tree = schema.model_validate(
+        {
+            "department": Department(id=1, name="Root"),
+            "employees": [Employee(full_name="John Doe")],
+            "children": [Department(id=2, name="Child")],
+        },
+        from_attributes=True,
+    )
+
+    assert tree.model_dump() == {
+        "department": {"id": 1, "name": "Root"},
+        "employees": [{"full_name": "John Doe"}],
+        "children": [{"id": 2, "name": "Child"}],
+    }
+
+
+def test_department_tree_schema_default_fields():
+    schema = get_department_tree_schema(None, frozenset({EmployeeFieldEnum.FULL_NAME}))
+    created_at = datetime.now(timezone.utc)
+
+    tree = schema.model_validate(
+        {
+            "department": Department(
+                id=1, name="Root", parent_id=None, created_at=created_at
+            ),
+            "employees": None,
+            "children": [],
+        },
+        from_attributes=True,
+    )
+
+    assert tree.model_dump() == {
+        "department": {
+            "id": 1,
+            "name": "Root",
+            "parent_id": None,
+            "created_at": created_at,
+        },
+        "children": [],
+    }
+
+
+def test_department_batch_schema_fields():
+    schema = get_department_batch_schema(frozenset({DepartmentFieldEnum.NAME}))
+
+    batch = schema.model_validate(
+        {
+            "departments": [
+                {
+                    "department": Department(name="Root"),
+                    "children": [Department(name="Child")],
+                    "employees_count": None,
+                }
+            ],
+            "missing_ids": [3],
+        },
+        from_attributes=True,
+    )
+
+    assert batch.model_dump() == {
+        "departments": [
+            {"department": {"name": "Root"}, "children": [{"name": "Child"}]}
+        ],
+        "missing_ids": [3],
+    }
+    assert schema is get_department_batch_schema(frozenset({DepartmentFieldEnum.NAME}))
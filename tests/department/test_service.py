@@ -1,10 +1,30 @@
+import asyncio
 import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, Mock
 
-from src.department.exceptions import DuplicateDepartmentNameError
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.department.cache import ancestor_path_cache
+from src.department.enums import DepartmentFieldEnum, SearchModeEnum
+from src.department.exceptions import (
+    ConcurrentStructureChangeError,
+    DepartmentCycleError,
+    DuplicateDepartmentNameError,
+    SubtreeLimitExceededError,
+)
 from src.department.models import Department
 from src.department.service import DepartmentService
+from src.department.tree import DepartmentTree
+from src.employee.enums import EmployeeFieldEnum
 from src.exceptions import NotFoundError
+from src.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def clear_ancestor_path_cache():
+    ancestor_path_cache.clear()
 
 
 @pytest.fixture
@@ -12,6 +32,10 @@ def department_repository():
     department_repository_mock = AsyncMock()
 
     department_repository_mock.get_by_id = AsyncMock()
+    department_repository_mock.get_many = AsyncMock()
+    department_repository_mock.search = AsyncMock()
+    department_repository_mock.get_ancestors_many = AsyncMock(return_value={})
+    department_repository_mock.lock = AsyncMock()
     department_repository_mock.add = Mock()
     department_repository_mock.get_children = AsyncMock()
     department_repository_mock.check_is_child = AsyncMock()
@@ -26,7 +50,7 @@ def employee_repository():
     employee_repository_mock = AsyncMock()
 
     employee_repository_mock.add = Mock()
-    employee_repository_mock.reassign_department = AsyncMock()
+    employee_repository_mock.reassign_department = AsyncMock(return_value=[])
 
     return employee_repository_mock
 
@@ -39,12 +63,30 @@ def uow(department_repository, employee_repository):
     uow_mock.employees = employee_repository
     uow_mock.commit = AsyncMock()
     uow_mock.flush = AsyncMock()
+    uow_mock.record = Mock()
     uow_mock.rollback = AsyncMock()
     uow_mock.close = AsyncMock()
+    uow_mock.fork = Mock(return_value=uow_mock)
+    uow_mock.__aenter__.return_value = uow_mock
 
     return uow_mock
 
 
+@pytest_asyncio.fixture
+async def department_tree(monkeypatch):
+    async def rows():
+        for id, parent_id in [(1, None), (2, 1), (3, 2)]:
+            yield id, f"Department {id}", parent_id, datetime.now(timezone.utc)
+
+    tree = DepartmentTree()
+    await tree.load(rows(), 5)
+
+    monkeypatch.setattr(settings, "department_tree_reads", True)
+    monkeypatch.setattr("src.department.service.department_tree", tree)
+
+    return tree
+
+
 @pytest.fixture
 def department_service(uow):
     return DepartmentService(uow)
@@ -169,6 +211,51 @@ async def test_get_department_no_employees_ok(department_service):
     assert department_service.uow.departments.get_children.call_args[1]["depth"] == 1
 
 
+@pytest.mark.asyncio
+async def test_get_department_coalesced(department_service):
+    release = asyncio.Event()
+
+    async def get_by_id_mock(id: int, **_):
+        await release.wait()
+        return Department(id=id, name="Test name", employees=[])
+
+    department_service.uow.departments.get_by_id = AsyncMock(side_effect=get_by_id_mock)
+    department_service.uow.departments.get_children = AsyncMock(return_value=[])
+
+    reads = [
+        asyncio.create_task(department_service.get_department(1, 1, True))
+        for _ in range(5)
+    ]
+    other_read = asyncio.create_task(department_service.get_department(1, 2, True))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*reads)
+    await other_read
+
+    assert all(result is results[0] for result in results)
+    assert department_service.uow.departments.get_by_id.call_count == 2
+    assert department_service.uow.fork.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_department_fields_ok(department_service):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name", employees=[])
+    )
+    department_service.uow.departments.get_children = AsyncMock(return_value=[])
+    fields = frozenset({DepartmentFieldEnum.ID, DepartmentFieldEnum.NAME})
+    employee_fields = frozenset({EmployeeFieldEnum.FULL_NAME})
+
+    await department_service.get_department(1, 2, True, fields, employee_fields)
+
+    get_by_id_kwargs = department_service.uow.departments.get_by_id.call_args[1]
+    assert get_by_id_kwargs["fields"] == fields
+    assert get_by_id_kwargs["employee_fields"] == employee_fields
+    assert (
+        department_service.uow.departments.get_children.call_args[1]["fields"] == fields
+    )
+
+
 @pytest.mark.asyncio
 async def test_get_department_not_found(department_service):
     department_service.uow.departments.get_by_id = AsyncMock(return_value=None)
@@ -177,6 +264,179 @@ async def test_get_department_not_found(department_service):
         await department_service.get_department(1, 1, True)
 
 
+def stream_children_mock(depths: list[int]):
+    async def stream_children(id: int, *, limit: int, batch_size: int):
+        for index, depth in enumerate(depths[:limit]):
+            yield SimpleNamespace(id=index + 2, depth=depth)
+
+    return stream_children
+
+
+@pytest.mark.asyncio
+async def test_stream_department_tree_ok(department_service):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name")
+    )
+    department_service.uow.departments.stream_children = stream_children_mock(
+        [1, 1, 1, 2, 3]
+    )
+
+    department, levels = await department_service.stream_department_tree(1, 10, 2)
+    levels = [(level, [row.id for row in rows]) async for level, rows in levels]
+
+    assert department.id == 1
+    assert levels == [(1, [2, 3]), (1, [4]), (2, [5]), (3, [6])]
+
+
+@pytest.mark.asyncio
+async def test_stream_department_tree_limit_exceeded(department_service):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name")
+    )
+    department_service.uow.departments.stream_children = stream_children_mock(
+        [1, 1, 2, 2]
+    )
+
+    _, levels = await department_service.stream_department_tree(1, 3, 10)
+
+    received = []
+    with pytest.raises(SubtreeLimitExceededError):
+        async for level, rows in levels:
+            received.append((level, [row.id for row in rows]))
+
+    assert received == [(1, [2, 3]), (2, [4])]
+
+
+@pytest.mark.asyncio
+async def test_stream_department_tree_not_found(department_service):
+    department_service.uow.departments.get_by_id = AsyncMock(return_value=None)
+
+    with pytest.raises(NotFoundError):
+        await department_service.stream_department_tree(1, 10, 2)
+
+
+@pytest.mark.asyncio
+async def test_get_departments_ok(department_service):
+    department_service.uow.departments.get_many = AsyncMock(
+        return_value=[
+            (Department(id=2, name="Second", children=[]), 3),
+            (Department(id=1, name="First", children=[]), 0),
+        ]
+    )
+
+    departments, missing_ids = await department_service.get_departments(
+        [1, 3, 2, 1], True, True
+    )
+
+    assert [department.id for department, _, _ in departments] == [1, 2]
+    assert [children for _, children, _ in departments] == [[], []]
+    assert [count for _, _, count in departments] == [0, 3]
+    assert missing_ids == [3]
+    assert department_service.uow.departments.get_many.call_count == 1
+    assert department_service.uow.departments.get_many.call_args[0][0] == [1, 3, 2]
+
+
+@pytest.mark.asyncio
+async def test_get_departments_no_children_ok(department_service):
+    department_service.uow.departments.get_many = AsyncMock(
+        return_value=[(Department(id=1, name="First"), None)]
+    )
+
+    departments, missing_ids = await department_service.get_departments(
+        [1], False, False
+    )
+
+    assert departments[0][1] is None
+    assert departments[0][2] is None
+    assert missing_ids == []
+    assert not department_service.uow.departments.get_many.call_args[1][
+        "include_children"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_departments_ok(department_service):
+    department_service.uow.departments.search = AsyncMock(
+        return_value=[
+            Department(id=2, name="Sales", parent_id=1),
+            Department(id=3, name="Sales 2", parent_id=1),
+            Department(id=4, name="Sales 3", parent_id=1),
+        ]
+    )
+    root = Department(id=1, name="Root", parent_id=None)
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        return_value={2: [root], 3: [root]}
+    )
+
+    items, has_more = await department_service.search_departments(
+        "Sal", SearchModeEnum.PREFIX, 2, 0
+    )
+
+    assert [department.id for department, _ in items] == [2, 3]
+    assert [path for _, path in items] == [[root], [root]]
+    assert has_more
+    assert department_service.uow.departments.search.call_args[1]["limit"] == 3
+    assert department_service.uow.departments.get_ancestors_many.call_args[0][0] == [
+        2,
+        3,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_department_ancestors_ok(department_service):
+    root = Department(id=1, name="Root", parent_id=None)
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        return_value={2: [root]}
+    )
+
+    path = await department_service.get_department_ancestors(2)
+    cached_path = await department_service.get_department_ancestors(2)
+
+    assert path == [root]
+    assert cached_path == [root]
+    assert department_service.uow.departments.get_ancestors_many.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_department_ancestors_not_found(department_service):
+    department_service.uow.departments.get_ancestors_many = AsyncMock(return_value={})
+
+    with pytest.raises(NotFoundError):
+        await department_service.get_department_ancestors(2)
+
+
+@pytest.mark.asyncio
+async def test_get_departments_ancestors_ok(department_service):
+    root = Department(id=1, name="Root", parent_id=None)
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        return_value={1: [], 2: [root]}
+    )
+
+    departments, missing_ids = await department_service.get_departments_ancestors(
+        [2, 3, 1]
+    )
+
+    assert departments == [(2, [root]), (1, [])]
+    assert missing_ids == [3]
+
+
+@pytest.mark.asyncio
+async def test_move_department_invalidates_ancestors(department_service):
+    root = Department(id=1, name="Root", parent_id=None)
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        return_value={3: [root, Department(id=2, name="Child", parent_id=1)]}
+    )
+    await department_service.get_department_ancestors(3)
+
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=2, name="Child", parent_id=1, children=[])
+    )
+    await department_service.move_department(2, {"name": "New name"})
+    await department_service.get_department_ancestors(3)
+
+    assert department_service.uow.departments.get_ancestors_many.call_count == 2
+
+
 @pytest.mark.asyncio
 async def test_move_department_ok(department_service):
     department_service.uow.departments.get_by_id = AsyncMock(
@@ -191,6 +451,77 @@ async def test_move_department_ok(department_service):
     assert department_service.uow.departments.get_by_id.call_args[0][0] == 1
 
 
+@pytest.mark.asyncio
+async def test_move_department_records_changes(department_service):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name", parent_id=2, children=[])
+    )
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=False)
+
+    await department_service.move_department(1, {"name": "Test name", "parent_id": 3})
+
+    assert department_service.uow.record.call_count == 1
+    assert department_service.uow.record.call_args[0] == (
+        EntityTypeEnum.DEPARTMENT,
+        ChangeActionEnum.MOVED,
+        1,
+        {"name": "Test name", "parent_id": 3, "previous_parent_id": 2},
+    )
+
+
+@pytest.mark.asyncio
+async def test_move_department_parent_locks_structure(department_service):
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        return_value={5: [Department(id=2), Department(id=4)]}
+    )
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name", parent_id=None, children=[])
+    )
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=False)
+
+    department = await department_service.move_department(1, {"parent_id": 5})
+
+    assert department.parent_id == 5
+    assert department_service.uow.departments.lock.call_count == 1
+    assert department_service.uow.departments.lock.call_args[0] == ([1], [5, 2, 4])
+    assert department_service.uow.rollback.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_move_department_parent_chain_changed(department_service):
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        side_effect=[
+            {5: [Department(id=2)]},
+            {5: [Department(id=3)]},
+            {5: [Department(id=3)]},
+            {5: [Department(id=3)]},
+        ]
+    )
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Test name", parent_id=None, children=[])
+    )
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=False)
+
+    await department_service.move_department(1, {"parent_id": 5})
+
+    assert department_service.uow.departments.lock.call_count == 2
+    assert department_service.uow.departments.lock.call_args[0] == ([1], [5, 3])
+    assert department_service.uow.rollback.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_move_department_parent_chain_keeps_changing(department_service):
+    chains = iter(range(100, 200))
+    department_service.uow.departments.get_ancestors_many = AsyncMock(
+        side_effect=lambda _: {5: [Department(id=next(chains))]}
+    )
+
+    with pytest.raises(ConcurrentStructureChangeError):
+        await department_service.move_department(1, {"parent_id": 5})
+
+    assert department_service.uow.departments.get_by_id.call_count == 0
+
+
 @pytest.mark.asyncio
 async def test_delete_department_ok(department_service):
     department_service.uow.departments.get_by_id = AsyncMock(
@@ -219,3 +550,107 @@ async def test_delete_department_reassign_ok(department_service):
     assert department_service.uow.departments.check_is_child.call_count == 1
     assert department_service.uow.departments.check_is_child.call_args[0][0] == 1
     assert department_service.uow.departments.check_is_child.call_args[0][1] == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_department_reassign_records_changes(department_service):
+    async def get_by_id_mock(id: int, **_):
+        if id == 1:
+            return Department(
+                id=1,
+                name="Test name",
+                parent_id=None,
+                children=[Department(id=3, name="Child", parent_id=1)],
+            )
+        elif id == 2:
+            return Department(id=2, name="Test name", parent_id=None, children=[])
+
+    department_service.uow.departments.get_by_id = get_by_id_mock
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=False)
+    department_service.uow.employees.reassign_department = AsyncMock(return_value=[7])
+
+    await department_service.delete_department(1, 2)
+
+    assert [call[0][:3] for call in department_service.uow.record.call_args_list] == [
+        (EntityTypeEnum.DEPARTMENT, ChangeActionEnum.MOVED, 3),
+        (EntityTypeEnum.EMPLOYEE, ChangeActionEnum.MOVED, 7),
+        (EntityTypeEnum.DEPARTMENT, ChangeActionEnum.DELETED, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_move_department_cycle_checked_in_tree(
+    department_service, department_tree
+):
+    department_service.uow.changes.get_last_id = AsyncMock(return_value=5)
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Department 1", parent_id=None, children=[])
+    )
+
+    with pytest.raises(DepartmentCycleError):
+        await department_service.move_department(1, {"parent_id": 3})
+
+    assert department_service.uow.departments.check_is_child.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_move_department_stale_tree_checks_database(
+    department_service, department_tree
+):
+    department_service.uow.changes.get_last_id = AsyncMock(return_value=6)
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=3, name="Department 3", parent_id=2, children=[])
+    )
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=False)
+
+    await department_service.move_department(3, {"parent_id": 1})
+
+    assert department_service.uow.departments.check_is_child.call_count == 1
+    assert [
+        department.id for department in department_tree.get_children(1, depth=1)
+    ] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_move_department_unknown_to_tree_checks_database(
+    department_service, department_tree
+):
+    # 9 was loaded without a change log entry, the tree is current all the same
+    department_service.uow.changes.get_last_id = AsyncMock(return_value=5)
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=9, name="Department 9", parent_id=None, children=[])
+    )
+    department_service.uow.departments.check_is_child = AsyncMock(return_value=True)
+
+    with pytest.raises(DepartmentCycleError):
+        await department_service.move_department(9, {"parent_id": 3})
+
+    assert department_service.uow.departments.check_is_child.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_department_unknown_to_tree_reads_database(
+    department_service, department_tree
+):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=9, name="Department 9", parent_id=None, employees=[])
+    )
+    department_service.uow.departments.get_children = AsyncMock(
+        return_value=[Department(id=10, name="Department 10", parent_id=9)]
+    )
+
+    _, _, children = await department_service.get_department(9, 1, False)
+
+    assert [department.id for department in children] == [10]
+
+
+@pytest.mark.asyncio
+async def test_get_department_children_from_tree(department_service, department_tree):
+    department_service.uow.departments.get_by_id = AsyncMock(
+        return_value=Department(id=1, name="Department 1", parent_id=None, employees=[])
+    )
+
+    _, _, children = await department_service.get_department(1, 2, False)
+
+    assert [department.id for department in children] == [2, 3]
+    assert department_service.uow.departments.get_children.call_count == 0
@@ -0,0 +1,372 @@
+from datetime import datetime, timezone
+from functools import partial
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+
+from src.changelog.enums import ChangeActionEnum
+from src.changelog.service import ChangeService
+from src.department.cache import ancestor_path_cache, department_analytics_cache
+from src.department.enums import SearchModeEnum
+from src.department.exceptions import DepartmentCycleError, DuplicateDepartmentNameError
+from src.department.models import Department
+from src.department.service import DepartmentService
+from src.employee.models import Employee
+from src.memory.database import InMemoryDatabase, InMemorySession
+from src.memory.unit_of_work import InMemoryUnitOfWork
+from src.exceptions import NotFoundError
+
+# The service against the in-memory backend, which keeps the constraints,
+# cascades and orderings of the Postgres schema
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    ancestor_path_cache.clear()
+    department_analytics_cache.clear()
+
+
+@pytest.fixture
+def database():
+    return InMemoryDatabase()
+
+
+@pytest_asyncio.fixture
+async def uow(database):
+    async with InMemoryUnitOfWork(partial(InMemorySession, database)) as uow:
+        yield uow
+
+
+@pytest.fixture
+def department_service(uow):
+    return DepartmentService(uow)
+
+
+async def create_tree(department_service: DepartmentService):
+    # root(1) -> a(2) -> c(4)
+    #         -> b(3)
+    root = await department_service.create_department("Root", None)
+    a = await department_service.create_department("A", root.id)
+    b = await department_service.create_department("B", root.id)
+    c = await department_service.create_department("C", a.id)
+    return root, a, b, c
+
+
+@pytest.mark.asyncio
+async def test_create_department_unique_name(department_service):
+    root, _, _, _ = await create_tree(department_service)
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await department_service.create_department("A", root.id)
+
+    # NULLs are distinct in the unique constraint
+    other_root = await department_service.create_department("Root", None)
+    assert other_root.id == 5
+
+
+@pytest.mark.asyncio
+async def test_create_department_parent_not_found(department_service):
+    with pytest.raises(NotFoundError):
+        await department_service.create_department("A", 1)
+
+
+@pytest.mark.asyncio
+async def test_commit_duplicate_name_rolls_back(uow, database):
+    root = Department(name="Root", parent_id=None)
+    uow.departments.add(root)
+    await uow.commit()
+
+    # Past the service check, the constraint still holds
+    uow.departments.add(Department(name="A", parent_id=root.id))
+    uow.departments.add(Department(name="A", parent_id=root.id))
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await uow.commit()
+
+    assert list(database.rows[Department]) == [root.id]
+    assert database.children[root.id] == {}
+
+
+@pytest.mark.asyncio
+async def test_create_department_flush_duplicate_name(
+    department_service, database, monkeypatch
+):
+    root, _, _, _ = await create_tree(department_service)
+
+    # A concurrent create passed the same check, the flush hits the constraint
+    monkeypatch.setattr(department_service, "_check_department_name", AsyncMock())
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await department_service.create_department("A", root.id)
+
+    assert len(database.rows[Department]) == 4
+
+
+@pytest.mark.asyncio
+async def test_create_employee_flush_department_deleted(uow, database):
+    # The department was deleted after the service checked it
+    uow.employees.add(
+        Employee(department_id=1, full_name="John Doe", position="Engineer")
+    )
+
+    with pytest.raises(NotFoundError):
+        await uow.flush()
+
+    assert database.rows[Employee] == {}
+
+
+@pytest.mark.asyncio
+async def test_get_department(department_service):
+    root, a, b, c = await create_tree(department_service)
+    for full_name in ["Zoe", "Adam"]:
+        await department_service.create_employee(root.id, full_name, "Engineer", None)
+
+    department, employees, children = await department_service.get_department(
+        root.id, 1, True
+    )
+
+    assert department.name == "Root"
+    assert [employee.full_name for employee in employees] == ["Adam", "Zoe"]
+    assert [child.id for child in children] == [a.id, b.id]
+
+    _, _, children = await department_service.get_department(root.id, 5, False)
+
+    assert [child.id for child in children] == [a.id, b.id, c.id]
+
+
+@pytest.mark.asyncio
+async def test_move_department(department_service):
+    root, a, b, c = await create_tree(department_service)
+
+    with pytest.raises(DepartmentCycleError):
+        await department_service.move_department(a.id, {"parent_id": c.id})
+
+    await department_service.move_department(a.id, {"parent_id": b.id, "name": "D"})
+
+    path = await department_service.get_department_ancestors(c.id)
+    assert [(item.id, item.name) for item in path] == [
+        (root.id, "Root"),
+        (b.id, "B"),
+        (a.id, "D"),
+    ]
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await department_service.move_department(
+            c.id, {"name": "B", "parent_id": root.id}
+        )
+
+
+@pytest.mark.asyncio
+async def test_delete_department_cascade(department_service, database):
+    root, a, b, c = await create_tree(department_service)
+    await department_service.create_employee(c.id, "John Doe", "Engineer", None)
+
+    await department_service.delete_department(a.id, None)
+
+    assert sorted(database.rows[Department]) == [root.id, b.id]
+    assert database.department_employees[c.id] == {}
+
+
+@pytest.mark.asyncio
+async def test_delete_department_reassign(department_service, database):
+    _, a, b, c = await create_tree(department_service)
+    employee = await department_service.create_employee(
+        a.id, "John Doe", "Engineer", datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+    await department_service.delete_department(a.id, b.id)
+
+    assert database.rows[Department][c.id]["parent_id"] == b.id
+    assert list(database.department_employees[b.id]) == [employee.id]
+
+    changes, _, _ = await ChangeService(department_service.uow).get_changes(0, 100)
+    assert [change.action for change in changes[-3:]] == [
+        ChangeActionEnum.MOVED,
+        ChangeActionEnum.MOVED,
+        ChangeActionEnum.DELETED,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_delete_department_reassign_conflict(department_service, database):
+    _, a, b, c = await create_tree(department_service)
+    await department_service.create_department("C", b.id)
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await department_service.delete_department(a.id, b.id)
+
+    await department_service.uow.rollback()
+
+    assert database.rows[Department][c.id]["parent_id"] == a.id
+
+
+@pytest.mark.asyncio
+async def test_search_departments(department_service):
+    root, _, b, c = await create_tree(department_service)
+    sales = await department_service.create_department("Sales", b.id)
+    await department_service.create_department("Sales team", c.id)
+
+    items, has_more = await department_service.search_departments(
+        "Sal", SearchModeEnum.PREFIX, 1, 0
+    )
+
+    assert [department.id for department, _ in items] == [sales.id]
+    assert [item.id for item in items[0][1]] == [root.id, b.id]
+    assert has_more
+
+    items, _ = await department_service.search_departments(
+        "sales", SearchModeEnum.FUZZY, 10, 0
+    )
+
+    assert [department.name for department, _ in items] == ["Sales", "Sales team"]
+
+
+@pytest.mark.asyncio
+async def test_change_log(department_service):
+    await create_tree(department_service)
+
+    changes, next_cursor, has_more = await ChangeService(
+        department_service.uow
+    ).get_changes(1, 2)
+
+    assert [change.id for change in changes] == [2, 3]
+    assert next_cursor == 3
+    assert has_more
+
+
+@pytest.mark.asyncio
+async def test_clone_department(department_service, database):
+    _, a, b, c = await create_tree(department_service)
+    employee = await department_service.create_employee(
+        c.id, "John Doe", "Engineer", None
+    )
+
+    (
+        clone,
+        departments_count,
+        employees_count,
+    ) = await department_service.clone_department(a.id, b.id, None, True)
+
+    assert (clone.name, clone.parent_id) == ("A", b.id)
+    assert (departments_count, employees_count) == (2, 1)
+
+    _, _, children = await department_service.get_department(clone.id, 5, False)
+    assert [child.name for child in children] == ["C"]
+
+    _, employees, _ = await department_service.get_department(children[0].id, 1, True)
+    assert [item.full_name for item in employees] == ["John Doe"]
+    assert employees[0].id != employee.id
+
+    changes, _, _ = await ChangeService(department_service.uow).get_changes(0, 100)
+    assert [
+        (change.entity_id, change.data["source_id"]) for change in changes[-2:]
+    ] == [
+        (clone.id, a.id),
+        (children[0].id, c.id),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_clone_department_under_descendant(department_service, database):
+    root, _, _, c = await create_tree(department_service)
+
+    _, departments_count, employees_count = await department_service.clone_department(
+        root.id, c.id, None, False
+    )
+
+    assert (departments_count, employees_count) == (4, 0)
+    assert len(database.rows[Department]) == 8
+
+
+@pytest.mark.asyncio
+async def test_clone_department_duplicate_name(department_service, database):
+    root, a, _, _ = await create_tree(department_service)
+
+    with pytest.raises(DuplicateDepartmentNameError):
+        await department_service.clone_department(a.id, root.id, None, False)
+
+    clone, _, _ = await department_service.clone_department(a.id, root.id, "A2", False)
+
+    assert clone.parent_id == root.id
+    assert len(database.rows[Department]) == 6
+
+
+@pytest.mark.asyncio
+async def test_clone_subtree_constraint_rolls_back(uow, database):
+    root = Department(name="Root", parent_id=None)
+    uow.departments.add(root)
+    await uow.commit()
+    a = Department(name="A", parent_id=root.id)
+    uow.departments.add(a)
+    await uow.commit()
+
+    # Past the service check, the constraint fails the copy as it runs
+    with pytest.raises(DuplicateDepartmentNameError):
+        async with uow.handle_integrity_errors():
+            await uow.departments.clone_subtree(
+                a.id, root.id, "A", include_employees=False
+            )
+
+    assert len(database.rows[Department]) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_department_analytics(department_service):
+    root, a, b, c = await create_tree(department_service)
+    for department_id, position, hired_at in [
+        (a.id, "Engineer", datetime(2024, 1, 31, 23, tzinfo=timezone.utc)),
+        (c.id, "Engineer", datetime(2024, 3, 1, tzinfo=timezone.utc)),
+        (c.id, "Manager", None),
+        (b.id, "Manager", datetime(2024, 1, 2, tzinfo=timezone.utc)),
+    ]:
+        await department_service.create_employee(
+            department_id, "John Doe", position, hired_at
+        )
+
+    analytics = await department_service.get_department_analytics(root.id)
+
+    assert (analytics["departments"], analytics["max_depth"]) == (4, 2)
+    assert analytics["employees"] == 4
+    assert analytics["levels"] == [
+        {"depth": 0, "departments": 1},
+        {"depth": 1, "departments": 2},
+        {"depth": 2, "departments": 1},
+    ]
+    assert analytics["span_of_control"] == [
+        {"children": 0, "departments": 2},
+        {"children": 1, "departments": 1},
+        {"children": 2, "departments": 1},
+    ]
+    assert analytics["positions"] == [
+        {"position": "Engineer", "employees": 2},
+        {"position": "Manager", "employees": 2},
+    ]
+    assert analytics["hiring"] == [
+        {"month": "2024-01", "employees": 2},
+        {"month": "2024-03", "employees": 1},
+        {"month": None, "employees": 1},
+    ]
+
+    analytics = await department_service.get_department_analytics(a.id)
+
+    assert (analytics["departments"], analytics["employees"]) == (2, 3)
+
+
+@pytest.mark.asyncio
+async def test_get_department_analytics_invalidated(department_service):
+    root, _, _, c = await create_tree(department_service)
+
+    analytics = await department_service.get_department_analytics(root.id)
+    assert analytics is await department_service.get_department_analytics(root.id)
+
+    await department_service.create_department("D", c.id)
+
+    analytics = await department_service.get_department_analytics(root.id)
+    assert (analytics["departments"], analytics["max_depth"]) == (5, 3)
+
+
+@pytest.mark.asyncio
+async def test_get_department_analytics_not_found(department_service):
+    with pytest.raises(NotFoundError):
+        await department_service.get_department_analytics(1)
@@ -0,0 +1,154 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+
+from src.changelog.enums import ChangeActionEnum, EntityTypeEnum
+from src.changelog.models import Change
+from src.department.tree import DepartmentTree
+
+CREATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# 1 ─┬─ 2 ─── 4 ─── 6
+#    └─ 3 ─── 5
+ROWS = [
+    (1, "Root", None),
+    (2, "Sales", 1),
+    (3, "Engineering", 1),
+    (4, "Sales", 2),
+    (5, "Platform", 3),
+    (6, "Sales", 4),
+]
+
+
+async def rows(items):
+    for id, name, parent_id in items:
+        yield id, name, parent_id, CREATED_AT
+
+
+@pytest_asyncio.fixture
+async def tree():
+    tree = DepartmentTree()
+    await tree.load(rows(ROWS), 10)
+
+    return tree
+
+
+def ids(departments):
+    return sorted(department.id for department in departments)
+
+
+@pytest.mark.asyncio
+async def test_load(tree):
+    assert tree.loaded
+    assert tree.size == 6
+    assert tree.stats()["names"] == 4
+    assert ids(tree.get_children(1, depth=1)) == [2, 3]
+    assert ids(tree.get_children(1, depth=2)) == [2, 3, 4, 5]
+    assert ids(tree.get_children(1, depth=None)) == [2, 3, 4, 5, 6]
+    assert tree.get_children(7, depth=1) == []
+
+
+@pytest.mark.asyncio
+async def test_get_children_nodes(tree):
+    [department] = tree.get_children(4, depth=1)
+
+    assert department.id == 6
+    assert department.name == "Sales"
+    assert department.parent_id == 4
+    assert department.created_at == CREATED_AT
+
+
+@pytest.mark.asyncio
+async def test_check_is_child(tree):
+    assert tree.check_is_child(2, 6)
+    assert tree.check_is_child(2, 2)
+    assert not tree.check_is_child(2, 5)
+    assert not tree.check_is_child(2, None)
+
+
+@pytest.mark.asyncio
+async def test_check_is_child_unknown(tree):
+    # Departments written past the change log cannot be answered for
+    assert tree.check_is_child(99, 2) is None
+    assert tree.check_is_child(2, 99) is None
+
+
+@pytest.mark.asyncio
+async def test_upsert_moves_and_renames(tree):
+    tree.upsert(4, "Moved", 3)
+    tree.upsert(7, "New", 4, CREATED_AT)
+
+    assert ids(tree.get_children(2, depth=1)) == []
+    assert ids(tree.get_children(3, depth=1)) == [4, 5]
+    assert ids(tree.get_children(3, depth=None)) == [4, 5, 6, 7]
+    assert tree.get_children(3, depth=1)[-1].name == "Moved"
+    assert tree.check_is_child(3, 7)
+    assert tree.size == 7
+
+
+@pytest.mark.asyncio
+async def test_remove_cascades(tree):
+    tree.remove(2)
+
+    assert ids(tree.get_children(1, depth=None)) == [3, 5]
+    assert not tree.contains(4)
+    assert not tree.contains(6)
+    assert tree.size == 3
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_children(tree):
+    for id in range(7, 3000):
+        tree.upsert(id, "Node", id - 1 if id > 7 else 6)
+    tree.upsert(100, "Node", 1)
+
+    assert tree.stats()["overlay"] < 1024
+    assert ids(tree.get_children(1, depth=1)) == [2, 3, 100]
+    assert ids(tree.get_children(99, depth=1)) == []
+    assert tree.check_is_child(2, 99)
+    assert not tree.check_is_child(2, 2999)
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_in_order(tree):
+    def change(id: int, entity_id: int, action: ChangeActionEnum, **data):
+        return Change(
+            id=id,
+            entity_type=EntityTypeEnum.DEPARTMENT,
+            entity_id=entity_id,
+            action=action,
+            data=data,
+            created_at=CREATED_AT,
+        )
+
+    tree.apply(change(11, 7, ChangeActionEnum.CREATED, name="New", parent_id=5))
+    tree.apply(change(12, 3, ChangeActionEnum.DELETED, name="Engineering", parent_id=1))
+    tree.apply(change(12, 7, ChangeActionEnum.CREATED, name="New", parent_id=5))
+
+    assert tree.cursor == 12
+    assert ids(tree.get_children(1, depth=None)) == [2, 4, 6]
+    assert not tree.contains(7)
+
+
+@pytest.mark.asyncio
+async def test_load_replays_changes_received_meanwhile():
+    tree = DepartmentTree()
+
+    async def rows_with_change():
+        async for row in rows(ROWS[:2]):
+            yield row
+        tree.apply(
+            Change(
+                id=11,
+                entity_type=EntityTypeEnum.DEPARTMENT,
+                entity_id=3,
+                action=ChangeActionEnum.CREATED,
+                data={"name": "Engineering", "parent_id": 1},
+                created_at=CREATED_AT,
+            )
+        )
+
+    await tree.load(rows_with_change(), 10)
+
+    assert tree.cursor == 11
+    assert ids(tree.get_children(1, depth=1)) == [2, 3]
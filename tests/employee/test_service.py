@@ -0,0 +1,132 @@
+from functools import partial
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from src.changelog.enums import ChangeActionEnum
+from src.changelog.service import ChangeService
+from src.department.models import Department
+from src.employee.models import Employee
+from src.employee.queries import (
+    LOCK_TRANSFERRED_EMPLOYEES_QUERY,
+    TRANSFER_EMPLOYEES_QUERY,
+)
+from src.employee.repository import EmployeeRepository
+from src.employee.schemas import TransferEmployeesSchema
+from src.employee.service import EmployeeService
+from src.exceptions import NotFoundError
+from src.memory.database import InMemoryDatabase, InMemorySession
+from src.memory.unit_of_work import InMemoryUnitOfWork
+
+
+@pytest.fixture
+def database():
+    database = InMemoryDatabase()
+    for id, name, parent_id in [(1, "Root", None), (2, "A", 1), (3, "B", 1)]:
+        database.put(
+            Department,
+            id,
+            {"id": id, "name": name, "parent_id": parent_id, "created_at": None},
+        )
+    for id, department_id in [(1, 2), (2, 2), (3, 3)]:
+        database.put(
+            Employee,
+            id,
+            {
+                "id": id,
+                "department_id": department_id,
+                "full_name": f"Employee {id}",
+                "position": "Engineer",
+                "hired_at": None,
+                "created_at": None,
+            },
+        )
+    return database
+
+
+@pytest_asyncio.fixture
+async def uow(database):
+    async with InMemoryUnitOfWork(partial(InMemorySession, database)) as uow:
+        yield uow
+
+
+@pytest.fixture
+def employee_service(uow):
+    return EmployeeService(uow)
+
+
+@pytest.mark.asyncio
+async def test_transfer_employees(employee_service, database):
+    rows = await employee_service.transfer_employees([(3, 3), (1, 3)])
+
+    assert [tuple(row) for row in rows] == [(1, 3, 2), (3, 3, 3)]
+    assert list(database.department_employees[2]) == [2]
+    assert sorted(database.department_employees[3]) == [1, 3]
+
+    # Employees already in the target are not logged as moved
+    changes, _, _ = await ChangeService(employee_service.uow).get_changes(0, 100)
+    assert [(change.entity_id, change.action) for change in changes] == [
+        (1, ChangeActionEnum.MOVED)
+    ]
+    assert changes[0].data == {"department_id": 3, "previous_department_id": 2}
+
+
+@pytest.mark.asyncio
+async def test_transfer_employees_department_not_found(employee_service, database):
+    with pytest.raises(NotFoundError, match="Departments not found: 4, 5"):
+        await employee_service.transfer_employees([(1, 4), (2, 3), (3, 5)])
+
+    assert database.rows[Employee][1]["department_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_transfer_employees_department_deleted(
+    employee_service, database, monkeypatch
+):
+    # The department is deleted between the check and the update
+    monkeypatch.setattr(
+        employee_service.uow.departments,
+        "get_many",
+        AsyncMock(return_value=[(Department(id=4), None)]),
+    )
+
+    with pytest.raises(NotFoundError, match="Department not found"):
+        await employee_service.transfer_employees([(1, 4)])
+
+    assert database.rows[Employee][1]["department_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_transfer_employees_employee_not_found(employee_service, database):
+    with pytest.raises(NotFoundError, match="Employees not found: 7"):
+        await employee_service.transfer_employees([(1, 3), (7, 3)])
+
+    assert database.rows[Employee][1]["department_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_transfer_reads_previous_departments_from_locked_rows():
+    session = AsyncMock()
+    session.execute.return_value = Mock(all=Mock(return_value=[(1, 2), (3, 3)]))
+
+    rows = await EmployeeRepository(session).transfer([(1, 3), (3, 3), (7, 3)])
+
+    assert rows == [(1, 3, 2), (3, 3, 3)]
+    assert [call.args[0] for call in session.execute.call_args_list] == [
+        LOCK_TRANSFERRED_EMPLOYEES_QUERY,
+        TRANSFER_EMPLOYEES_QUERY,
+    ]
+
+
+def test_transfer_employees_schema_duplicates():
+    with pytest.raises(HTTPException):
+        TransferEmployeesSchema.model_validate(
+            {
+                "transfers": [
+                    {"employee_id": 1, "department_id": 2},
+                    {"employee_id": 1, "department_id": 3},
+                ]
+            }
+        )
@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+from src.generator.enums import BranchingEnum
+from src.generator.generator import OrganizationGenerator
+from src.generator.schemas import GeneratorConfigSchema
+
+
+def generate(**kwargs):
+    generator = OrganizationGenerator(GeneratorConfigSchema(**kwargs), start_id=10)
+    departments = list(generator.departments())
+    employees = list(generator.employees())
+    return generator, departments, employees
+
+
+def test_generate_same_seed_same_dataset():
+    _, departments, employees = generate(seed="test", depth=4)
+    _, other_departments, other_employees = generate(seed="test", depth=4)
+
+    assert departments == other_departments
+    assert employees == other_employees
+
+
+def test_generate_other_seed_other_dataset():
+    _, departments, _ = generate(seed="test", depth=4)
+    _, other_departments, _ = generate(seed="other", depth=4)
+
+    assert departments != other_departments
+
+
+def test_generate_fixed_branching_ok():
+    generator, departments, _ = generate(
+        roots=2, depth=3, branching=BranchingEnum.FIXED, children=3
+    )
+
+    assert generator.departments_count == 2 + 2 * 3 + 2 * 3 * 3
+    assert len(departments) == generator.departments_count
+    assert [department[0] for department in departments] == list(
+        range(10, 10 + len(departments))
+    )
+
+
+def test_generate_parents_before_children():
+    _, departments, employees = generate(depth=5, max_employees=3)
+
+    seen = set()
+    for id, _, parent_id in departments:
+        assert parent_id is None or parent_id in seen
+        seen.add(id)
+
+    assert all(employee[0] in seen for employee in employees)
+
+
+def test_generate_names_unique_among_siblings_only():
+    _, departments, _ = generate(
+        depth=3, branching=BranchingEnum.FIXED, children=8, name_pool=5
+    )
+
+    names_by_parent = defaultdict(list)
+    for _, name, parent_id in departments:
+        names_by_parent[parent_id].append(name)
+
+    for names in names_by_parent.values():
+        assert len(names) == len(set(names))
+
+    names = [name for _, name, parent_id in departments if parent_id is not None]
+    assert len(names) > len(set(names))
+
+
+def test_generate_max_departments_ok():
+    generator, departments, _ = generate(
+        depth=10, branching=BranchingEnum.FIXED, children=5, max_departments=100
+    )
+
+    assert len(departments) == 100
+    assert generator.departments_count == 100
@@ -0,0 +1,83 @@
+from functools import partial
+
+import pytest
+import pytest_asyncio
+
+from src.department.models import Department
+from src.employee.models import Employee
+from src.memory.database import InMemoryDatabase, InMemorySession
+from src.memory.unit_of_work import InMemoryUnitOfWork
+
+
+@pytest.fixture
+def database():
+    database = InMemoryDatabase()
+    # 1 -> 2 -> 4 -> 5
+    #   -> 3
+    for id, name, parent_id in [
+        (1, "Root", None),
+        (2, "A", 1),
+        (3, "B", 1),
+        (4, "C", 2),
+        (5, "D", 4),
+    ]:
+        database.put(
+            Department,
+            id,
+            {"id": id, "name": name, "parent_id": parent_id, "created_at": None},
+        )
+    return database
+
+
+@pytest_asyncio.fixture
+async def uow(database):
+    async with InMemoryUnitOfWork(partial(InMemorySession, database)) as uow:
+        yield uow
+
+
+@pytest.mark.asyncio
+async def test_children_by_level(uow):
+    rows = [
+        (row.id, row.depth)
+        async for row in uow.departments.stream_children(1, limit=3, batch_size=2)
+    ]
+    children = await uow.departments.get_children(1, depth=2)
+
+    assert rows == [(2, 1), (3, 1), (4, 2)]
+    assert [department.id for department in children] == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_ancestors_and_cycles(uow):
+    ancestors = await uow.departments.get_ancestors_many([5, 1, 6])
+
+    assert [(row.id, row.depth) for row in ancestors[5]] == [(1, 3), (2, 2), (4, 1)]
+    assert ancestors[1] == []
+    assert 6 not in ancestors
+    assert await uow.departments.check_is_child(2, 5)
+    assert not await uow.departments.check_is_child(2, 3)
+    assert not await uow.departments.check_is_child(2, None)
+
+
+@pytest.mark.asyncio
+async def test_rollback_restores_indexes(uow, database):
+    uow.employees.add(
+        Employee(department_id=4, full_name="John Doe", position="Engineer")
+    )
+    await uow.commit()
+
+    department = await uow.departments.get_by_id(3)
+    department.name = "E"
+    await uow.departments.reassign_parent(2, 3)
+    await uow.departments.delete(3)
+
+    assert sorted(database.rows[Department]) == [1, 2]
+    assert database.rows[Employee] == {}
+
+    await uow.rollback()
+
+    assert sorted(database.rows[Department]) == [1, 2, 3, 4, 5]
+    assert list(database.children[2]) == [4]
+    assert database.names[1, "B"] == 3
+    assert [name for name, _ in database.sorted_names] == ["A", "B", "C", "D", "Root"]
+    assert list(database.department_employees[4]) == [1]
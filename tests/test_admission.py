@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionLimiter
+from src.exceptions import ServiceOverloadedError
+
+
+async def hold(limiter: AdmissionLimiter, release: asyncio.Event):
+    admission = limiter()
+    await admission.__anext__()
+    try:
+        await release.wait()
+    finally:
+        await admission.aclose()
+
+
+@pytest.mark.asyncio
+async def test_admission_within_limit():
+    limiter = AdmissionLimiter("test", 2, 0, 1)
+    release = asyncio.Event()
+
+    holders = [asyncio.create_task(hold(limiter, release)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    assert limiter.active == 2
+    release.set()
+    await asyncio.gather(*holders)
+
+    assert limiter.stats()["active"] == 0
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["rejected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_queue_full():
+    limiter = AdmissionLimiter("test", 1, 1, 1)
+    release = asyncio.Event()
+
+    holders = [asyncio.create_task(hold(limiter, release)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceOverloadedError) as e:
+        await hold(limiter, release)
+
+    assert e.value.retry_after > 0
+    assert limiter.waiting == 1
+    assert limiter.rejected == 1
+
+    release.set()
+    await asyncio.gather(*holders)
+
+    assert limiter.admitted == 2
+
+
+@pytest.mark.asyncio
+async def test_admission_queue_timeout():
+    limiter = AdmissionLimiter("test", 1, 1, 0.01)
+    release = asyncio.Event()
+
+    holder = asyncio.create_task(hold(limiter, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceOverloadedError):
+        await hold(limiter, release)
+
+    assert limiter.waiting == 0
+    assert limiter.rejected == 1
+
+    release.set()
+    await holder
@@ -0,0 +1,125 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.compression import CompressionMiddleware, negotiate_encoding
+from src.settings import settings
+
+BODY = "department " * 1000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, prefixes=("/departments",))
+
+    @app.get("/departments/large")
+    async def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/departments/small")
+    async def small():
+        return PlainTextResponse("department")
+
+    @app.get("/departments/stream")
+    async def stream():
+        async def lines():
+            for _ in range(3):
+                yield BODY + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/departments/events")
+    async def events():
+        async def lines():
+            yield "data: {}\n\n"
+
+        return StreamingResponse(lines(), media_type="text/event-stream")
+
+    @app.get("/other")
+    async def other():
+        return PlainTextResponse(BODY)
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(settings, "compression_encodings", ["zstd", "br", "gzip"])
+
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, *;q=0.1") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+
+async def get(client: AsyncClient, path: str, accept_encoding: str = "gzip"):
+    # httpx would decode the body otherwise
+    async with client.stream(
+        "GET", path, headers={"Accept-Encoding": accept_encoding}
+    ) as response:
+        return response, b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+@pytest.mark.asyncio
+async def test_compresses_large_body(client):
+    response, body = await get(client, "/departments/large")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(body))
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert gzip.decompress(body).decode() == BODY
+
+
+@pytest.mark.asyncio
+async def test_compresses_large_body_in_thread(client, monkeypatch):
+    monkeypatch.setattr(settings, "compression_offload_size", 1)
+
+    response, body = await get(client, "/departments/large")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(body))
+    assert gzip.decompress(body).decode() == BODY
+
+
+@pytest.mark.asyncio
+async def test_compresses_stream(client):
+    response, body = await get(client, "/departments/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body).decode() == (BODY + "\n") * 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path, accept_encoding",
+    [
+        ("/departments/small", "gzip"),
+        ("/departments/events", "gzip"),
+        ("/departments/large", "identity"),
+        ("/other", "gzip"),
+    ],
+)
+async def test_leaves_body_alone(client, path, accept_encoding):
+    response, _ = await get(client, path, accept_encoding)
+
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstd")])
+async def test_compresses_with_optional_codecs(client, encoding, module):
+    import src.compression
+
+    codec = getattr(src.compression, module)
+    if codec is None:
+        pytest.skip(f"{module} is not available")
+
+    response, body = await get(client, "/departments/stream", encoding)
+
+    assert response.headers["content-encoding"] == encoding
+    assert codec.decompress(body).decode() == (BODY + "\n") * 3
@@ -0,0 +1,48 @@
+import pytest
+
+import src.lifespan
+from src.exceptions import ServiceNotReadyError
+from src.health.routes import check_readiness
+from src.lifespan import Readiness, warm_up_until_ready
+from src.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def readiness(monkeypatch):
+    readiness = Readiness()
+    monkeypatch.setattr(src.lifespan, "readiness", readiness)
+    monkeypatch.setattr("src.health.routes.readiness", readiness)
+
+    return readiness
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_until_ready(monkeypatch, readiness):
+    errors = []
+
+    async def warm_up():
+        if len(errors) < 2:
+            errors.append(readiness.error)
+            raise OSError("connection refused")
+
+    monkeypatch.setattr(src.lifespan, "warm_up", warm_up)
+    monkeypatch.setattr(settings, "warmup_retry_interval", 0)
+
+    with pytest.raises(ServiceNotReadyError):
+        await check_readiness()
+
+    await warm_up_until_ready()
+
+    assert errors == [None, "Warm-up failed: connection refused"]
+    assert readiness.error is None
+    assert readiness.warmup_seconds is not None
+    assert (await check_readiness())["ready"]
+
+
+@pytest.mark.asyncio
+async def test_not_ready_while_draining(readiness):
+    readiness.ready = True
+    readiness.draining = True
+
+    with pytest.raises(ServiceNotReadyError, match="Shutting down"):
+        await check_readiness()
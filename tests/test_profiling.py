@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from src.profiling import RequestProfile, profile_methods, profiles, ProfiledRoute
+from src.settings import settings
+
+
+class ItemSchema(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0)
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    profiles.clear()
+
+    @profile_methods("orm")
+    class Repository:
+        async def get(self, id: int):
+            await asyncio.sleep(0.01)
+            return {"id": id, "name": "Item"}
+
+    @profile_methods("service")
+    class Service:
+        async def get(self, id: int):
+            await asyncio.sleep(0.01)
+            return await Repository().get(id)
+
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/items/{id}", response_model=ItemSchema)
+    async def get_item(id: int):
+        return await Service().get(id)
+
+    app = FastAPI()
+    app.include_router(router)
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_profile_phases():
+    profile = RequestProfile(1, "GET", "/items/1")
+
+    profile.enter()
+    profile.enter()
+    profile.add("db", 0.5)
+    profile.exit("Repository.get", "orm", 2)
+    profile.exit("Service.get", "service", 3)
+    profile.finish(200)
+
+    assert profile.phases["db"] == 0.5
+    assert profile.phases["orm"] == 1.5
+    assert profile.phases["service"] == 1
+    assert profile.calls == {"Repository.get": (1, 2), "Service.get": (1, 3)}
+
+    # Late spans, e.g. from tasks started during the request, are ignored
+    profile.add("db", 1)
+    assert profile.phases["db"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_profiles_forced_request(client):
+    response = await client.get("/items/1", headers={"X-Profile": "secret"})
+
+    assert response.json() == {"id": 1, "name": "Item"}
+
+    [profile] = profiles.list()
+    assert response.headers["x-profile-id"] == str(profile.id)
+
+    stats = profile.stats()
+    assert stats["path"] == "/items/1"
+    assert stats["status_code"] == 200
+    assert [call["name"] for call in stats["calls"]] == [
+        "Service.get",
+        "Repository.get",
+    ]
+    assert stats["phases"]["service"] >= 0.01
+    assert stats["phases"]["orm"] >= 0.01
+    assert stats["phases"]["validation"] > 0
+    assert stats["phases"]["encoding"] > 0
+    assert sum(stats["phases"].values()) == pytest.approx(stats["duration"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+async def test_skips_unsampled_request(client, headers):
+    response = await client.get("/items/1", headers=headers)
+
+    assert "x-profile-id" not in response.headers
+    assert profiles.list() == []
+
+
+@pytest.mark.asyncio
+async def test_samples_requests(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1)
+
+    for _ in range(3):
+        await client.get("/items/1")
+
+    assert len(profiles.list()) == 3
+    assert len(profiles.list(path="/items/2")) == 0
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", False)
+
+    class Service:
+        async def get(self):
+            pass
+
+    get = Service.get
+
+    assert profile_methods("service")(Service).get is get
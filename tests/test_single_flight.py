@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result():
+    single_flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return object()
+
+    waiters = [asyncio.create_task(single_flight.do("key", fetch)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_different_keys():
+    single_flight = SingleFlight()
+
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        single_flight.do(1, lambda: fetch(1)), single_flight.do(2, lambda: fetch(2))
+    )
+
+    assert results == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_error():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        raise ValueError("Fetch failed")
+
+    waiters = [asyncio.create_task(single_flight.do("key", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_cancelled():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "result"
+
+    cancelled_waiter = asyncio.create_task(single_flight.do("key", fetch))
+    waiter = asyncio.create_task(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    cancelled_waiter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled_waiter
+
+
+@pytest.mark.asyncio
+async def test_single_flight_all_waiters_cancelled():
+    single_flight = SingleFlight()
+    fetch_cancelled = asyncio.Event()
+
+    async def fetch():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            fetch_cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.wait_for(fetch_cancelled.wait(), 1)
+
+    assert single_flight.in_flight() == 0
+
+    async def other_fetch():
+        return "result"
+
+    assert await single_flight.do("key", other_fetch) == "result"
@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from src.changelog.repository import APPEND_LOCK_QUERY, NOTIFY_QUERY
+from src.department.queries import LOCK_DEPARTMENTS_QUERY
+from src.generator.loader import SET_DEPARTMENTS_SEQUENCE_QUERY
+from src.settings import settings
+from src.slow_queries import SlowQueryLog, fingerprint
+
+CHILDREN_QUERY = (
+    "WITH RECURSIVE children(id, depth) AS (SELECT departments.id AS id, 1 AS depth "
+    "FROM departments WHERE departments.parent_id = $1::INTEGER) "
+    "SELECT departments.id FROM departments JOIN children ON departments.id = children.id"
+)
+
+
+def test_fingerprint_groups_shapes():
+    key, statement = fingerprint(
+        "SELECT employees.id FROM employees\n"
+        "WHERE employees.department_id IN ($1::INTEGER, $2::INTEGER) LIMIT 10"
+    )
+    other_key, _ = fingerprint(
+        "SELECT employees.id FROM employees "
+        "WHERE employees.department_id IN ($1::INTEGER) LIMIT 20"
+    )
+
+    assert key == other_key
+    assert statement == (
+        "SELECT employees.id FROM employees "
+        "WHERE employees.department_id IN (...) LIMIT ?"
+    )
+    assert fingerprint("SELECT 'a'")[0] == fingerprint("SELECT 'b'")[0]
+    assert fingerprint("SELECT $1")[0] != fingerprint("SELECT $2")[0]
+
+
+@pytest.mark.asyncio
+async def test_records_slow_queries(monkeypatch):
+    monkeypatch.setattr(settings, "slow_query_explain", False)
+    log = SlowQueryLog(2)
+
+    log.record(CHILDREN_QUERY, (1,), 0.6)
+    log.record(CHILDREN_QUERY, (2,), 0.8)
+    log.record("SELECT 1", (), 1.0)
+
+    [children, select] = log.list()
+    assert children.calls == 2
+    assert children.total_duration == pytest.approx(1.4)
+    assert children.max_duration == 0.8
+    assert children.last_parameters == ["2"]
+    assert children.plan is None
+    assert select.calls == 1
+
+    # The least recently seen shape is evicted
+    log.record("SELECT 2 FROM departments", (), 0.5)
+    assert [query.statement for query in log.list()] == [
+        "SELECT ?",
+        "SELECT ? FROM departments",
+    ]
+
+
+@pytest.fixture
+def connection():
+    connection_mock = AsyncMock()
+    connection_mock.exec_driver_sql = AsyncMock(
+        return_value=[("Nested Loop (actual time=0.1..0.2)",), ("  Buffers: hit=4",)]
+    )
+    return connection_mock
+
+
+@pytest.fixture
+def log(monkeypatch, connection):
+    monkeypatch.setattr(settings, "slow_query_explain", True)
+    monkeypatch.setattr(settings, "slow_query_explain_interval", 60)
+
+    @asynccontextmanager
+    async def connect():
+        yield connection
+
+    log = SlowQueryLog(10)
+    log._engine = AsyncMock()
+    log._engine.connect = connect
+    return log
+
+
+@pytest.mark.asyncio
+async def test_explains_slow_query(log, connection):
+    log.record(CHILDREN_QUERY, (1,), 0.6)
+    await asyncio.sleep(0)
+
+    [query] = log.list()
+    assert query.plan == "Nested Loop (actual time=0.1..0.2)\n  Buffers: hit=4"
+    assert query.plan_parameters == ["1"]
+    assert query.plan_error is None
+
+    statements = [call.args[0] for call in connection.exec_driver_sql.call_args_list]
+    assert statements[0] == "SET TRANSACTION READ ONLY"
+    assert statements[-1] == f"EXPLAIN (ANALYZE, BUFFERS) {CHILDREN_QUERY}"
+    assert connection.exec_driver_sql.call_args.args[1] == (1,)
+
+    # The plan is refreshed only after SLOW_QUERY_EXPLAIN_INTERVAL
+    log.record(CHILDREN_QUERY, (2,), 0.6)
+    await asyncio.sleep(0)
+    assert connection.exec_driver_sql.call_count == len(statements)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "UPDATE departments SET parent_id=$1 WHERE departments.id = $2",
+        "SELECT departments.id FROM departments WHERE id = $1 FOR UPDATE",
+        "SELECT departments.id FROM departments WHERE id = $1 FOR KEY SHARE",
+    ],
+)
+async def test_does_not_explain_writes(log, connection, statement):
+    log.record(statement, (1, 2), 0.6)
+    await asyncio.sleep(0)
+
+    assert connection.exec_driver_sql.call_count == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "query",
+    [
+        LOCK_DEPARTMENTS_QUERY,
+        APPEND_LOCK_QUERY,
+        NOTIFY_QUERY,
+        SET_DEPARTMENTS_SEQUENCE_QUERY,
+    ],
+)
+async def test_does_not_explain_side_effects(log, connection, query):
+    # Selects that lock, notify or move a sequence would do it again
+    statement = str(query.compile(dialect=dialect()))
+    assert statement.startswith("SELECT")
+
+    log.record(statement, (1, 2), 0.6)
+    await asyncio.sleep(0)
+
+    assert connection.exec_driver_sql.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_explain_error(log, connection):
+    connection.exec_driver_sql.side_effect = Exception("canceling statement")
+
+    log.record(CHILDREN_QUERY, (1,), 0.6)
+    await asyncio.sleep(0)
+
+    [query] = log.list()
+    assert query.plan is None
+    assert query.plan_error == "Exception: canceling statement"